@@ -1,4 +1,3 @@
-from copy import deepcopy
 from ntpath import join
 from dsp_simulation.cluster.cluster import Cluster
 from dsp_simulation.runtime.profiler import Profiler
@@ -18,8 +17,12 @@ from test import *
 
 import argparse
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable
 import pickle as pkl
+import random as rd
+import numpy as np
 
 
 def word_count_topology():
@@ -266,7 +269,42 @@ def init_cluster():
 
     return cluster
 
-import multiprocessing as mlp
+def run_benchmark(simulator: Simulator, seed: int):
+    """Run one benchmark in a worker process of --jobs
+
+    Args:
+        simulator (Simulator): simulator of one (scheduler, replication) pair
+        seed (int): seed of the random streams of the process
+
+    Returns:
+        Tuple[str, str]: output directory and elapsed time of the benchmark
+    """
+    # the generators of the network and the topology have their own streams, which are restarted along with the global ones
+    simulator.seed(seed)
+    stime = datetime.datetime.now()
+    simulator.start_benchmark()
+    return str(simulator.outpath), str(datetime.datetime.now() - stime)
+
+
+def run_benchmarks(simulators: Iterable[Simulator]):
+    """Run the given simulators one after another, or in --jobs worker processes.
+    Every worker process runs one simulator at a time with its own seed, and writes to the output directory of the simulator.
+    """
+    global args
+    
+    if args.jobs <= 1:
+        for simulator in simulators:
+            simulator.start_benchmark()
+        return
+    
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(run_benchmark, simulator, rd.randrange(2**31)) for simulator in simulators]
+        results = [future.result() for future in futures]
+    
+    print(f'Finish {len(results)} benchmarks')
+    for outpath, elapsed_time in results:
+        print(f'{outpath}: {elapsed_time}')
+
 
 def simulate(cluster: Cluster, topology: Topology):
     global args
@@ -285,16 +323,13 @@ def simulate(cluster: Cluster, topology: Topology):
     profiler = Profiler(cluster=cluster, topology=topology)
     
 
-    rr_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RoundRobinScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    rr_simulator.start_benchmark()
-    #rd_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RandomScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
+    rr_simulator = Simulator(cluster.clone(), topology.clone(), RoundRobinScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    #rd_simulator = Simulator(cluster.clone(), topology.clone(), RandomScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime)
     #rd_simulator.start_benchmark()
-    aco_simulator = Simulator(deepcopy(cluster), deepcopy(topology), ACOScheduler(num_ants=200, alpha=3, beta=1), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    aco_simulator.start_benchmark()
-    ga_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GAScheduler(num_iter=25, num_pop=100, num_cross=33, num_mut=33), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    ga_simulator.start_benchmark()
-    gwo_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GWOScheduler(num_wolves=75, num_iter=50), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    gwo_simulator.start_benchmark()
+    aco_simulator = Simulator(cluster.clone(), topology.clone(), ACOScheduler(num_ants=200, alpha=3, beta=1), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    ga_simulator = Simulator(cluster.clone(), topology.clone(), GAScheduler(num_iter=25, num_pop=100, num_cross=33, num_mut=33), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    gwo_simulator = Simulator(cluster.clone(), topology.clone(), GWOScheduler(num_wolves=75, num_iter=50), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    return [rr_simulator, aco_simulator, ga_simulator, gwo_simulator]
     
 
 def simulate2(cluster: Cluster, topology: Topology):
@@ -313,16 +348,13 @@ def simulate2(cluster: Cluster, topology: Topology):
     #topology.instantiate(args.max_operators_in_a_worker)
     profiler = Profiler(cluster=cluster, topology=topology)
     
-    rr_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RoundRobinScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    rr_simulator.start_benchmark()
-    #rd_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RandomScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
+    rr_simulator = Simulator(cluster.clone(), topology.clone(), RoundRobinScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    #rd_simulator = Simulator(cluster.clone(), topology.clone(), RandomScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime)
     #rd_simulator.start_benchmark()
-    aco_simulator = Simulator(deepcopy(cluster), deepcopy(topology), ACOScheduler(num_ants=100, alpha=3, beta=1), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    aco_simulator.start_benchmark()
-    ga_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    ga_simulator.start_benchmark()
-    gwo_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GWOScheduler(num_wolves=75, num_iter=25), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    gwo_simulator.start_benchmark()
+    aco_simulator = Simulator(cluster.clone(), topology.clone(), ACOScheduler(num_ants=100, alpha=3, beta=1), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    ga_simulator = Simulator(cluster.clone(), topology.clone(), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    gwo_simulator = Simulator(cluster.clone(), topology.clone(), GWOScheduler(num_wolves=75, num_iter=25), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    return [rr_simulator, aco_simulator, ga_simulator, gwo_simulator]
     
 def simulate4(cluster: Cluster, topology: Topology, ref_topology:Topology):
     global args
@@ -340,16 +372,13 @@ def simulate4(cluster: Cluster, topology: Topology, ref_topology:Topology):
     #topology.instantiate(args.max_operators_in_a_worker)
     profiler = Profiler(cluster=cluster, topology=topology)
     
-    rr_simulator = Simulator(deepcopy(cluster), deepcopy(ref_topology), RoundRobinScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time)
-    rr_simulator.start_benchmark()
-    #rd_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RandomScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
+    rr_simulator = Simulator(cluster.clone(), ref_topology.clone(), RoundRobinScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    #rd_simulator = Simulator(cluster.clone(), topology.clone(), RandomScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime)
     #rd_simulator.start_benchmark()
-    aco_simulator = Simulator(deepcopy(cluster), deepcopy(topology), ACOScheduler(num_ants=100, alpha=3, beta=1), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    aco_simulator.start_benchmark()
-    ga_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    ga_simulator.start_benchmark()
-    gwo_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GWOScheduler(num_wolves=75, num_iter=25), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    gwo_simulator.start_benchmark()
+    aco_simulator = Simulator(cluster.clone(), topology.clone(), ACOScheduler(num_ants=100, alpha=3, beta=1), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    ga_simulator = Simulator(cluster.clone(), topology.clone(), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    gwo_simulator = Simulator(cluster.clone(), topology.clone(), GWOScheduler(num_wolves=75, num_iter=25), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    return [rr_simulator, aco_simulator, ga_simulator, gwo_simulator]
     
 
 def simulate3(cluster: Cluster, topology: Topology):
@@ -369,16 +398,13 @@ def simulate3(cluster: Cluster, topology: Topology):
     profiler = Profiler(cluster=cluster, topology=topology)
     
     
-    rr_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RoundRobinScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    rr_simulator.start_benchmark()
-    #rd_simulator = Simulator(deepcopy(cluster), deepcopy(topology), RandomScheduler(), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
+    rr_simulator = Simulator(cluster.clone(), topology.clone(), RoundRobinScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    #rd_simulator = Simulator(cluster.clone(), topology.clone(), RandomScheduler(), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime)
     #rd_simulator.start_benchmark()
-    aco_simulator = Simulator(deepcopy(cluster), deepcopy(topology), ACOScheduler(num_ants=100, alpha=3, beta=1), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    aco_simulator.start_benchmark()
-    ga_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    ga_simulator.start_benchmark()
-    gwo_simulator = Simulator(deepcopy(cluster), deepcopy(topology), GWOScheduler(num_wolves=75, num_iter=25), deepcopy(profiler), outdir, tot_time=args.simulation_time, runtime=args.runtime)
-    gwo_simulator.start_benchmark()
+    aco_simulator = Simulator(cluster.clone(), topology.clone(), ACOScheduler(num_ants=100, alpha=3, beta=1), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    ga_simulator = Simulator(cluster.clone(), topology.clone(), GAScheduler(num_iter=25, num_pop=50, num_cross=15, num_mut=15), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    gwo_simulator = Simulator(cluster.clone(), topology.clone(), GWOScheduler(num_wolves=75, num_iter=25), profiler.clone(), outdir, tot_time=args.simulation_time, runtime=args.runtime, engine=args.engine, track_ready=args.track_ready, batch_output=args.batch_output, partitions=args.partitions, checkpoint_interval=args.checkpoint_interval)
+    return [rr_simulator, aco_simulator, ga_simulator, gwo_simulator]
 
 
 if __name__ == '__main__':
@@ -419,6 +445,14 @@ if __name__ == '__main__':
     
     parser.add_argument('--simulation-time', type=int, default=900)
     parser.add_argument('--simulation-frequency', type=int, default=10000, help='Time frequency, if the value is 10000, simulator environment execute flow every 1 / frequency second')
+    parser.add_argument('--engine', type=str, default='tick', choices=Simulator.ENGINE, help='tick: poll every task each 1 / frequency second, event: jump between timestamped events, compiled: numba-compiled tick loop, fluid: rate-based approximation, parallel: event engine split across processes')
+    parser.add_argument('--track-ready', action='store_true', help='tick engine only: run only the operator tasks which have enough input instead of polling all of them')
+    parser.add_argument('--batch-output', action='store_true', help='emit the outputs of one operator execution as a single message carrying their count')
+    parser.add_argument('--partitions', type=int, default=2, help='parallel engine only: the maximum number of processes simulating a deployment')
+    parser.add_argument('--jobs', type=int, default=1, help='the number of worker processes running the (scheduler, replication) benchmarks, each with its own seed')
+    parser.add_argument('--seed', type=int, help='seed of the random streams; with --jobs, the seeds of the benchmarks are drawn from it')
+    parser.add_argument('--checkpoint-interval', type=float, default=0, help='tick and event engines only: simulated seconds between two checkpoints written to the output directory of each benchmark; 0 disables checkpoints')
+    parser.add_argument('--resume', type=str, nargs='+', help='checkpoint files, or output directories of benchmarks, to resume instead of starting new benchmarks')
     
     parser.add_argument('--output-directory', type=str)
     
@@ -446,6 +480,10 @@ if __name__ == '__main__':
     
     args = parser.parse_args()
     
+    if args.seed is not None:
+        rd.seed(args.seed)
+        np.random.seed(args.seed)
+    
     if args.random_cluster:
         cluster=  init_cluster()
     cluster = init_cluster()
@@ -522,14 +560,14 @@ if __name__ == '__main__':
     #for _ in range(args.benchmark_count):
     #    topology.instantiate(args.max_operators_in_a_worker)
     #    if args.benchmark:
-    #        simulate(cluster, topology)
+    #        run_benchmarks(simulate(cluster, topology))
             
     #if args.simulate_stat:
     #    topology = simplified_stats_application()
     #    for _ in range(args.benchmark_count):
     #        topology.instantiate(args.max_operators_in_a_worker)
     #    if args.benchmark:
-    #        simulate(cluster, topology)
+    #        run_benchmarks(simulate(cluster, topology))
             
     #if args.simulate_etl:
     #    topology = simplified_etl_application()
@@ -537,7 +575,7 @@ if __name__ == '__main__':
     #for _ in range(args.benchmark_count):
     #    topology.instantiate(args.max_operators_in_a_worker)
     #    if args.benchmark:
-    #        simulate(cluster, topology)
+    #        run_benchmarks(simulate(cluster, topology))
     
     if args.test_overall:
         topology.instantiate(args.max_operators_in_a_worker)
@@ -566,10 +604,11 @@ if __name__ == '__main__':
             simulate_gwo_by_num_wolf(cluster,topology,args)
             simulate_gwo_by_iteration(cluster,topology,args)
             
-    if args.benchmark_static:
+    if args.resume:
+        run_benchmarks(Simulator.resume(path) for path in args.resume)
+    elif args.benchmark_static:
         topology.instantiate(args.max_operators_in_a_worker)
-        for _ in range(args.benchmark_count):
-            simulate3(cluster, topology)
+        run_benchmarks(simulator for _ in range(args.benchmark_count) for simulator in simulate3(cluster, topology))
     elif args.benchmark_reference:
         topology.instantiate(args.max_operators_in_a_worker)
         if args.simulate_wordcount2:
@@ -579,13 +618,11 @@ if __name__ == '__main__':
         if args.simulate_stat:
             ref_topology = simplified_stats_application_reference()
         ref_topology.instantiate(args.max_operators_in_a_worker)
-        for _ in range(args.benchmark_count):
-            simulate4(cluster, topology, ref_topology)
+        run_benchmarks(simulator for _ in range(args.benchmark_count) for simulator in simulate4(cluster, topology, ref_topology))
         
     elif args.benchmark:
         topology.instantiate(args.max_operators_in_a_worker)
-        for _ in range(args.benchmark_count):
-            simulate2(cluster, topology)
+        run_benchmarks(simulator for _ in range(args.benchmark_count) for simulator in simulate2(cluster, topology))
         
         
         
@@ -1,3 +1,4 @@
+import copy
 import math
 import random as rd
 from re import sub
@@ -70,10 +71,10 @@ class Cluster:
                 worker_info[worker] = node
                 workers.append(node)
         
+        Objective.clear_cache()
         Objective.AVAILABILITY_MIN = math.log(97)
         Objective.RESPONSETIME_MIN = 2 * (1/1.2 + 1/1.2) 
-        Objective.AVAILABILITY_MAX = Objective.availability(workers)
-        Objective.RESPONSETIME_MAX = Objective.topology_network_distance(workers)
+        Objective.RESPONSETIME_MAX, Objective.AVAILABILITY_MAX = Objective.evaluate(workers)
         print(f'Availability: {Objective.AVAILABILITY_MIN}, {Objective.AVAILABILITY_MAX}')
         print(f'Response Time: {Objective.RESPONSETIME_MIN}, {Objective.RESPONSETIME_MAX}')
         #response_time = 0
@@ -211,6 +212,26 @@ class Cluster:
                 self._topology_to_worker[topology][subgraph] = allocated_worker
         #print(self._topology_to_worker[topology])
     
+    def clone(self) -> 'Cluster':
+        """Copy of this cluster for another simulation or a rescheduling, which is much cheaper than deepcopy.
+        Only the allocation state is copied; the nodes and their workers.
+        The topologies and the subgraphs assigned to the workers are shared with this cluster.
+
+        Returns:
+            Cluster: copy of this cluster
+        """
+        ret = copy.copy(self)
+        ret._racks = list(self._racks)
+        ret._nodes = [node.clone() for node in self._nodes]
+        ret._topology = list(self._topology)
+        ret._assigned = dict(self._assigned)
+        
+        worker = {w.id: w for node in ret._nodes for w in node.worker}
+        ret._topology_to_worker = {}
+        for topology, assign_info in self._topology_to_worker.items():
+            ret._topology_to_worker[topology] = {subgraph: worker[w.id] for subgraph, w in assign_info.items()}
+        return ret
+    
     def get_physical_node(self, pn_id: str) -> PhysicalNode:
         for node in self._nodes:
             if node.id == pn_id:
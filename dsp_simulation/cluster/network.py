@@ -1,13 +1,15 @@
-from typing import Deque, Dict
+import heapq
+from typing import Callable, Dict, List, Tuple
+from dsp_simulation.cluster.physical_node import PhysicalNode
+from dsp_simulation.cluster.worker import Worker
 from dsp_simulation.etc.clock import SystemClock
 
-from dsp_simulation.etc.message import Message
+from dsp_simulation.etc.message import MessagePool
 from dsp_simulation.simulator.generator import GaussianGenerator
 from dsp_simulation.topology.task import Task
-from collections import deque
 
 class Packet:
-    def __init__(self, src: Task, dest: Task, msg: Message):
+    def __init__(self, src: Task, dest: Task, msg: int):
         self.src = src
         self.dest = dest
         self.msg = msg
@@ -59,43 +61,58 @@ class Network:
         'INTER-RACK' : GaussianGenerator(RACK_MEAN, RACK_STD)
     }
     
-    def __init__(self):
-        self._queue: Dict[float, Deque[Packet]] = {}
+    def __init__(self, clock: SystemClock=None, pool: MessagePool=None):
+        """In-flight packets are kept in a binary heap ordered by their receive time (and by routing order for equal times),
+        so that routing a packet and delivering the due ones cost O(log n) per packet instead of scanning every pending timestamp on every tick.
+
+        Args:
+            clock (SystemClock, optional): clock of the simulation. Defaults to SystemClock.DEFAULT.
+            pool (MessagePool, optional): message store of the simulation. Defaults to MessagePool.DEFAULT.
+        """
+        self._clock = clock if clock is not None else SystemClock.DEFAULT
+        self._pool = pool if pool is not None else MessagePool.DEFAULT
+        self._queue: List[Tuple[float, int, Packet]] = []
+        self._seq = 0
         self._cnt = 0
     
-    def route(self, src:Task, dest: Task, msg: Message):
-        if msg.rcv_time not in self._queue:
-            self._queue[msg.rcv_time] = [Packet(src, dest, msg)]
-        else:
-            self._queue[msg.rcv_time].append(Packet(src, dest, msg))
+    def __len__(self):
+        return len(self._queue)
+    
+    def route(self, src:Task, dest: Task, msg: int):
+        heapq.heappush(self._queue, (self._pool.rcv_time[msg], self._seq, Packet(src, dest, msg)))
+        self._seq += 1
+    
+    def next_arrival_time(self):
+        """Receive time of the earliest in-flight packet, or None if there is no packet in flight
+        """
+        if self._queue:
+            return self._queue[0][0]
+        return None
+    
+    def _deliver(self, until: float) -> List[Packet]:
+        delivered = []
+        queue = self._queue
+        while queue and queue[0][0] <= until:
+            pkt = heapq.heappop(queue)[2]
+            self._cnt += 1
+            pkt.dest.receive(pkt.src.vertex_id, pkt.msg)
+            delivered.append(pkt)
+        return delivered
             
-    def complete(self):
-        past = []
-        for key in self._queue:
-            if key <= SystemClock.CURRENT:
-                #print(f'{key}: {self._queue[key]}')
-                while self._queue[key]:
-                    pkt = self._queue[key].pop()
-                    self._cnt += 1
-                #for pkt in self._queue[key]:
-                    pkt.dest.receive(pkt.src.vertex_id, pkt.msg)        
-                past.append(key)
-        for key in past:
-            del self._queue[key]
+    def complete(self) -> List[Packet]:
+        """Deliver every packet whose receive time has passed
+
+        Returns:
+            List[Packet]: delivered packets in order of their receive time
+        """
+        return self._deliver(self._clock.CURRENT)
             
-    def fake_complete(self, fake):
-        past = []
-        for key in self._queue:
-            if key <= fake:
-                #print(f'{key}: {self._queue[key]}')
-                while self._queue[key]:
-                    pkt = self._queue[key].pop()
-                    self._cnt += 1
-                #for pkt in self._queue[key]:
-                    pkt.dest.receive(pkt.src.vertex_id, pkt.msg)        
-                past.append(key)
-        for key in past:
-            del self._queue[key]
+    def drain(self) -> List[Packet]:
+        """Remove and return every in-flight packet in order of its receive time, keeping its message, e.g. to redirect it to the tasks of a new deployment
+        """
+        ret = [pkt for _, _, pkt in sorted(self._queue, key=lambda item: item[:2])]
+        self._queue: List[Tuple[float, int, Packet]] = []
+        return ret
     
     def send(cls, source: Task, target: Task, rcv_time: float):     
         pass
@@ -104,5 +121,65 @@ class Network:
         pass
     
     def initialize(self):
-        self._queue: Dict[float, Deque[Packet]] = {}
+        """Drop every in-flight packet and release its message
+        """
+        for _, _, pkt in self._queue:
+            self._pool.free(pkt.msg)
+        self._queue: List[Tuple[float, int, Packet]] = []
+    
+    @classmethod
+    def link_type(cls, source_worker: Worker, target_worker: Worker, source_node: PhysicalNode, target_node: PhysicalNode) -> str:
+        """Get the link class between two workers
+
+        Returns:
+            str: one of Network.TYPE
+        """
+        if source_worker.id == target_worker.id:
+            return Network.TYPE[0]
+        if source_node.id == target_node.id:
+            return Network.TYPE[1]
+        if source_node.rack == target_node.rack:
+            return Network.TYPE[2]
+        return Network.TYPE[3]
+
+
+class RoutingTable:
+    """Routing table of a deployment, which maps each (source task, target task) pair to its link class and a delay sampler bound to the distribution of that class.
+    It should be rebuilt whenever the topology is reassigned to the cluster.
+    """
+    def __init__(self, task_to_worker: Dict[Task, Worker], worker_to_node: Dict[Worker, PhysicalNode]):
+        """
+        Args:
+            task_to_worker (Dict[Task, Worker]): worker running each assigned task
+            worker_to_node (Dict[Worker, PhysicalNode]): physical node of each assigned worker
+        """
+        self._link: Dict[Tuple[Task, Task], str] = {}
+        self._routes: Dict[Task, List[List[Tuple[Task, Callable[[], float]]]]] = {}
+        
+        for task, worker in task_to_worker.items():
+            routes = []
+            targets = worker.graph.edge[task]['target']
+            for destination in targets:
+                candidates = []
+                for target in targets[destination]:
+                    # a message to a task without worker is dropped, so it keeps its share of the choice
+                    if target not in task_to_worker:
+                        candidates.append(None)
+                        continue
+                    
+                    target_worker = task_to_worker[target]
+                    type = Network.link_type(worker, target_worker, worker_to_node[worker], worker_to_node[target_worker])
+                    self._link[(task, target)] = type
+                    candidates.append((target, Network.DISTRIBUTION[type].next))
+                routes.append(candidates)
+            self._routes[task] = routes
+    
+    def routes(self, task: Task) -> List[List[Tuple[Task, Callable[[], float]]]]:
+        """Candidate routes of the given task, one list per downstream vertex.
+        Each candidate is a (target task, delay sampler) pair, or None if the target task has no worker.
+        """
+        return self._routes[task]
+    
+    def link_type(self, source: Task, target: Task) -> str:
+        return self._link[(source, target)]
         
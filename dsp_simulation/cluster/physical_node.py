@@ -1,3 +1,4 @@
+import copy
 import random as rd
 
 from typing import List
@@ -85,6 +86,14 @@ class PhysicalNode:
     def speed_up(self):
         return self._speed_up
 
+    def clone(self) -> 'PhysicalNode':
+        """Copy of this node with the same id and attributes, and copies of its workers
+        """
+        ret = copy.copy(self)
+        ret._worker = [worker.clone() for worker in self._worker]
+        ret._available_worker = list(self._available_worker)
+        return ret
+
     def _get_workers(self, max_worker: int):
         """generate and get workers based on max_worker or the amount of resources
 
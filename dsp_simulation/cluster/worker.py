@@ -1,3 +1,4 @@
+import copy
 from dsp_simulation.topology.task_graph import SubTaskGraph
 
 class Worker:
@@ -32,6 +33,11 @@ class Worker:
     def graph(self):
         return self._graph
         
+    def clone(self) -> 'Worker':
+        """Copy of this worker with the same id. The assigned subgraph is shared, not copied.
+        """
+        return copy.copy(self)
+        
     def assign(self, graph: SubTaskGraph):
        self.assigned = True
        self._graph = graph
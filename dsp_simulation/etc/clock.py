@@ -1,6 +1,16 @@
 import sys
 
 class SystemClock:
-    CURRENT = 0
+    """Simulated time of one simulation; CURRENT is the current time (seconds).
+    Every Simulator owns a clock and binds it to its tasks and network, so that several simulations can run in one process.
+    SystemClock.DEFAULT is used by the tasks and networks which are not bound to a simulation.
+    """
     STEP = 0
-    #MAX_DATA_RATE
\ No newline at end of file
+    DEFAULT = None
+    #MAX_DATA_RATE
+
+    def __init__(self, current: float = 0):
+        self.CURRENT = current
+
+
+SystemClock.DEFAULT = SystemClock()
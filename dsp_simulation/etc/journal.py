@@ -0,0 +1,133 @@
+import os
+import pickle as pkl
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+
+class _HistoryReference:
+    """Stands for the values of a history list in a snapshot: the first length values journaled under key
+    """
+    def __init__(self, key: int, length: int):
+        self.key = key
+        self.length = length
+
+
+class HistoryJournal:
+    """Incremental pickling of an object graph whose size grows with the history lists it holds, e.g. the statistics of every period of a simulation.
+
+    dumps() pickles the graph with each of the given history lists holding a reference to a key of the journal and its length instead of its values,
+    while the values appended to it since the previous dumps() are returned separately as a delta, which write() appends to the journal file.
+    So a snapshot costs the live state of the graph plus the values of the last interval, whatever the length of the run.
+    load() unpickles a snapshot and refills its history lists from the journal, up to the offset the snapshot was taken at;
+    the records written after it, e.g. by a run which crashed before replacing its snapshot, are ignored and overwritten by the next write().
+
+    Only lists which are appended to are journaled; a list which is replaced, e.g. reset to [], is written again under a new key.
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): journal file
+        """
+        self._path = Path(path)
+        # id of each history list -> [key, list, number of values written]
+        self._entry: Dict[int, list] = {}
+        self._next_key = 0
+        self._offset = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def offset(self) -> int:
+        """Size of the journal as of the last dumps() (bytes)
+        """
+        return self._offset
+
+    def dumps(self, obj, history: List[list]) -> Tuple[bytes, bytes, int]:
+        """Pickle an object graph, journaling the given history lists
+
+        Args:
+            obj: root of the graph
+            history (List[list]): lists of the graph which are only appended to
+
+        Returns:
+            Tuple[bytes, bytes, int]: snapshot of the graph, delta to append to the journal with write(), and the offset of the delta in the journal
+        """
+        entry = {}
+        for values in history:
+            if id(values) in entry:
+                continue
+            previous = self._entry.get(id(values))
+            if previous is not None and previous[1] is values and previous[2] <= len(values):
+                entry[id(values)] = previous
+            else:
+                entry[id(values)] = [self._next_key, values, 0]
+                self._next_key += 1
+        # the lists which are no longer part of the history are released
+        self._entry = entry
+
+        delta = {}
+        content = []
+        try:
+            for key, values, written in entry.values():
+                if len(values) > written:
+                    delta[key] = values[written:]
+                content.append(values[:])
+                values[:] = [_HistoryReference(key, len(values))]
+            snapshot = pkl.dumps(obj, protocol=pkl.HIGHEST_PROTOCOL)
+        finally:
+            for (_, values, _), values_content in zip(entry.values(), content):
+                values[:] = values_content
+        for value in entry.values():
+            value[2] = len(value[1])
+
+        delta = pkl.dumps(delta, protocol=pkl.HIGHEST_PROTOCOL)
+        offset = self._offset
+        self._offset += len(delta)
+        return snapshot, delta, offset
+
+    def write(self, delta: bytes, offset: int):
+        """Append a delta returned by dumps() to the journal, dropping whatever follows its offset. Safe to run in another thread than dumps().
+
+        Args:
+            delta (bytes): delta of the journal
+            offset (int): offset of the delta returned by dumps()
+        """
+        with open(str(self._path), 'r+b' if self._path.exists() else 'wb') as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(delta)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @classmethod
+    def load(cls, path: str, offset: int, snapshot, history: Callable[[object], List[list]]) -> Tuple[object, 'HistoryJournal']:
+        """Unpickle a snapshot taken by dumps() and refill its history lists
+
+        Args:
+            path (str): journal file
+            offset (int): size of the journal when the snapshot was taken, i.e. the offset of its delta plus the size of the delta (bytes)
+            snapshot: file object positioned at the snapshot
+            history (Callable[[object], List[list]]): the history lists of the unpickled graph, as given to dumps()
+
+        Returns:
+            Tuple[object, HistoryJournal]: the object graph, and the journal to continue it with
+        """
+        ret = cls(path)
+        ret._offset = offset
+        journaled: Dict[int, list] = {}
+        if offset > 0:
+            with open(str(ret._path), 'rb') as f:
+                while f.tell() < offset:
+                    for key, delta in pkl.load(f).items():
+                        journaled.setdefault(key, []).extend(delta)
+        ret._next_key = max(journaled, default=-1) + 1
+
+        obj = pkl.load(snapshot)
+        for values in history(obj):
+            if len(values) == 1 and type(values[0]) == _HistoryReference:
+                reference = values[0]
+                values[:] = journaled.get(reference.key, [])[:reference.length]
+                ret._entry[id(values)] = [reference.key, values, reference.length]
+        return obj, ret
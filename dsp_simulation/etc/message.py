@@ -1,5 +1,10 @@
+from array import array
+from typing import Dict, List
+
+
 class Message:
-    def __init__(self, event_time, msg_size, vertex_id, accumulated_latency=0.0):
+    def __init__(self, event_time, msg_size, vertex_id, accumulated_latency=0.0, count=1):
+        self._count = count
         self._msg_size = msg_size
         self._vertex_id = vertex_id
         self._event_time = event_time
@@ -13,6 +18,12 @@ class Message:
     def __str__(self):
         return f'{self._vertex_id} {self._event_time}, {self._rcv_time}'
     
+    @property
+    def count(self):
+        """Number of identical tuples this message stands for
+        """
+        return self._count
+    
     @property
     def msg_size(self):
         return self._msg_size
@@ -55,9 +66,137 @@ class Message:
         
         self._accumulated_latency += latency
         
+    def update_count(self, count):
+        if count <= 0:
+            print('Count must be over than 0')
+            return
+        
+        self._count = count
+        
     def update_queuein_time(self, time):
         self._queuein_time = time
     
     def update_receive_time(self, time):
         self._rcv_time = time
-        
\ No newline at end of file
+        
+
+class MessagePool:
+    """Struct-of-arrays store of the messages in the simulation.
+
+    A message is an integer handle which indexes preallocated typed columns, so an in-flight message costs a few tens of bytes instead of a Python object.
+    The columns are array.array rather than NumPy arrays, and public attributes rather than properties: the simulation reads and writes one field at a time,
+    and indexing an array.array returns a Python float or int, which is as fast as an attribute of a Message, while indexing a NumPy array boxes a NumPy scalar.
+    Handles of consumed messages are put back on a free list and reused by the next allocations; the columns double in size when the free list runs out.
+    Every Simulator owns a pool and binds it to its tasks and network along with its clock; MessagePool.DEFAULT is used by the ones which are not bound to a simulation.
+    """
+    DEFAULT = None
+    
+    def __init__(self, capacity: int = 4096):
+        self._capacity = 0
+        self.event_time = array('d')
+        self.msg_size = array('d')
+        self._vertex = array('i')
+        self.transmission_delay = array('d')
+        self.accumulated_latency = array('d')
+        self.rcv_time = array('d')
+        self.count = array('i')
+        self._free: List[int] = []
+        
+        self._vertex_index: Dict[str, int] = {}
+        self._vertex_id: List[str] = []
+        self._grow(capacity)
+        
+    def __len__(self):
+        """Number of live messages
+        """
+        return self._capacity - len(self._free)
+    
+    @property
+    def capacity(self):
+        return self._capacity
+    
+    def vertex_id(self, handle: int) -> str:
+        return self._vertex_id[self._vertex[handle]]
+    
+    def _grow(self, capacity: int):
+        old = self._capacity
+        for name in ['event_time', 'msg_size', '_vertex', 'transmission_delay', 'accumulated_latency', 'rcv_time', 'count']:
+            column = getattr(self, name)
+            column.extend(array(column.typecode, bytes(column.itemsize * (capacity - old))))
+        
+        # the lowest free handles are handed out first
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self._capacity = capacity
+        
+    def alloc(self, event_time: float, msg_size: float, vertex_id: str, accumulated_latency: float = 0.0, count: int = 1) -> int:
+        """Create a message
+
+        Args:
+            event_time (float): time at which the message was emitted (seconds)
+            msg_size (float): size of the message
+            vertex_id (str): vertex id of the task which emitted the message
+            accumulated_latency (float, optional): latency accumulated until the emission (ms). Defaults to 0.0.
+            count (int, optional): number of identical tuples the message stands for. Defaults to 1.
+
+        Returns:
+            int: handle of the message
+        """
+        if not self._free:
+            self._grow(self._capacity * 2)
+        handle = self._free.pop()
+        
+        vertex = self._vertex_index.get(vertex_id)
+        if vertex is None:
+            vertex = len(self._vertex_id)
+            self._vertex_index[vertex_id] = vertex
+            self._vertex_id.append(vertex_id)
+        
+        self.event_time[handle] = event_time
+        self.msg_size[handle] = msg_size
+        self._vertex[handle] = vertex
+        self.transmission_delay[handle] = 0.0
+        self.accumulated_latency[handle] = accumulated_latency
+        self.rcv_time[handle] = 0.0
+        self.count[handle] = count
+        return handle
+    
+    def copy(self, handle: int) -> int:
+        """Create a message with the same fields as the given one
+
+        Args:
+            handle (int): handle of the message to copy
+
+        Returns:
+            int: handle of the copy
+        """
+        if not self._free:
+            self._grow(self._capacity * 2)
+        ret = self._free.pop()
+        
+        self.event_time[ret] = self.event_time[handle]
+        self.msg_size[ret] = self.msg_size[handle]
+        self._vertex[ret] = self._vertex[handle]
+        self.transmission_delay[ret] = self.transmission_delay[handle]
+        self.accumulated_latency[ret] = self.accumulated_latency[handle]
+        self.rcv_time[ret] = self.rcv_time[handle]
+        self.count[ret] = self.count[handle]
+        return ret
+    
+    def free(self, handle: int):
+        self._free.append(handle)
+    
+    def release(self, handles):
+        """Free several messages at once
+
+        Args:
+            handles (Iterable[int]): handles of the messages
+        """
+        self._free.extend(handles)
+        
+    def clear(self):
+        """Release every message
+        """
+        self._free = list(range(self._capacity - 1, -1, -1))
+        
+
+MessagePool.DEFAULT = MessagePool()
@@ -0,0 +1,157 @@
+import copy
+import math
+import numpy as np
+from typing import Dict, List
+
+
+class LatencySketch:
+    """Streaming quantile sketch of latencies with logarithmic buckets, in the manner of HDR histograms and DDSketch.
+
+    A value x > 0 is counted in the bucket ceil(log_gamma(x)), where gamma = (1 + a) / (1 - a) for the relative accuracy a,
+    so every quantile is returned within a relative error of a, whatever the distribution, while only the occupied buckets are kept.
+    Sketches are merged by adding the counts of their buckets, e.g. to combine the sink tasks of a vertex or the periods of a run.
+    The sum of the values is kept as well, so the mean is exact.
+    """
+    QUANTILES = [0.5, 0.95, 0.99, 0.999]
+    # values below this are counted in the zero bucket (ms)
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float=0.01):
+        """
+        Args:
+            relative_accuracy (float, optional): the maximum relative error of a quantile. Defaults to 0.01.
+        """
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bucket: Dict[int, int] = {}
+        self._zero = 0
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        """Mean of the added values, or NaN if nothing was added
+        """
+        if self._count == 0:
+            return np.nan
+        return self._sum / self._count
+
+    def copy(self) -> 'LatencySketch':
+        """Copy of this sketch with its own buckets
+        """
+        ret = copy.copy(self)
+        ret._bucket = dict(self._bucket)
+        return ret
+
+    def add(self, value: float, count: int=1):
+        """Add a value the given number of times
+
+        Args:
+            value (float): value to add, e.g. the end-to-end delay of a message (ms)
+            count (int, optional): number of times, e.g. the number of tuples of a batched message. Defaults to 1.
+        """
+        if value > LatencySketch.MIN_VALUE:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._bucket[key] = self._bucket.get(key, 0) + count
+        else:
+            self._zero += count
+        self._count += count
+        self._sum += value * count
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+
+    def merge(self, other: 'LatencySketch'):
+        """Add the values of another sketch of the same relative accuracy to this one
+
+        Args:
+            other (LatencySketch): sketch to merge
+        """
+        if other._gamma != self._gamma:
+            print(f'Sketches of different relative accuracies can not be merged: {self._relative_accuracy} != {other._relative_accuracy}')
+            exit(1)
+
+        for key, count in other._bucket.items():
+            self._bucket[key] = self._bucket.get(key, 0) + count
+        self._zero += other._zero
+        self._count += other._count
+        self._sum += other._sum
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the given quantile of the added values
+
+        Args:
+            q (float): quantile between 0 and 1
+
+        Returns:
+            float: the estimated quantile, or NaN if nothing was added
+        """
+        if self._count == 0:
+            return np.nan
+
+        rank = q * (self._count - 1)
+        seen = self._zero
+        if seen > rank:
+            return max(self._min, 0.0)
+
+        for key in sorted(self._bucket):
+            seen += self._bucket[key]
+            if seen > rank:
+                # the middle of the bucket (gamma^(key-1), gamma^key] in relative terms, clipped to the observed range
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self._min), self._max)
+        return self._max
+
+    def quantiles(self, quantiles: List[float]=None) -> Dict[str, float]:
+        """Estimate several quantiles at once
+
+        Args:
+            quantiles (List[float], optional): quantiles between 0 and 1. Defaults to LatencySketch.QUANTILES.
+
+        Returns:
+            Dict[str, float]: estimate of each quantile keyed by its percentile, e.g. 'p99.9'
+        """
+        if quantiles is None:
+            quantiles = LatencySketch.QUANTILES
+        return {LatencySketch.label(q): self.quantile(q) for q in quantiles}
+
+    def to_dict(self) -> dict:
+        """Buckets and totals of this sketch in a form convertible to json, see from_dict()
+        """
+        return {
+            'relative_accuracy': self._relative_accuracy,
+            'bucket': {str(key): count for key, count in self._bucket.items()},
+            'zero': self._zero,
+            'count': self._count,
+            'sum': self._sum,
+            'min': self._min if self._count else None,
+            'max': self._max if self._count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, value: dict) -> 'LatencySketch':
+        """Sketch written by to_dict(), e.g. to merge the sketches of the runs in a run store
+        """
+        ret = cls(value['relative_accuracy'])
+        ret._bucket = {int(key): count for key, count in value['bucket'].items()}
+        ret._zero = value['zero']
+        ret._count = value['count']
+        ret._sum = value['sum']
+        if ret._count:
+            ret._min = value['min']
+            ret._max = value['max']
+        return ret
+
+    @classmethod
+    def label(cls, q: float) -> str:
+        """Name of a quantile as a percentile, e.g. 'p50' for 0.5 and 'p99.9' for 0.999
+        """
+        return 'p' + f'{q * 100:.10g}'
@@ -0,0 +1,153 @@
+import copy
+import math
+import random
+import numpy as np
+from typing import List
+
+
+class OnlineStatistics:
+    """Count, mean, variance, minimum and maximum of a stream of values in constant memory.
+
+    The mean and the variance are updated with Welford's algorithm, and two accumulators are merged with the parallel form of it (Chan et al.).
+    Optionally, a uniform sample of the values of a bounded size is kept by reservoir sampling, e.g. to plot their distribution afterwards.
+    """
+    def __init__(self, reservoir: int=0):
+        """
+        Args:
+            reservoir (int, optional): the maximum number of sampled values to keep. 0 keeps none. Defaults to 0.
+        """
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self._reservoir = reservoir
+        self._sample: List[float] = []
+        # own random stream, so that sampling does not change the random streams of the simulation
+        self._rng = random.Random(0) if reservoir > 0 else None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        """Mean of the values, or NaN if there is none
+        """
+        if self._count == 0:
+            return np.nan
+        return self._mean
+
+    @property
+    def var(self) -> float:
+        """Population variance of the values as numpy.var, or NaN if there is none
+        """
+        if self._count == 0:
+            return np.nan
+        return self._m2 / self._count
+
+    @property
+    def min(self) -> float:
+        return self._min if self._count else np.nan
+
+    @property
+    def max(self) -> float:
+        return self._max if self._count else np.nan
+
+    @property
+    def sample(self) -> List[float]:
+        """Uniform sample of the values, of at most the reservoir size
+        """
+        return self._sample
+
+    def copy(self) -> 'OnlineStatistics':
+        """Copy of this accumulator with its own sample
+        """
+        ret = copy.copy(self)
+        ret._sample = list(self._sample)
+        ret._rng = copy.deepcopy(self._rng)
+        return ret
+
+    def add(self, value: float, count: int=1):
+        """Add a value the given number of times
+
+        Args:
+            value (float): value to add
+            count (int, optional): number of times, e.g. the number of tuples of a batched message. Defaults to 1.
+        """
+        if count == 1:
+            # the common case, kept short as it runs once per message
+            self._count += 1
+            delta = value - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (value - self._mean)
+            if value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+        elif count > 1:
+            total = self._count + count
+            delta = value - self._mean
+            self._mean += delta * count / total
+            self._m2 += delta * delta * self._count * count / total
+            self._count = total
+            self._min = min(self._min, value)
+            self._max = max(self._max, value)
+        else:
+            return
+
+        if self._reservoir > 0:
+            for seen in range(self._count - count, self._count):
+                if len(self._sample) < self._reservoir:
+                    self._sample.append(value)
+                else:
+                    idx = self._rng.randrange(seen + 1)
+                    if idx < self._reservoir:
+                        self._sample[idx] = value
+
+    def merge(self, other: 'OnlineStatistics'):
+        """Add the values of another accumulator to this one.
+        The sample is drawn from both samples in proportion to the number of values they stand for.
+
+        Args:
+            other (OnlineStatistics): accumulator to merge
+        """
+        if other._count == 0:
+            return
+
+        total = self._count + other._count
+        delta = other._mean - self._mean
+        if self._reservoir > 0 and other._sample:
+            # the number of sampled values from each side follows drawing without replacement from the values of both
+            size = min(self._reservoir, len(self._sample) + len(other._sample))
+            remain, other_remain, take = self._count, other._count, 0
+            for _ in range(size):
+                if self._rng.random() * (remain + other_remain) < remain:
+                    take += 1
+                    remain -= 1
+                else:
+                    other_remain -= 1
+            take = min(take, len(self._sample))
+            other_take = min(size - take, len(other._sample))
+            self._sample = self._rng.sample(self._sample, take) + self._rng.sample(other._sample, other_take)
+
+        self._mean += delta * other._count / total
+        self._m2 += other._m2 + delta * delta * self._count * other._count / total
+        self._count = total
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def summary(self) -> dict:
+        """Statistics of the values to be written to a file
+
+        Returns:
+            dict: count, mean, var, min, max and sample
+        """
+        return {
+            'count': self._count,
+            'mean': self.mean,
+            'var': self.var,
+            'min': self.min,
+            'max': self.max,
+            'sample': list(self._sample),
+        }
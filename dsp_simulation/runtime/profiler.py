@@ -1,3 +1,4 @@
+import copy
 from math import sqrt
 from typing import Dict, List
 
@@ -31,6 +32,17 @@ class Profiler:
         self._bottleneck_threshold = 1.0
 
         
+    def clone(self) -> 'Profiler':
+        """Copy of this profiler with its own statistics, over cheap copies of its cluster and topology (see Cluster.clone() and Topology.clone())
+        """
+        ret = copy.copy(self)
+        for name, value in vars(self).items():
+            if name not in ['_cluster', '_topology']:
+                setattr(ret, name, copy.deepcopy(value))
+        ret._cluster = self._cluster.clone()
+        ret._topology = self._topology.clone()
+        return ret
+        
     def update_srvtime(self, task_id: str, vertex_id, mean, var):
         if task_id not in self.task_srvtime:
             self.task_srvtime[task_id] = {
@@ -53,6 +65,17 @@ class Profiler:
             self.task_arvtime[task_id]['mean'].append(mean)
             self.task_arvtime[task_id]['var'].append(var)
             
+    def history(self) -> List[list]:
+        """Lists of the service and arrival times of every period, e.g. for Simulator._checkpoint to journal them
+        """
+        ret = []
+        for task_time in [self.task_srvtime, self.task_arvtime]:
+            for stats in task_time.values():
+                ret.extend([stats['mean'], stats['var']])
+        for vertex_time in [self.vertex_mean_srvtime, self.vertex_var_srvtime, self.vertex_mean_arvtime, self.vertex_var_arvtime, self.vertex_kingman]:
+            ret.extend(vertex_time.values())
+        return ret
+            
     def update_vertex_order(self, vertex_order):
         #self._vertex_order.append(vertex_order)
         self._vertex_order = vertex_order
@@ -1,21 +1,31 @@
-from pathlib import Path
 from typing import Dict, List
 from dsp_simulation.cluster.cluster import Cluster
+from dsp_simulation.etc.sketch import LatencySketch
+from dsp_simulation.runtime.store import RunStore
 from dsp_simulation.topology.task import OperatorTask, SinkTask, SourceTask, Task
 import numpy as np
-import pickle as pkl
 
 class Reporter:
-    def __init__(self, cluster: Cluster):
+    KIND = {'src': 'source', 'op': 'operator', 'sink': 'sink'}
+    
+    def __init__(self, cluster: Cluster, store: RunStore=None):
+        """
+        Args:
+            cluster (Cluster): cluster of the simulation
+            store (RunStore, optional): run store the statistics of every vertex are appended to at each report, as rows of its 'vertex' table. Defaults to None.
+        """
         self._stats = {}
+        self._store = store
         self._operator_stats = {}
         self._vertex: Dict[str, List[str]] = {}
+        self._sink_sketch: Dict[str, Dict[str, LatencySketch]] = {}
         self._cluster = cluster
     
     def update_stats(self, topology_id:str, task: Task, stats: dict):
         if topology_id not in self._stats:
             self._stats[topology_id] = {}
             self._operator_stats[topology_id] = {}
+            self._sink_sketch[topology_id] = {}
         
         topo_stats = self._stats[topology_id]
         op_stats = self._operator_stats[topology_id]
@@ -52,10 +62,15 @@ class Reporter:
             if vid not in topo_stats:    
                 topo_stats[vid] = {
                     'throughput': [],
-                    'end_to_end_delay': []
+                    'end_to_end_delay': [],
+                    'end_to_end_quantile': []
                 }
+                self._sink_sketch[topology_id][vid] = LatencySketch()
             topo_stats[vid]['throughput'].append(stats['throughput'])
             topo_stats[vid]['end_to_end_delay'].append(stats['end_to_end_delay'])
+            # the sketches of the sink tasks of a vertex are merged until the period is reported
+            if stats.get('end_to_end_sketch') is not None:
+                self._sink_sketch[topology_id][vid].merge(stats['end_to_end_sketch'])
     
     def _get_topology_info(self, topology_id: str):
         target = None
@@ -69,7 +84,17 @@ class Reporter:
             info[operator.id + '_parallelism'] = operator.parallelism
         return info
     
-    def report(self):
+    def history(self) -> List[list]:
+        """Lists of the statistics of every vertex, which grow by one value per report, e.g. for Simulator._checkpoint to journal them
+        """
+        return [values for topo_stats in self._stats.values() for vtx_stats in topo_stats.values() for values in vtx_stats.values()]
+    
+    def report(self, time: float=None):
+        """Aggregate and print the statistics of every vertex in the current period
+
+        Args:
+            time (float, optional): the time of the report (seconds), with which the statistics are appended to the run store. Defaults to None.
+        """
         print('='*50)
         print(f'Cluster: Physical Node #({len(self._cluster.nodes)})')
         
@@ -93,14 +118,19 @@ class Reporter:
                 elif op_type == 'src':
                     print(f'SourceVertex {vertex}: sent message count({vtx_stats["sent_msg_cnt"][-1]})')
                 elif op_type == 'sink':
-                    print(f'SinkVertex {vertex}: throughput({vtx_stats["throughput"][-1]}), end_to_end_delay({vtx_stats["end_to_end_delay"][-1]})')
+                    vtx_stats['end_to_end_quantile'].append(self._sink_sketch[topology][vertex].quantiles())
+                    self._sink_sketch[topology][vertex] = LatencySketch()
+                    quantile = ', '.join(f'{key}({value})' for key, value in vtx_stats['end_to_end_quantile'][-1].items())
+                    print(f'SinkVertex {vertex}: throughput({vtx_stats["throughput"][-1]}), end_to_end_delay({vtx_stats["end_to_end_delay"][-1]}), {quantile}')
+                
+                if self._store is not None:
+                    row = {'time': time, 'vertex': vertex.split('-', 1)[1], 'kind': Reporter.KIND[op_type]}
+                    for name, values in vtx_stats.items():
+                        if name == 'end_to_end_quantile':
+                            row.update({'end_to_end_' + key: value for key, value in values[-1].items()})
+                        else:
+                            row[name] = values[-1]
+                    self._store.append('vertex', row)
             print('-'*50)
         print('='*50)
-        
-    def shutdown(self, filename:str):
-        #print(self._stats)
-        with Path(filename).open('wb') as f:
-            pkl.dump(self._stats, f)
-            
-            #f.write('Hello wolrd')
         
\ No newline at end of file
@@ -0,0 +1,289 @@
+import json
+import math
+import os
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, List
+
+
+def _to_json(value):
+    """Convert the values json does not know, e.g. numpy scalars and arrays or the times of the scheduler log
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+class RunStore:
+    """Append-only columnar store of the statistics of one simulation run, replacing a pickle per task.
+
+    Rows are appended to named tables, e.g. one row per task and report period, and buffered until flush(),
+    which writes them as a new segment: one .npy file per column under <path>/<table>/<segment>/.
+    The manifest (manifest.json) lists the columns and segments of every table along with the time range of each segment,
+    the run-level summaries of the tasks and the metadata of the run. It is replaced atomically after the segments are written,
+    so a crash leaves the store as of the last flush, and segments not listed in it are ignored.
+
+    Numeric values are stored as float64 (NaN if a row has no value), and the string columns in RunStore.CATEGORY as int32 codes
+    whose strings are kept in the manifest. open() memory-maps the columns, so a slice by vertex, task or time reads only what it needs.
+    """
+    MANIFEST = 'manifest.json'
+    # string columns, stored as indices into the strings listed in the manifest
+    CATEGORY = ['task', 'vertex', 'kind']
+    TIME = 'time'
+
+    def __init__(self, path: str, meta: dict=None):
+        """
+        Args:
+            path (str): directory of the store
+            meta (dict, optional): metadata of the run, e.g. the scheduler. Defaults to None.
+        """
+        self._path = Path(path)
+        self._path.mkdir(exist_ok=True, parents=True)
+        self._manifest = {
+            'meta': dict(meta) if meta else {},
+            'codes': {name: [] for name in RunStore.CATEGORY},
+            'tables': {},
+            'tasks': {},
+        }
+        self._code: Dict[str, Dict[str, int]] = {name: {} for name in RunStore.CATEGORY}
+        self._buffer: Dict[str, List[dict]] = {}
+        self._readonly = False
+
+    @classmethod
+    def open(cls, path: str) -> 'RunStore':
+        """Open a store written by a simulation to read it
+
+        Args:
+            path (str): directory of the store
+
+        Returns:
+            RunStore: read-only store as of its last flush
+        """
+        path = Path(path)
+        if not (path / RunStore.MANIFEST).exists():
+            print(f'No such run store: {path}')
+            exit(1)
+
+        ret = cls.__new__(cls)
+        ret._path = path
+        with (path / RunStore.MANIFEST).open('r') as f:
+            ret._manifest = json.load(f)
+        ret._code = {name: {value: code for code, value in enumerate(values)} for name, values in ret._manifest['codes'].items()}
+        ret._buffer = {}
+        ret._readonly = True
+        return ret
+
+    @classmethod
+    def scan(cls, outdir: str) -> Dict[str, 'RunStore']:
+        """Open the stores of every simulation written to an output directory, e.g. one per scheduler of a benchmark
+
+        Args:
+            outdir (str): output directory given to the simulators
+
+        Returns:
+            Dict[str, RunStore]: store of each scheduler id
+        """
+        ret = {}
+        for manifest in sorted(Path(outdir).glob(f'*/store/{RunStore.MANIFEST}')):
+            store = cls.open(manifest.parent)
+            ret[store.meta.get('scheduler_id', manifest.parent.parent.name)] = store
+        return ret
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def meta(self) -> dict:
+        """Metadata of the run
+        """
+        return self._manifest['meta']
+
+    @property
+    def tables(self) -> List[str]:
+        return list(self._manifest['tables'])
+
+    @property
+    def tasks(self) -> Dict[str, dict]:
+        """Run-level summary of each task id, with the vertex id of the task
+        """
+        return self._manifest['tasks']
+
+    def columns(self, table: str) -> List[str]:
+        return list(self._manifest['tables'][table]['columns'])
+
+    def history(self) -> List[list]:
+        """Lists of the segments of every table, which grow by one segment per flush, e.g. for Simulator._checkpoint to journal them
+        """
+        return [spec['segments'] for spec in self._manifest['tables'].values()]
+
+    def put(self, key: str, value):
+        """Set an entry of the metadata of the run, written with the next flush
+
+        Args:
+            key (str): name of the entry
+            value: value of the entry, which must be convertible to json
+        """
+        self._manifest['meta'][key] = value
+
+    def put_task(self, task_id: str, vertex_id: str, summary: dict):
+        """Set the run-level summary of a task, written with the next flush
+
+        Args:
+            task_id (str): id of the task
+            vertex_id (str): id of the vertex of the task
+            summary (dict): statistics of the task, which must be convertible to json
+        """
+        self._manifest['tasks'][task_id] = dict(summary, vertex_id=vertex_id)
+
+    def append(self, table: str, row: dict):
+        """Append a row to a table, written with the next flush.
+        A column of the table is created the first time a row has it.
+
+        Args:
+            table (str): name of the table
+            row (dict): value of each column. The values of the columns in RunStore.CATEGORY are strings, and the others numbers.
+        """
+        self._buffer.setdefault(table, []).append(row)
+
+    def flush(self):
+        """Write the rows appended since the last flush as a new segment of their table, then the manifest
+        """
+        if self._readonly:
+            print(f'The run store is read-only: {self._path}')
+            exit(1)
+
+        for table, rows in self._buffer.items():
+            if not rows:
+                continue
+            spec = self._manifest['tables'].setdefault(table, {'columns': {}, 'segments': []})
+            for row in rows:
+                for name in row:
+                    if name not in spec['columns']:
+                        spec['columns'][name] = 'int32' if name in RunStore.CATEGORY else 'float64'
+
+            segment = f'{len(spec["segments"]):06d}'
+            segdir = self._path / table / segment
+            segdir.mkdir(exist_ok=True, parents=True)
+            for name, dtype in spec['columns'].items():
+                if name in RunStore.CATEGORY:
+                    column = np.array([self._encode(name, row.get(name)) for row in rows], dtype=np.int32)
+                else:
+                    column = np.array([self._number(row.get(name)) for row in rows], dtype=np.float64)
+                np.save(str(segdir / (name + '.npy')), column)
+
+            times = [self._number(row.get(RunStore.TIME)) for row in rows]
+            times = [t for t in times if not math.isnan(t)]
+            spec['segments'].append({
+                'id': segment,
+                'rows': len(rows),
+                'columns': list(spec['columns']),
+                'start': min(times) if times else None,
+                'end': max(times) if times else None,
+            })
+        self._buffer = {}
+
+        path = self._path / RunStore.MANIFEST
+        tmp_path = path.with_name(path.name + '.tmp')
+        with tmp_path.open('w') as f:
+            json.dump(self._manifest, f, default=_to_json)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(str(tmp_path), str(path))
+
+    def read(self, table: str, columns: List[str]=None, start: float=None, end: float=None, mmap: bool=True, **where) -> Dict[str, np.ndarray]:
+        """Read columns of a table, optionally sliced by time and by the value of string columns
+
+        Args:
+            table (str): name of the table
+            columns (List[str], optional): columns to read. Defaults to every column.
+            start (float, optional): the minimum time of the rows (seconds). Defaults to None.
+            end (float, optional): the maximum time of the rows (seconds). Defaults to None.
+            mmap (bool, optional): memory-map the segments instead of loading them. Defaults to True.
+            where: string columns and the value, or list of values, their rows must have, e.g. vertex='count'
+
+        Returns:
+            Dict[str, np.ndarray]: values of each column, where the string columns hold their codes (see decode())
+        """
+        if table not in self._manifest['tables']:
+            return {}
+        spec = self._manifest['tables'][table]
+        if columns is None:
+            columns = list(spec['columns'])
+
+        wanted = {}
+        for name, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            wanted[name] = [self._code[name][v] for v in values if v in self._code[name]]
+
+        parts = {name: [] for name in columns}
+        for segment in spec['segments']:
+            if start is not None and segment['end'] is not None and segment['end'] < start:
+                continue
+            if end is not None and segment['start'] is not None and segment['start'] > end:
+                continue
+
+            segdir = self._path / table / segment['id']
+            load = lambda name: np.load(str(segdir / (name + '.npy')), mmap_mode='r' if mmap else None)
+            mask = np.ones(segment['rows'], dtype=bool)
+            if start is not None or end is not None:
+                times = load(RunStore.TIME)
+                if start is not None:
+                    mask &= times >= start
+                if end is not None:
+                    mask &= times <= end
+            for name, codes in wanted.items():
+                mask &= np.isin(load(name), codes) if name in segment['columns'] else False
+
+            sliced = not mask.all()
+            for name in columns:
+                if name in segment['columns']:
+                    column = load(name)
+                    parts[name].append(column[mask] if sliced else column)
+                else:
+                    # the column was created after this segment was written
+                    fill = -1 if name in RunStore.CATEGORY else np.nan
+                    parts[name].append(np.full(int(mask.sum()), fill, dtype=spec['columns'][name]))
+
+        ret = {}
+        for name in columns:
+            if len(parts[name]) == 1:
+                ret[name] = parts[name][0]
+            elif parts[name]:
+                ret[name] = np.concatenate(parts[name])
+            else:
+                ret[name] = np.empty(0, dtype=spec['columns'][name])
+        return ret
+
+    def decode(self, name: str, codes: np.ndarray) -> np.ndarray:
+        """Strings of the codes of a string column
+
+        Args:
+            name (str): one of RunStore.CATEGORY
+            codes (np.ndarray): codes read from the column
+
+        Returns:
+            np.ndarray: string of each code, or None for a row without a value
+        """
+        values = np.array(self._manifest['codes'][name] + [None], dtype=object)
+        return values[np.asarray(codes)]
+
+    def _encode(self, name: str, value: str) -> int:
+        if value is None:
+            return -1
+        code = self._code[name].get(value)
+        if code is None:
+            code = len(self._manifest['codes'][name])
+            self._code[name][value] = code
+            self._manifest['codes'][name].append(value)
+        return code
+
+    def _number(self, value) -> float:
+        if value is None:
+            return np.nan
+        return float(value)
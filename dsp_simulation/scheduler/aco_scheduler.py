@@ -3,7 +3,7 @@ import sys
 from typing import List, Tuple
 from dsp_simulation.cluster.cluster import Cluster
 from dsp_simulation.cluster.physical_node import PhysicalNode
-from dsp_simulation.scheduler.objective import Objective, get_network_distance
+from dsp_simulation.scheduler.objective import Network, Objective
 from dsp_simulation.scheduler.scheduler import MetaHueristicScheduler
 from dsp_simulation.topology.topology import Topology
 import random as rd
@@ -81,8 +81,8 @@ class ACOScheduler(MetaHueristicScheduler):
         self._beta = beta
         self._rho = rho
         self._Q = Q
-        self._tau: List[List[int]] = []
-        self._eta: List[List[float]] = []
+        self._tau: np.ndarray = None
+        self._eta: np.ndarray = None
         self._ants: List[Ant] = []
         self._t0 = t0
         #self._num_solution: int = 0
@@ -100,8 +100,8 @@ class ACOScheduler(MetaHueristicScheduler):
         
         Ant.CNT = 0
         self._ants: List[Ant] = []
-        self._tau: List[List[int]] = []
-        self._eta: List[List[float]] = []
+        self._tau: np.ndarray = None
+        self._eta: np.ndarray = None
         self._worker_matrix: dict = {}
         self._num_available_workers: int = 0
         available_nodes = cluster.get_available_physical_node()
@@ -126,23 +126,21 @@ class ACOScheduler(MetaHueristicScheduler):
         
         #print(f'ACO {num_available_workers}')
         # Initialize the network matrix and pheromone matrix between available workers
-        network_matrix = [[0 for _ in range(num_available_workers)] for _ in range(num_available_workers)]
-        pheromone_matrix: List[List] = [[0.0 for _ in range(num_available_workers)] for _ in range(num_available_workers)]
-        for i in range(num_available_workers):
-            for j in range(i, num_available_workers):
-                if i != j:
-                    #dist = get_network_distance(available_matrix[i], available_matrix[j]) * 0.5 + available_matrix[i].availability * available_matrix[j].availability * 0.5
-                    avail = 0
-                    if available_matrix[i].id != available_matrix[j].id:
-                        avail = math.log(available_matrix[i].availability) + math.log(available_matrix[j].availability)
-                    else:
-                        avail = math.log(available_matrix[i].availability)
-                    dist = get_network_distance(available_matrix[i], available_matrix[j]) * 0.5 + avail * 0.5
-                    #dist = Objective.objectvie_weighted_sum(available_matrix[i], available_matrix[j])
-                    network_matrix[i][j] = dist
-                    network_matrix[j][i] = dist
-                    pheromone_matrix[i][j] = self._t0
-                    pheromone_matrix[j][i] = self._t0
+        # The distance of two workers is the network distance * 0.5 + the sum of their log availabilities (counted once on the same node) * 0.5
+        nodes = [available_matrix[i] for i in range(num_available_workers)]
+        node_idx, rack_idx = {}, {}
+        node_of = np.array([node_idx.setdefault(node.id, len(node_idx)) for node in nodes], dtype=np.int64)
+        rack_of = np.array([rack_idx.setdefault(node.rack, len(rack_idx)) for node in nodes], dtype=np.int64)
+        log_availability = np.array([math.log(node.availability) for node in nodes], dtype=np.float64)
+        
+        same_node = node_of.reshape(-1, 1) == node_of.reshape(1, -1)
+        same_rack = rack_of.reshape(-1, 1) == rack_of.reshape(1, -1)
+        network = np.where(same_node, Network.INTER_PROCESS, np.where(same_rack, Network.INTER_NODE, Network.INTER_RACK))
+        avail = np.where(same_node, log_availability.reshape(-1, 1), log_availability.reshape(-1, 1) + log_availability.reshape(1, -1))
+        network_matrix = network * 0.5 + avail * 0.5
+        pheromone_matrix = np.full((num_available_workers, num_available_workers), self._t0)
+        np.fill_diagonal(network_matrix, 0.0)
+        np.fill_diagonal(pheromone_matrix, 0.0)
         self._tau = pheromone_matrix
         self._eta = network_matrix
         
@@ -169,8 +167,8 @@ class ACOScheduler(MetaHueristicScheduler):
         #    float: the weight of current to next
         #"""
         
-        attractiveness = (1 / self._eta[cur][next]) ** self._alpha
-        trail_level = (self._tau[cur][next]) ** self._beta
+        attractiveness = (1 / self._eta[cur, next]) ** self._alpha
+        trail_level = (self._tau[cur, next]) ** self._beta
         return attractiveness * trail_level
     
     def _move_ant(self, ant: Ant):
@@ -184,15 +182,13 @@ class ACOScheduler(MetaHueristicScheduler):
         """
         
         # Get the every weights from current location to all unvisited location
-        weights = []
-        for next in ant.unvisited:
-            weights.append(self._weight(ant.current, next))
+        weights = self._weight(ant.current, np.array(ant.unvisited))
             
         # Calculate the propability for each travel and get one destination randomly
-        total_weight = sum(weights)
+        total_weight = weights.sum()
         cur = ant.current
         #print(ant.unvisited)
-        next = np.random.choice(ant.unvisited, p=np.array(weights)/total_weight)
+        next = int(np.random.choice(ant.unvisited, p=weights/total_weight))
         
         # Change the corresponding varaiables in the ant
         ant.current = next
@@ -208,122 +204,33 @@ class ACOScheduler(MetaHueristicScheduler):
             next (int): _description_
         """
         
-        local_pheromone = {}
-        for m in movement:
-            i, j = m[0], m[1]
-            
-            # swap
-            if i > j:
-                t = i
-                i, j = j, t
-            
-            if (i, j) not in local_pheromone.keys():
-                local_pheromone[(i,j)] = 0
-                
-            local_pheromone[(i,j)] += self._Q / self._eta[i][j]
-            
-        for i in range(self._num_available_workers):
-            for j in range(self._num_available_workers):
-                if i != j:
-                    self._tau[i][j] = (1 - self._rho) * self._tau[i][j]
-                    if (i, j) in local_pheromone.keys():
-                        self._tau[i][j] += local_pheromone[(i, j)]
-                        self._tau[j][i] += local_pheromone[(i, j)]
-    
-    
-    def _get_best(self, cluster: Cluster):
-        best = sys.maxsize
-        ret = []
-        
-        #available_nodes = cluster.get_available_physical_node()
-        #available_worker_cnt = {}
+        # the deposits of the movements, on the upper triangle
+        movement = np.array(movement, dtype=np.int64).reshape(-1, 2)
+        i, j = movement.min(axis=1), movement.max(axis=1)
+        local_pheromone = np.zeros_like(self._tau)
+        np.add.at(local_pheromone, (i, j), self._Q / self._eta[i, j])
         
-        #for node in available_nodes: 
-        #    available_worker_cnt[node.id] = node.available_worker_cnt
-        
-        for ant in self._ants:
-            
-            assignment = []
-            for worker_idx in ant.visited:
-                assignment.append(self._worker_matrix[worker_idx])
-                
-            score = Objective.objectvie_weighted_sum(assignment)
-            if best > score:
-                best = score
-                ret = assignment
-                
-        return ret
+        # Every trail evaporates and the deposit of (i, j) is added to both directions,
+        # where the lower triangle, (j, i), evaporates after its deposit as it always has
+        self._tau *= 1 - self._rho
+        self._tau += local_pheromone + (1 - self._rho) * local_pheromone.T
+    
     
     def _get_best(self):
+        """Assignment of the ant with the best fitness, where the network distances and availabilities of all ants are evaluated in one batch (see Objective.evaluate_batch())
+        and the fitness of an ant is the z-score of its network distance * 0.5 + the z-score of its availability
+        """
+        nodes = list({node.id: node for node in self._worker_matrix.values()}.values())
+        node_index = {node.id: idx for idx, node in enumerate(nodes)}
+        worker_node_index = np.array([node_index[self._worker_matrix[idx].id] for idx in range(self._num_available_workers)], dtype=np.int64)
         
+        matrix = worker_node_index[np.array([ant.visited for ant in self._ants], dtype=np.int64)]
+        nets, fails, _ = Objective.evaluate_batch(matrix, Objective.node_attributes(nodes))
         
-        #print(f'length of ants: {len(self._ants)}')
-        ants_info = {}
-        #max_net, min_net = 0, sys.maxsize
-        #max_fail, min_fail = 0, sys.maxsize
-        nets = []
-        fails = []
-        #min_net = sys.maxsize
-        for ant in self._ants:
-            
-            assignment = []
-            for worker_idx in ant.visited:
-                assignment.append(self._worker_matrix[worker_idx])
-                
-            #score = Objective.objectvie_weighted_sum(assignment)
-            #print(f'score: {score}')
-            ants_info[ant] = {
-                'assignment': assignment,
-                'network': Objective.topology_network_distance(assignment=assignment),
-                #'failure': Objective.system_failure(assignment)
-                'failure': Objective.availability(assignment)
-            }
-            
-            nets.append(ants_info[ant]['network'])
-            fails.append(ants_info[ant]['failure'])
-            
-            #max_net = max(max_net, ants_info[ant]['network'])
-            #min_net = min(min_net, ants_info[ant]['network'])
-            
-            #max_fail = max(max_fail, ants_info[ant]['failure'])
-            #min_fail = min(min_fail, ants_info[ant]['failure'])
-        
-        #print(f'network: {max_net}, {min_net}')
-        #print(f'failure: {max_fail}, {min_fail}')
-        
-        #sub_net = max_net - min_net
-        #sub_fail = max_fail - min_fail
-        
-        #if sub_net == 0:
-        #    sub_net = 1
-        #if sub_fail == 0:
-        #    sub_fail = 1
-        
-        
-        best = sys.maxsize
-        #best_not_scaled = 0.0
-        #best1 = 0.0 
-        #best2 = 0.0
-        ret = []
-        for idx, ant in enumerate(ants_info):
-            ant_info = ants_info[ant]
-            #print(ant_info['network'], ant_info['failure'])
-            ant_info['fitness'] = self._z_score(nets, idx) * 0.5 + self._z_score(fails, idx)
-            
-            if best > ant_info['fitness']:
-                ##print(f'best so far: {ant_info["fitness"]}')
-                
-                #best_not_scaled = ant_info['network'] * 0.5 + ant_info['failure'] * 0.5
-                #best1 = ant_info['network']
-                #best2 = ant_info['failure']
-                best = ant_info['fitness']
-                #print(f'best fitness: {best}')
-                ret = assignment
-        
-        #print(f'ACO Best not scaled(ants: {self._num_ants}): {best_not_scaled}, {best1}, {best2}')                
-        #print(f'ACO Best scaled(ants: {self._num_ants}): {best_not_scaled}, {self._z_score(nets, idx)}, {self._z_score(fails, idx)}')
-            
-        return ret
+        # the z-scores as in MetaHueristicScheduler._z_score, for all ants at once
+        fitness = np.abs(nets - nets.mean()) / nets.std() * 0.5 + np.abs(fails - fails.mean()) / fails.std()
+        best = int(np.argmin(fitness))
+        return [self._worker_matrix[worker_idx] for worker_idx in self._ants[best].visited]
                 
 
     def _meta_algorithm(self, cluster: Cluster, topology: Topology) -> List[PhysicalNode]:
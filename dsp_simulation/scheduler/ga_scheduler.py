@@ -9,6 +9,7 @@ from dsp_simulation.scheduler.objective import Objective
 from dsp_simulation.scheduler.scheduler import MetaHueristicScheduler
 from dsp_simulation.topology.topology import Topology
 
+import numpy as np
 import random as rd
 import sys
 import time
@@ -91,6 +92,14 @@ class GAScheduler(MetaHueristicScheduler):
         return pair[0][0], pair[1][0]
     
     
+    def _score(self, individuals: List[Individual]) -> List[float]:
+        """Weighted sums of the given individuals, evaluated in one batch (see Objective.evaluate_batch())
+        """
+        if not individuals:
+            return []
+        matrix = np.array([[self._node_index[node.id] for node in ind.assignment] for ind in individuals], dtype=np.int64)
+        return Objective.evaluate_batch(matrix, self._node_attributes)[2].tolist()
+    
     def _check_available_case(self, cluster: Cluster, assignment: List[PhysicalNode]):
         info = {}
         for node in assignment:
@@ -109,6 +118,8 @@ class GAScheduler(MetaHueristicScheduler):
         best_idx = -1
         self._num_generation = 0
         self._best_so_far = sys.maxsize
+        self._node_index = {node.id: idx for idx, node in enumerate(cluster.nodes)}
+        self._node_attributes = Objective.node_attributes(cluster.nodes)
         
         population = []
         cnt = 0 
@@ -119,15 +130,11 @@ class GAScheduler(MetaHueristicScheduler):
                 cnt += 1
         
         while self._num_iteration >= self._num_generation:      
-            scores = []
-            d_scores = {}
-            for i in range(self._num_population):
-                score = Objective.objectvie_weighted_sum(population[i].assignment)
-                scores.append(score)
-                d_scores[i] = score
-                
-                if self._best_so_far > score:
-                    self._best_so_far = score
+            scores = self._score(population)
+            d_scores = dict(enumerate(scores))
+            self._best_so_far = min(self._best_so_far, min(scores))
+            # offspring are scored together after crossover and mutation
+            offspring = []
             
             # Crossover
             for _ in range(self._num_crossover):
@@ -146,7 +153,7 @@ class GAScheduler(MetaHueristicScheduler):
                 
                 if child not in population:
                     population.append(child)
-                    d_scores[len(population) - 1] = Objective.objectvie_weighted_sum(child.assignment)
+                    offspring.append(len(population) - 1)
             
             
             # Mutation
@@ -171,7 +178,10 @@ class GAScheduler(MetaHueristicScheduler):
                 
                 if mutant not in population:
                     population.append(mutant)
-                    d_scores[len(population) - 1] = Objective.objectvie_weighted_sum(mutant.assignment)                                
+                    offspring.append(len(population) - 1)
+            
+            for idx, score in zip(offspring, self._score([population[i] for i in offspring])):
+                d_scores[idx] = score
             
             
             # Sorting
@@ -200,6 +210,8 @@ class GAScheduler(MetaHueristicScheduler):
             return None
         
         best = self._meta_algorithm(cluster, topology)
+        del self._node_index
+        del self._node_attributes
         
         if best == None:
             return None
@@ -1,6 +1,6 @@
 from copy import deepcopy
 import sys
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from dsp_simulation.cluster.cluster import Cluster
 from dsp_simulation.cluster.physical_node import PhysicalNode
 from dsp_simulation.scheduler.scheduler import MetaHueristicScheduler
@@ -15,7 +15,8 @@ class Wolf:
         #self._assignment: List[PhysicalNode] = self._initialize_individual(cluster, topology)
         self._worker = available_worker
         self.assignment: np.array = self._initialize_individual(len(available_worker), num_choice)
-        self._raw_fitness = self._get_seperate_fitness()
+        # the wolves are evaluated together by GWOScheduler._update_fitness
+        self._raw_fitness: Dict[str, float] = None
         self.fitness = 0.0
     
     #@property
@@ -30,6 +31,10 @@ class Wolf:
     def raw_fitness(self):
         return self._raw_fitness
     
+    @raw_fitness.setter
+    def raw_fitness(self, raw_fitness: Dict[str, float]):
+        self._raw_fitness = raw_fitness
+    
     def update_fitness_by_min_max(self, min: Dict[str, float], max: Dict[str,float]):
         """Current supporting keys of objectives are ['network', 'failure']
 
@@ -50,18 +55,6 @@ class Wolf:
             #self.fitness += fair_weight * (self._raw_fitness[key] - min[key])/ (subtraction)
             self.fitness += fair_weight * self._raw_fitness[key]
     
-    def _get_seperate_fitness(self):
-        assignment = [self._worker[idx] for idx, choice in enumerate(self.assignment) if choice]
-        #print(assignment)
-        network = Objective.topology_network_distance(assignment)
-        #failure = Objective.system_failure(assignment)
-        failure = Objective.availability(assignment)
-        
-        return {
-            'network': network,
-            'failure': failure
-            }
-    
     def _initialize_individual(self, num_worker: int, num_choice: int) -> np.array:
         """Select randomly the nodes of cluster to allocate the topology
 
@@ -91,6 +84,13 @@ class GWOScheduler(MetaHueristicScheduler):
         self._max_iteration = num_iter
         
     def _update_fitness(self, wolves: List[Wolf]):
+        networks, failures = self._evaluate([wolf.assignment for wolf in wolves])
+        for wolf, network, failure in zip(wolves, networks, failures):
+            wolf.raw_fitness = {
+                'network': network,
+                'failure': failure
+            }
+        
         self._minimum = {
             'network': sys.maxsize,
             'failure': sys.maxsize
@@ -115,6 +115,11 @@ class GWOScheduler(MetaHueristicScheduler):
         for node in cluster.nodes:
             for _ in node.get_available_worker():
                 self._worker_to_node.append(node)
+        
+        # node of each worker as an index into the node attributes, to evaluate wolves in batches
+        node_index = {node.id: idx for idx, node in enumerate(cluster.nodes)}
+        self._worker_node_index = np.array([node_index[node.id] for node in self._worker_to_node], dtype=np.int64)
+        self._node_attributes = Objective.node_attributes(cluster.nodes)
     
     def repair(self, x: np.array):
         cnt = 0
@@ -126,17 +131,13 @@ class GWOScheduler(MetaHueristicScheduler):
                 cnt += 1
         pass
     
-    def _get_seperate_fitness(self, x):
-        assignment = [self._worker_to_node[idx] for idx, choice in enumerate(x) if choice]
-        #print(assignment)
-        network = Objective.topology_network_distance(assignment)
-        #failure = Objective.system_failure(assignment)
-        failure = Objective.availability(assignment)
-        
-        return {
-            'network': network,
-            'failure': failure
-            }
+    def _evaluate(self, xs: List[np.array]) -> Tuple[List[float], List[float]]:
+        """Network distance and availability of the given selections of workers, which choose the same number of workers, in one batch (see Objective.evaluate_batch())
+        """
+        _, selected = np.nonzero(np.array(xs))
+        matrix = self._worker_node_index[selected].reshape(len(xs), -1)
+        network, failure, _ = Objective.evaluate_batch(matrix, self._node_attributes)
+        return network.tolist(), failure.tolist()
     
     def _meta_algorithm(self, cluster: Cluster, topology: Topology) -> List[PhysicalNode]:        
         #wolves = [Wolf(
@@ -167,6 +168,8 @@ class GWOScheduler(MetaHueristicScheduler):
             xp = (np.matmul(w, cat) + u * np.random.normal(size=(1, len_worker))).reshape(len_worker)
             
             
+            # the moves of all wolves are drawn first and evaluated in one batch
+            xs = []
             for k in range(self._num_wolves):
                 x = np.zeros(len_worker)                    
 
@@ -192,8 +195,14 @@ class GWOScheduler(MetaHueristicScheduler):
                             idx = rd.randint(0, len_worker-1)
                         x[idx] = 1
                         cnt -= 1
-                        
-                res = self._get_seperate_fitness(x)
+                xs.append(x)
+            
+            networks, failures = self._evaluate(xs)
+            for k, x in enumerate(xs):
+                res = {
+                    'network': networks[k],
+                    'failure': failures[k]
+                }
                 self._minimum['network'] = min(self._minimum['network'], res['network'])
                 self._maximum['network'] = max(self._maximum['network'], res['network'])
                 self._minimum['failure'] = min(self._minimum['failure'], res['failure'])
@@ -234,6 +243,8 @@ class GWOScheduler(MetaHueristicScheduler):
         assignment = [self._worker_to_node[idx] for idx, choice in enumerate(best) if choice]
         
         del self._worker_to_node
+        del self._worker_node_index
+        del self._node_attributes
         del self._minimum
         del self._maximum
         
@@ -1,6 +1,8 @@
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 from dsp_simulation.cluster.physical_node import PhysicalNode
 import math
+import numpy as np
 
 class Network:
     INTER_THREAD = 1
@@ -22,12 +24,26 @@ class Objective:
     RESPONSETIME_MIN = 0
     
     TYPE = ['NETWORK_DISTANCE', 'AVAILABILITY']
+    
+    # the maximum number of assignments whose objectives evaluate() and evaluate_batch() keep, least recently used first out; 0 disables the cache
+    CACHE_SIZE = 65536
+    _cache: 'OrderedDict[tuple, Tuple[float, float]]' = OrderedDict()
+    _cache_hit = 0
+    _cache_miss = 0
+    
     @classmethod
     def objectvie_weighted_sum(cls, assignment: List[PhysicalNode], weight_network=0.5, weight_failure=0.5):
         #print(f'network: {Objective.topology_network_distance(assignment)}, failure: {Objective.system_failure(assignment)}')
         #return weight_network * Objective.topology_network_distance(assignment) + weight_failure * Objective.system_failure(assignment) 
-        return weight_network * (Objective.topology_network_distance(assignment) - Objective.RESPONSETIME_MIN) / (Objective.RESPONSETIME_MAX - Objective.RESPONSETIME_MIN) +\
-            weight_failure * (1 - ((Objective.availability(assignment) - Objective.AVAILABILITY_MIN) / (Objective.AVAILABILITY_MAX - Objective.AVAILABILITY_MIN)))
+        network, availability = Objective.evaluate(assignment)
+        return Objective.weighted_sum(network, availability, weight_network, weight_failure)
+    
+    @classmethod
+    def weighted_sum(cls, network: float, availability: float, weight_network=0.5, weight_failure=0.5):
+        """Weighted sum of the network distance and the availability normalized by their bounds in the cluster, see Cluster.initialize_objective()
+        """
+        return weight_network * (network - Objective.RESPONSETIME_MIN) / (Objective.RESPONSETIME_MAX - Objective.RESPONSETIME_MIN) +\
+            weight_failure * (1 - ((availability - Objective.AVAILABILITY_MIN) / (Objective.AVAILABILITY_MAX - Objective.AVAILABILITY_MIN)))
     
     #@classmethod
     #def objectvie_weighted_sum(cls, assignment: List[PhysicalNode], weight_network=1):
@@ -42,15 +58,187 @@ class Objective:
         pass
     
     @classmethod
-    def topology_network_distance(cls, assignment: List[PhysicalNode]):
-        network_dist = 0
+    def evaluate(cls, assignment: List[PhysicalNode]) -> Tuple[float, float]:
+        """Network distance and availability of an assignment at once, in O(n + nodes) instead of over every pair of subgraphs.
+        Both sums over the pairs only depend on how many subgraphs each physical node and each rack holds:
+        with c_v subgraphs on node v, r_k on rack k and n in total, Pn = sum C(c_v, 2) pairs share a node and Pr = sum C(r_k, 2) share a rack, so
+        
+            network distance = INTER_PROCESS * Pn + INTER_NODE * (Pr - Pn) + INTER_RACK * (C(n, 2) - Pr) + (n - 1) * sum_v c_v / speed_up_v
+            availability = (n - 1) * sum_v c_v * log(A_v) - sum_v C(c_v, 2) * log(A_v)
+        
+        The results equal those of the pairwise sums up to the rounding of the floating-point additions.
+        
+        As both only depend on the multiset of nodes, the results are cached by the sorted (node id, count) pairs of the assignment, see cache_stats().
+        The cache is cleared by clear_cache(), e.g. when the objectives of a new cluster are initialized, since node ids are only unique within a cluster.
+
+        Args:
+            assignment (List[PhysicalNode]): physical node of each subgraph
+
+        Returns:
+            Tuple[float, float]: network distance and availability
+        """
+        count: Dict[str, int] = {}
+        node_of: Dict[str, PhysicalNode] = {}
+        for node in assignment:
+            count[node.id] = count.get(node.id, 0) + 1
+            node_of[node.id] = node
+        
+        if Objective.CACHE_SIZE > 0:
+            key = tuple(sorted(count.items()))
+            cached = Objective._cache_get(key)
+            if cached is not None:
+                return cached
+        
+        n = len(assignment)
+        rack_count = {}
+        node_pair = 0
+        inv_speed = 0.0
+        log_availability = 0.0
+        same_node_log_availability = 0.0
+        for id, c in count.items():
+            node = node_of[id]
+            rack_count[node.rack] = rack_count.get(node.rack, 0) + c
+            pair = c * (c - 1) // 2
+            node_pair += pair
+            inv_speed += c / node.speed_up
+            log = math.log(node.availability)
+            log_availability += c * log
+            same_node_log_availability += pair * log
+        rack_pair = sum(r * (r - 1) // 2 for r in rack_count.values())
+        
+        network = Network.INTER_PROCESS * node_pair + Network.INTER_NODE * (rack_pair - node_pair) + Network.INTER_RACK * (n * (n - 1) // 2 - rack_pair) + (n - 1) * inv_speed
+        availability = (n - 1) * log_availability - same_node_log_availability
+        
+        if Objective.CACHE_SIZE > 0:
+            Objective._cache_put(key, (network, availability))
+        return network, availability
+    
+    @classmethod
+    def _cache_get(cls, key: tuple) -> Tuple[float, float]:
+        cached = Objective._cache.get(key)
+        if cached is None:
+            Objective._cache_miss += 1
+            return None
+        Objective._cache.move_to_end(key)
+        Objective._cache_hit += 1
+        return cached
+    
+    @classmethod
+    def _cache_put(cls, key: tuple, value: Tuple[float, float]):
+        Objective._cache[key] = value
+        if len(Objective._cache) > Objective.CACHE_SIZE:
+            Objective._cache.popitem(last=False)
+    
+    @classmethod
+    def cache_stats(cls) -> Dict[str, float]:
+        """Statistics of the cache of evaluate() and evaluate_batch() since it was last cleared
+
+        Returns:
+            Dict[str, float]: 'size' (number of cached assignments), 'hit', 'miss' and 'hit_rate' (NaN before any lookup)
+        """
+        lookup = Objective._cache_hit + Objective._cache_miss
+        return {
+            'size': len(Objective._cache),
+            'hit': Objective._cache_hit,
+            'miss': Objective._cache_miss,
+            'hit_rate': Objective._cache_hit / lookup if lookup else math.nan,
+        }
+    
+    @classmethod
+    def clear_cache(cls):
+        """Drop the cached objectives of evaluate() and evaluate_batch() and reset the statistics of the cache
+        """
+        Objective._cache.clear()
+        Objective._cache_hit = 0
+        Objective._cache_miss = 0
+    
+    @classmethod
+    def node_attributes(cls, nodes: List[PhysicalNode]) -> Dict[str, np.ndarray]:
+        """Attributes of the physical nodes used by evaluate_batch(), indexed like the given nodes
+
+        Args:
+            nodes (List[PhysicalNode]): distinct physical nodes, e.g. Cluster.nodes
+
+        Returns:
+            Dict[str, np.ndarray]: 'id' (id of each node), 'rack' (index of the rack of each node), 'inv_speed_up' and 'log_availability'
+        """
+        racks = {}
+        return {
+            'id': np.array([node.id for node in nodes], dtype=object),
+            'rack': np.array([racks.setdefault(node.rack, len(racks)) for node in nodes], dtype=np.int64),
+            'inv_speed_up': np.array([1 / node.speed_up for node in nodes], dtype=np.float64),
+            'log_availability': np.array([math.log(node.availability) for node in nodes], dtype=np.float64),
+        }
+    
+    @classmethod
+    def evaluate_batch(cls, matrix: np.ndarray, attributes: Dict[str, np.ndarray], weight_network=0.5, weight_failure=0.5) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Evaluate a population of assignments at once, with the sums of evaluate() over the occupancy counts of every row.
+        The counts are taken by a single bincount over the node indices shifted by the row, so the cost is O(P * (n + nodes)) in numpy.
+        The occupancy counts of a row, keyed by node id, are also the key of the cache of evaluate(): only the rows missing from it are computed,
+        in one batch, and rows repeated within the batch, e.g. the converged individuals of a population, are computed once.
+
+        Args:
+            matrix (np.ndarray): P x n node indices, where row p is an assignment and column i the node of its i-th subgraph
+            attributes (Dict[str, np.ndarray]): attributes of the nodes the indices refer to, see node_attributes()
+            weight_network (float, optional): weight of the network distance in the weighted sum. Defaults to 0.5.
+            weight_failure (float, optional): weight of the availability in the weighted sum. Defaults to 0.5.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: network distance, availability and weighted sum (see objectvie_weighted_sum()) of each row
+        """
+        matrix = np.asarray(matrix, dtype=np.int64)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        num_row, n = matrix.shape
+        rack = attributes['rack']
+        num_node, num_rack = len(rack), int(rack.max()) + 1 if len(rack) else 0
+        
+        offset = np.arange(num_row, dtype=np.int64).reshape(-1, 1)
+        count = np.bincount((matrix + offset * num_node).ravel(), minlength=num_row * num_node).reshape(num_row, num_node)
+        
+        network = np.empty(num_row, dtype=np.float64)
+        availability = np.empty(num_row, dtype=np.float64)
+        miss = np.arange(num_row)
+        if Objective.CACHE_SIZE > 0:
+            # rows of each key missing from the cache, in the order they first appear
+            pending: Dict[tuple, List[int]] = {}
+            node_id = attributes['id']
+            for row in range(num_row):
+                node = np.flatnonzero(count[row])
+                key = tuple(sorted(zip(node_id[node].tolist(), count[row, node].tolist())))
+                if key in pending:
+                    pending[key].append(row)
+                    Objective._cache_hit += 1
+                    continue
+                cached = Objective._cache_get(key)
+                if cached is None:
+                    pending[key] = [row]
+                else:
+                    network[row], availability[row] = cached
+            miss = np.array([rows[0] for rows in pending.values()], dtype=np.int64)
+        
+        if len(miss):
+            miss_count = count[miss]
+            rack_count = np.bincount((rack[matrix[miss]] + offset[:len(miss)] * num_rack).ravel(), minlength=len(miss) * num_rack).reshape(len(miss), num_rack)
+            same_node = miss_count * (miss_count - 1) // 2
+            node_pair = same_node.sum(axis=1)
+            rack_pair = (rack_count * (rack_count - 1) // 2).sum(axis=1)
+            network[miss] = Network.INTER_PROCESS * node_pair + Network.INTER_NODE * (rack_pair - node_pair) + Network.INTER_RACK * (n * (n - 1) // 2 - rack_pair) +\
+                (n - 1) * (miss_count @ attributes['inv_speed_up'])
+            availability[miss] = (n - 1) * (miss_count @ attributes['log_availability']) - same_node @ attributes['log_availability']
         
-        len_assignment = len(assignment)
-        for i in range(len_assignment):
-            for j in range(i+1, len_assignment):
-                network_dist += get_network_distance(assignment[i], assignment[j]) + (1 / assignment[i].speed_up + 1 / assignment[j].speed_up)
-                
-        return network_dist
+        if Objective.CACHE_SIZE > 0:
+            for key, rows in pending.items():
+                Objective._cache_put(key, (float(network[rows[0]]), float(availability[rows[0]])))
+                network[rows[1:]] = network[rows[0]]
+                availability[rows[1:]] = availability[rows[0]]
+        return network, availability, Objective.weighted_sum(network, availability, weight_network, weight_failure)
+    
+    @classmethod
+    def topology_network_distance(cls, assignment: List[PhysicalNode]):
+        """Sum of the network distances and inverse speed ups over every pair of subgraphs of an assignment, see evaluate()
+        """
+        return Objective.evaluate(assignment)[0]
     
     @classmethod
     def system_failure(cls, assignment: List[PhysicalNode]):
@@ -73,18 +261,9 @@ class Objective:
     
     @classmethod
     def availability(cls, assignment: List[PhysicalNode]):
-        availability = 0
-        
-        len_assignment = len(assignment)
-        for i in range(len_assignment):
-            for j in range(i+1, len_assignment):
-                if assignment[i].id != assignment[j].id:
-                    ava_ = math.log(assignment[i].availability) + math.log(assignment[j].availability)
-                else:
-                    ava_ = math.log(assignment[i].availability)
-                availability += ava_
-        
-        return availability
+        """Sum of the log availabilities over every pair of subgraphs of an assignment, counting a node once for a pair on the same node, see evaluate()
+        """
+        return Objective.evaluate(assignment)[1]
     
         count:Dict[PhysicalNode, int] = {}
         for node in assignment:
@@ -103,6 +282,99 @@ class Objective:
             
         return ret
     
+class ObjectiveState:
+    """Occupancy counts and partial sums of an assignment, to evaluate moves of single positions without rescoring the whole assignment.
+    The sums are those of Objective.evaluate(); moving one subgraph from node u to node v only changes c_u, c_v and the counts of their racks,
+    so delta_move() and apply_move() take O(1).
+    
+    The partial sums are updated by additions, so after many moves they may drift from a fresh evaluation by the rounding of floating-point numbers.
+    """
+    def __init__(self, assignment: List[PhysicalNode]):
+        """
+        Args:
+            assignment (List[PhysicalNode]): physical node of each subgraph
+        """
+        self._assignment = list(assignment)
+        self._count: Dict[str, int] = {}
+        self._rack_count = {}
+        for node in self._assignment:
+            self._count[node.id] = self._count.get(node.id, 0) + 1
+            self._rack_count[node.rack] = self._rack_count.get(node.rack, 0) + 1
+        self._network, self._availability = Objective.evaluate(self._assignment)
+    
+    @property
+    def assignment(self) -> List[PhysicalNode]:
+        return self._assignment
+    
+    @property
+    def network(self) -> float:
+        """Network distance of the current assignment, see Objective.topology_network_distance()
+        """
+        return self._network
+    
+    @property
+    def availability(self) -> float:
+        """Availability of the current assignment, see Objective.availability()
+        """
+        return self._availability
+    
+    def weighted_sum(self, weight_network=0.5, weight_failure=0.5) -> float:
+        """Weighted sum of the current assignment, see Objective.objectvie_weighted_sum()
+        """
+        return Objective.weighted_sum(self._network, self._availability, weight_network, weight_failure)
+    
+    def delta_move(self, pos: int, node: PhysicalNode) -> Tuple[float, float]:
+        """Change of the objectives if the subgraph at a position were moved to another node
+
+        Args:
+            pos (int): position of the subgraph in the assignment
+            node (PhysicalNode): new node of the subgraph
+
+        Returns:
+            Tuple[float, float]: change of the network distance and of the availability
+        """
+        old = self._assignment[pos]
+        if old.id == node.id:
+            return 0.0, 0.0
+        
+        n = len(self._assignment)
+        # pairs sharing a node lose the c_u - 1 other subgraphs of the old node and gain the c_v of the new one, and likewise for racks
+        old_count, new_count = self._count[old.id], self._count.get(node.id, 0)
+        node_pair = new_count - (old_count - 1)
+        rack_pair = 0
+        if old.rack != node.rack:
+            rack_pair = self._rack_count.get(node.rack, 0) - (self._rack_count[old.rack] - 1)
+        
+        old_log, new_log = math.log(old.availability), math.log(node.availability)
+        network = (Network.INTER_PROCESS - Network.INTER_NODE) * node_pair + (Network.INTER_NODE - Network.INTER_RACK) * rack_pair +\
+            (n - 1) * (1 / node.speed_up - 1 / old.speed_up)
+        availability = (n - 1) * (new_log - old_log) - (new_count * new_log - (old_count - 1) * old_log)
+        return network, availability
+    
+    def apply_move(self, pos: int, node: PhysicalNode) -> Tuple[float, float]:
+        """Move the subgraph at a position to another node
+
+        Args:
+            pos (int): position of the subgraph in the assignment
+            node (PhysicalNode): new node of the subgraph
+
+        Returns:
+            Tuple[float, float]: change of the network distance and of the availability
+        """
+        delta = self.delta_move(pos, node)
+        old = self._assignment[pos]
+        self._assignment[pos] = node
+        
+        self._count[old.id] -= 1
+        self._rack_count[old.rack] -= 1
+        self._count[node.id] = self._count.get(node.id, 0) + 1
+        self._rack_count[node.rack] = self._rack_count.get(node.rack, 0) + 1
+        
+        self._network += delta[0]
+        self._availability += delta[1]
+        return delta
+
+
 def get_network_distance(pn1: PhysicalNode, pn2: PhysicalNode):
     """Get a distance from a worker and other worke.
     In this version, we only implemented using network distance.
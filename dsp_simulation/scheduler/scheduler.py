@@ -1,5 +1,4 @@
 from abc import *
-from copy import deepcopy
 from typing import List
 from dsp_simulation.cluster.cluster import Cluster
 from dsp_simulation.cluster.physical_node import PhysicalNode
@@ -51,8 +50,18 @@ class Scheduler(metaclass=ABCMeta):
         pass
     
 
-    def reschedule(self, cluster: Cluster, topology: Topology) -> bool:
-        new_cluster = deepcopy(cluster)
+    def reschedule(self, cluster: Cluster, topology: Topology, instantiate: bool=True) -> bool:
+        """Schedule the topology again over a copy of the cluster with no assigned worker
+
+        Args:
+            cluster (Cluster): cluster the topology is running on
+            topology (Topology): topology to schedule
+            instantiate (bool, optional): If False, the task graph of the topology is not instantiated again, e.g. when several schedulers compute candidates for the same task graph. Defaults to True.
+
+        Returns:
+            Tuple: (new cluster, assignment, elapsed time (timedelta), elapsed time (ns))
+        """
+        new_cluster = cluster.clone()
         #print(cluster.get)
         cnt = 0
         for node in cluster.get_available_physical_node():
@@ -73,7 +82,8 @@ class Scheduler(metaclass=ABCMeta):
             for worker in node.get_available_worker():
                 cnt3 += 1
                 
-        topology.instantiate(3)
+        if instantiate:
+            topology.instantiate(3)
         stime = datetime.now()
         stime2 = time.time_ns()
         assignment = self.schedule(new_cluster, topology)
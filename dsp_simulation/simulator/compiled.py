@@ -0,0 +1,611 @@
+import math
+import numpy as np
+
+from typing import Dict, List
+from dsp_simulation.cluster.network import Network, RoutingTable
+from dsp_simulation.cluster.worker import Worker
+from dsp_simulation.topology.task import OperatorTask, SinkTask, SourceTask, Task
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# columns of the float task state
+T_RATE = 0
+T_TFD = 1
+T_BASE = 2
+T_SIZE_MEAN = 3
+T_SIZE_STD = 4
+T_PRODUCTIVITY = 5
+T_LAT_MEAN = 6
+T_LAT_STD = 7
+T_SPEED_UP = 8
+T_EXECUTABLE = 9
+T_THROUGHPUT = 10
+T_LAT_SUM = 11
+T_LAT_SQ = 12
+T_E2E_SUM = 13
+T_E2E_WEIGHT = 14
+T_FLOAT_COLUMNS = 15
+
+# columns of the int task state
+T_KIND = 0
+T_REQUIRED = 1
+T_NUM_OUTPUT = 2
+T_EMITTED = 3
+T_PORT_START = 4
+T_PORT_END = 5
+T_GROUP_START = 6
+T_GROUP_END = 7
+T_INT_COLUMNS = 8
+
+KIND_SOURCE = 0
+KIND_OPERATOR = 1
+KIND_SINK = 2
+
+# columns of the float input port state
+P_ARV_SUM = 0
+P_ARV_SQ = 1
+P_ARV_CNT = 2
+P_LAST_ARRIVAL = 3
+P_FLOAT_COLUMNS = 4
+
+# columns of the int input port state
+P_TASK = 0
+P_HEAD = 1
+P_TAIL = 2
+P_TUPLES = 3
+P_HEAD_TAKEN = 4
+P_INT_COLUMNS = 5
+
+# columns of the float message state
+M_EVENT = 0
+M_SIZE = 1
+M_ACC = 2
+M_RCV = 3
+M_FLOAT_COLUMNS = 4
+
+# columns of the int message state
+M_COUNT = 0
+M_NEXT = 1
+M_INT_COLUMNS = 2
+
+# columns of the int packet heap
+H_SEQ = 0
+H_MSG = 1
+H_PORT = 2
+
+# status returned by the kernel
+STATUS_END = 0
+STATUS_REPORT = 1
+STATUS_STOP = 2
+STATUS_GROW = 3
+
+# scalar state
+S_FREE_TOP = 0
+S_HEAP_SIZE = 1
+S_SEQ = 2
+S_INTERVAL = 3
+S_MARGIN = 4
+S_BATCH = 5
+S_COLUMNS = 6
+
+
+@njit(cache=True)
+def _seed(seed):
+    np.random.seed(seed)
+
+
+@njit(cache=True)
+def _heap_push(heap_time, heap_int, scalar, time, msg, port):
+    i = scalar[S_HEAP_SIZE]
+    scalar[S_HEAP_SIZE] += 1
+    seq = scalar[S_SEQ]
+    scalar[S_SEQ] += 1
+
+    while i > 0:
+        parent = (i - 1) // 2
+        if heap_time[parent] < time or (heap_time[parent] == time and heap_int[parent, H_SEQ] < seq):
+            break
+        heap_time[i] = heap_time[parent]
+        heap_int[i, H_SEQ] = heap_int[parent, H_SEQ]
+        heap_int[i, H_MSG] = heap_int[parent, H_MSG]
+        heap_int[i, H_PORT] = heap_int[parent, H_PORT]
+        i = parent
+
+    heap_time[i] = time
+    heap_int[i, H_SEQ] = seq
+    heap_int[i, H_MSG] = msg
+    heap_int[i, H_PORT] = port
+
+
+@njit(cache=True)
+def _heap_pop(heap_time, heap_int, scalar):
+    """Remove the earliest packet and return its (message, port)
+    """
+    msg = heap_int[0, H_MSG]
+    port = heap_int[0, H_PORT]
+
+    scalar[S_HEAP_SIZE] -= 1
+    n = scalar[S_HEAP_SIZE]
+    time = heap_time[n]
+    seq = heap_int[n, H_SEQ]
+    last_msg = heap_int[n, H_MSG]
+    last_port = heap_int[n, H_PORT]
+
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= n:
+            break
+        if child + 1 < n and (heap_time[child + 1] < heap_time[child] or (heap_time[child + 1] == heap_time[child] and heap_int[child + 1, H_SEQ] < heap_int[child, H_SEQ])):
+            child += 1
+        if time < heap_time[child] or (time == heap_time[child] and seq < heap_int[child, H_SEQ]):
+            break
+        heap_time[i] = heap_time[child]
+        heap_int[i, H_SEQ] = heap_int[child, H_SEQ]
+        heap_int[i, H_MSG] = heap_int[child, H_MSG]
+        heap_int[i, H_PORT] = heap_int[child, H_PORT]
+        i = child
+
+    if n > 0:
+        heap_time[i] = time
+        heap_int[i, H_SEQ] = seq
+        heap_int[i, H_MSG] = last_msg
+        heap_int[i, H_PORT] = last_port
+    return msg, port
+
+
+@njit(cache=True)
+def _alloc(msg_float, msg_int, free, scalar, event_time, size, acc, count):
+    scalar[S_FREE_TOP] -= 1
+    msg = free[scalar[S_FREE_TOP]]
+    msg_float[msg, M_EVENT] = event_time
+    msg_float[msg, M_SIZE] = size
+    msg_float[msg, M_ACC] = acc
+    msg_int[msg, M_COUNT] = count
+    msg_int[msg, M_NEXT] = -1
+    return msg
+
+
+@njit(cache=True)
+def _free(free, scalar, msg):
+    free[scalar[S_FREE_TOP]] = msg
+    scalar[S_FREE_TOP] += 1
+
+
+@njit(cache=True)
+def _transmit(msg_float, heap_time, heap_int, scalar, link, cand_port, cand_link, msg, cand):
+    link_type = cand_link[cand]
+    delay = abs(np.random.standard_normal() * link[link_type, 1] + link[link_type, 0])
+    msg_float[msg, M_ACC] += delay
+    msg_float[msg, M_RCV] = msg_float[msg, M_EVENT] + delay / 1000
+    _heap_push(heap_time, heap_int, scalar, msg_float[msg, M_RCV], msg, cand_port[cand])
+
+
+@njit(cache=True)
+def _send(task, msg, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar):
+    """Route a message to one task of every downstream vertex; a counted message is split multinomially across the candidates
+    """
+    event_time = msg_float[msg, M_EVENT]
+    size = msg_float[msg, M_SIZE]
+    acc = msg_float[msg, M_ACC]
+    count = msg_int[msg, M_COUNT]
+
+    used = False
+    for g in range(task_int[task, T_GROUP_START], task_int[task, T_GROUP_END]):
+        start = group[g, 0]
+        n = group[g, 1] - start
+        if count == 1 or n == 1:
+            cand = start + np.random.randint(0, n)
+            if cand_port[cand] < 0:
+                continue
+            part = msg
+            if used:
+                part = _alloc(msg_float, msg_int, free, scalar, event_time, size, acc, count)
+            used = True
+            _transmit(msg_float, heap_time, heap_int, scalar, link, cand_port, cand_link, part, cand)
+            continue
+
+        remaining = count
+        for k in range(n):
+            cand = start + k
+            share = remaining
+            if k < n - 1:
+                share = np.random.binomial(remaining, 1.0 / (n - k))
+            remaining -= share
+            if share == 0 or cand_port[cand] < 0:
+                continue
+
+            if used:
+                part = _alloc(msg_float, msg_int, free, scalar, event_time, size, acc, share)
+            else:
+                part = msg
+                msg_int[part, M_COUNT] = share
+            used = True
+            _transmit(msg_float, heap_time, heap_int, scalar, link, cand_port, cand_link, part, cand)
+
+    if not used:
+        _free(free, scalar, msg)
+
+
+@njit(cache=True)
+def _deliver(msg, port, task_float, task_int, port_float, port_int, msg_float, msg_int, free, scalar):
+    task = port_int[port, P_TASK]
+    count = msg_int[msg, M_COUNT]
+    rcv_time = msg_float[msg, M_RCV]
+
+    if task_int[task, T_KIND] == KIND_SINK:
+        task_float[task, T_THROUGHPUT] += count
+        task_float[task, T_E2E_SUM] += msg_float[msg, M_ACC] * count
+        task_float[task, T_E2E_WEIGHT] += count
+        _free(free, scalar, msg)
+        return
+
+    if port_float[port, P_LAST_ARRIVAL] >= 0:
+        arv = (rcv_time - port_float[port, P_LAST_ARRIVAL]) * task_int[task, T_REQUIRED]
+        port_float[port, P_ARV_SUM] += arv
+        port_float[port, P_ARV_SQ] += arv * arv
+        port_float[port, P_ARV_CNT] += 1
+    # the other tuples of a batched message arrive together with the first one
+    port_float[port, P_ARV_CNT] += count - 1
+    port_float[port, P_LAST_ARRIVAL] = rcv_time
+
+    if port_int[port, P_TAIL] < 0:
+        port_int[port, P_HEAD] = msg
+    else:
+        msg_int[port_int[port, P_TAIL], M_NEXT] = msg
+    port_int[port, P_TAIL] = msg
+    port_int[port, P_TUPLES] += count
+
+
+@njit(cache=True)
+def _execute(task, now, task_float, task_int, port_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar):
+    required = task_int[task, T_REQUIRED]
+    if task_float[task, T_EXECUTABLE] > now:
+        return
+    for port in range(task_int[task, T_PORT_START], task_int[task, T_PORT_END]):
+        if port_int[port, P_TUPLES] < required:
+            return
+
+    latency = abs(np.random.standard_normal() * task_float[task, T_LAT_STD] + task_float[task, T_LAT_MEAN]) / task_float[task, T_SPEED_UP]
+    task_float[task, T_THROUGHPUT] += 1
+    task_float[task, T_LAT_SUM] += latency
+    task_float[task, T_LAT_SQ] += latency * latency
+
+    size_output = 0.0
+    max_delay = -1.0
+    min_waiting_time = np.inf
+    for port in range(task_int[task, T_PORT_START], task_int[task, T_PORT_END]):
+        key_output = 0.0
+        for _ in range(required):
+            msg = port_int[port, P_HEAD]
+            key_output += msg_float[msg, M_SIZE]
+            max_delay = max(max_delay, msg_float[msg, M_ACC])
+            min_waiting_time = min(min_waiting_time, (now - msg_float[msg, M_RCV]) / 1000)
+
+            port_int[port, P_HEAD_TAKEN] += 1
+            if port_int[port, P_HEAD_TAKEN] >= msg_int[msg, M_COUNT]:
+                port_int[port, P_HEAD] = msg_int[msg, M_NEXT]
+                if port_int[port, P_HEAD] < 0:
+                    port_int[port, P_TAIL] = -1
+                port_int[port, P_HEAD_TAKEN] = 0
+                _free(free, scalar, msg)
+        port_int[port, P_TUPLES] -= required
+        size_output += key_output / required
+
+    max_delay += min_waiting_time
+    size_output *= task_float[task, T_PRODUCTIVITY]
+    task_float[task, T_EXECUTABLE] = now + latency / 1000
+
+    num_output = task_int[task, T_NUM_OUTPUT]
+    if num_output == 0:
+        return
+    if scalar[S_BATCH]:
+        msg = _alloc(msg_float, msg_int, free, scalar, now, size_output, max_delay + latency, num_output)
+        _send(task, msg, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar)
+        return
+    for _ in range(num_output):
+        msg = _alloc(msg_float, msg_int, free, scalar, now, size_output, max_delay + latency, 1)
+        _send(task, msg, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar)
+
+
+@njit(cache=True)
+def _emit(task, now, task_float, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar):
+    rate = int(task_float[task, T_RATE])
+    emitted = task_int[task, T_EMITTED]
+    if emitted >= rate:
+        return
+    if task_float[task, T_BASE] < 0:
+        task_float[task, T_BASE] = math.floor(now)
+
+    base = task_float[task, T_BASE]
+    tfd = task_float[task, T_TFD]
+    if now < base + emitted * tfd:
+        return
+
+    size = abs(np.random.standard_normal() * task_float[task, T_SIZE_STD] + task_float[task, T_SIZE_MEAN])
+    task_float[task, T_THROUGHPUT] += 1
+    # planned emissions which are already past are skipped
+    task_int[task, T_EMITTED] = max(emitted + 1, min(rate, int((now - base) / tfd) + 1))
+
+    msg = _alloc(msg_float, msg_int, free, scalar, now, size, 0.0, 1)
+    _send(task, msg, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar)
+
+
+@njit(cache=True)
+def _run(now, freq, simulation_time, period, stop_time, source_order, operator_order, task_float, task_int, port_float, port_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar):
+    """Advance the tick loop until the next report, the given stop time or the end of the simulation
+
+    Returns:
+        Tuple[int, float]: (status, current time)
+    """
+    while now < simulation_time:
+        if scalar[S_FREE_TOP] < scalar[S_MARGIN]:
+            return STATUS_GROW, now
+        now += freq
+
+        # Communication Modeling
+        while scalar[S_HEAP_SIZE] > 0 and heap_time[0] <= now:
+            msg, port = _heap_pop(heap_time, heap_int, scalar)
+            _deliver(msg, port, task_float, task_int, port_float, port_int, msg_float, msg_int, free, scalar)
+
+        for task in source_order:
+            _emit(task, now, task_float, task_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar)
+
+        for task in operator_order:
+            _execute(task, now, task_float, task_int, port_int, group, cand_port, cand_link, link, msg_float, msg_int, free, heap_time, heap_int, scalar)
+
+        second = int(now)
+        if second % period == 0 and second // period != scalar[S_INTERVAL]:
+            scalar[S_INTERVAL] = second // period
+            return STATUS_REPORT, now
+        if now >= stop_time:
+            return STATUS_STOP, now
+    return STATUS_END, now
+
+
+class CompiledEngine:
+    """Array-backed counterpart of the tick loop of Simulator._start_task_execution.
+
+    The tasks, input queues, links, messages and in-flight packets of a deployment are laid out as NumPy arrays, and the source, network, operator and sink phases of each tick run inside numba-compiled functions.
+    The engine runs until the next report period, and the Python task objects are only touched to hand the period statistics over to the Reporter and the Profiler.
+    Without numba, the same functions run as plain Python, which is correct but much slower than the object-based engines.
+    """
+    END = STATUS_END
+    REPORT = STATUS_REPORT
+    STOP = STATUS_STOP
+    GROW = STATUS_GROW
+
+    def __init__(self, source_worker: List[Worker], ordered_task: Dict[int, List[OperatorTask]], sink_task: List[SinkTask], routing: RoutingTable, freq: float, now: float=0.0, interval: int=0, capacity: int=1 << 14):
+        """
+        Args:
+            source_worker (List[Worker]): workers running the source tasks
+            ordered_task (Dict[int, List[OperatorTask]]): operator tasks grouped by their tier
+            sink_task (List[SinkTask]): sink tasks
+            routing (RoutingTable): routing table of the deployment
+            freq (float): tick length (seconds)
+            now (float, optional): simulated time at which the engine starts. Defaults to 0.0.
+            interval (int, optional): index of the last reported period. Defaults to 0.
+            capacity (int, optional): initial number of message slots. Defaults to 1 << 14.
+        """
+        self._freq = freq
+        self._now = now
+
+        self._source: List[SourceTask] = [task for worker in source_worker for task in worker.graph.task]
+        self._operator: List[OperatorTask] = [task for key in ordered_task for task in ordered_task[key]]
+        self._sink: List[SinkTask] = list(sink_task)
+        self._task: List[Task] = self._source + self._operator + self._sink
+        self._index: Dict[Task, int] = {task: idx for idx, task in enumerate(self._task)}
+
+        num_task = len(self._task)
+        self._task_float = np.zeros((num_task, T_FLOAT_COLUMNS), dtype=np.float64)
+        self._task_int = np.zeros((num_task, T_INT_COLUMNS), dtype=np.int64)
+
+        # input ports, one per preceding vertex of an operator and one per sink
+        port_of: Dict[Task, Dict[str, int]] = {}
+        port_task = []
+        for task in self._operator + self._sink:
+            idx = self._index[task]
+            self._task_int[idx, T_PORT_START] = len(port_task)
+            keys = task.input_vertex if type(task) == OperatorTask else [None]
+            port_of[task] = {}
+            for key in keys:
+                port_of[task][key] = len(port_task)
+                port_task.append(idx)
+            self._task_int[idx, T_PORT_END] = len(port_task)
+
+        self._port_float = np.zeros((len(port_task), P_FLOAT_COLUMNS), dtype=np.float64)
+        self._port_float[:, P_LAST_ARRIVAL] = -1.0
+        self._port_int = np.zeros((len(port_task), P_INT_COLUMNS), dtype=np.int64)
+        self._port_int[:, P_TASK] = port_task
+        self._port_int[:, P_HEAD] = -1
+        self._port_int[:, P_TAIL] = -1
+
+        # routes, one group of candidate ports per downstream vertex
+        self._link = np.zeros((len(Network.TYPE), 2), dtype=np.float64)
+        for idx, link_type in enumerate(Network.TYPE):
+            if link_type in Network.DISTRIBUTION:
+                self._link[idx, 0] = Network.DISTRIBUTION[link_type].mean
+                self._link[idx, 1] = Network.DISTRIBUTION[link_type].std
+
+        group, cand_port, cand_link = [], [], []
+        margin = 0
+        for task in self._source + self._operator:
+            idx = self._index[task]
+            self._task_int[idx, T_GROUP_START] = len(group)
+            fan_out = 0
+            for routes in routing.routes(task):
+                start = len(cand_port)
+                for route in routes:
+                    if route is None:
+                        cand_port.append(-1)
+                        cand_link.append(0)
+                        continue
+                    target = route[0]
+                    key = None if type(target) == SinkTask else task.vertex_id
+                    cand_port.append(port_of[target].get(key, -1))
+                    cand_link.append(Network.TYPE.index(routing.link_type(task, target)))
+                group.append((start, len(cand_port)))
+                fan_out += len(routes)
+            self._task_int[idx, T_GROUP_END] = len(group)
+
+            # a task starts at most one execution per tick
+            outputs = 1
+            if type(task) == OperatorTask:
+                outputs = 1 if task.batch_output else max(int(task.required_num_tuple * task.selectivity), 1)
+            margin += outputs * max(fan_out, 1)
+
+        self._group = np.array(group, dtype=np.int64).reshape(-1, 2)
+        self._cand_port = np.array(cand_port, dtype=np.int64)
+        self._cand_link = np.array(cand_link, dtype=np.int64)
+
+        for task in self._source:
+            idx = self._index[task]
+            self._task_int[idx, T_KIND] = KIND_SOURCE
+            self._task_float[idx, T_SIZE_MEAN] = task.data_size_generator.mean
+            self._task_float[idx, T_SIZE_STD] = task.data_size_generator.std
+
+        batch = False
+        for task in self._operator:
+            idx = self._index[task]
+            self._task_int[idx, T_KIND] = KIND_OPERATOR
+            self._task_int[idx, T_REQUIRED] = task.required_num_tuple
+            self._task_int[idx, T_NUM_OUTPUT] = int(task.required_num_tuple * task.selectivity)
+            self._task_float[idx, T_PRODUCTIVITY] = task.productivity
+            self._task_float[idx, T_LAT_MEAN] = task.latency_generator.mean
+            self._task_float[idx, T_LAT_STD] = task.latency_generator.std
+            self._task_float[idx, T_SPEED_UP] = task.speed_up
+            self._task_float[idx, T_EXECUTABLE] = now
+            batch = batch or task.batch_output
+
+        for task in self._sink:
+            self._task_int[self._index[task], T_KIND] = KIND_SINK
+
+        self._source_order = np.array([self._index[task] for task in self._source], dtype=np.int64)
+        self._operator_order = np.array([self._index[task] for task in self._operator], dtype=np.int64)
+
+        self._scalar = np.zeros(S_COLUMNS, dtype=np.int64)
+        self._scalar[S_INTERVAL] = interval
+        self._scalar[S_MARGIN] = margin
+        self._scalar[S_BATCH] = batch
+
+        self._msg_float = np.zeros((0, M_FLOAT_COLUMNS), dtype=np.float64)
+        self._msg_int = np.zeros((0, M_INT_COLUMNS), dtype=np.int64)
+        self._free = np.zeros(0, dtype=np.int64)
+        self._heap_time = np.zeros(0, dtype=np.float64)
+        self._heap_int = np.zeros((0, 3), dtype=np.int64)
+        self._grow(max(capacity, 2 * margin))
+
+        _seed(np.random.randint(0, 2**31 - 1))
+        self.start_period()
+
+    @property
+    def now(self):
+        return self._now
+
+    @property
+    def interval(self):
+        return int(self._scalar[S_INTERVAL])
+
+    def _grow(self, capacity: int):
+        """Resize the message and packet arrays, keeping the live messages in place
+        """
+        old = len(self._msg_float)
+        msg_float = np.zeros((capacity, M_FLOAT_COLUMNS), dtype=np.float64)
+        msg_float[:old] = self._msg_float
+        msg_int = np.zeros((capacity, M_INT_COLUMNS), dtype=np.int64)
+        msg_int[:old] = self._msg_int
+
+        top = int(self._scalar[S_FREE_TOP])
+        free = np.zeros(capacity, dtype=np.int64)
+        free[:top] = self._free[:top]
+        free[top:top + capacity - old] = np.arange(capacity - 1, old - 1, -1)
+        self._scalar[S_FREE_TOP] = top + capacity - old
+
+        heap_time = np.zeros(capacity, dtype=np.float64)
+        heap_time[:old] = self._heap_time
+        heap_int = np.zeros((capacity, 3), dtype=np.int64)
+        heap_int[:old] = self._heap_int
+
+        self._msg_float, self._msg_int, self._free = msg_float, msg_int, free
+        self._heap_time, self._heap_int = heap_time, heap_int
+
+    def start_period(self):
+        """Reset the period statistics and load the data rates the sources computed for the next period
+        """
+        self._task_float[:, T_THROUGHPUT] = 0.0
+        self._task_float[:, T_LAT_SUM] = 0.0
+        self._task_float[:, T_LAT_SQ] = 0.0
+        self._task_float[:, T_E2E_SUM] = 0.0
+        self._task_float[:, T_E2E_WEIGHT] = 0.0
+        self._port_float[:, P_ARV_SUM] = 0.0
+        self._port_float[:, P_ARV_SQ] = 0.0
+        self._port_float[:, P_ARV_CNT] = 0.0
+
+        for task in self._source:
+            idx = self._index[task]
+            self._task_float[idx, T_RATE] = task.current_data_rate
+            self._task_float[idx, T_TFD] = 1 / task.current_data_rate
+            self._task_float[idx, T_BASE] = -1.0
+            self._task_int[idx, T_EMITTED] = 0
+
+    def run(self, simulation_time: float, period: int, stop_time: float=math.inf) -> int:
+        """Run the simulation until the next report, the given stop time or the end of the simulation
+
+        Args:
+            simulation_time (float): end of the simulation (seconds)
+            period (int): report period (seconds)
+            stop_time (float, optional): time at which the engine stops, e.g. to rebalance. Defaults to math.inf.
+
+        Returns:
+            int: CompiledEngine.REPORT, CompiledEngine.STOP or CompiledEngine.END
+        """
+        while True:
+            status, self._now = _run(self._now, self._freq, simulation_time, period, stop_time,
+                                     self._source_order, self._operator_order,
+                                     self._task_float, self._task_int, self._port_float, self._port_int,
+                                     self._group, self._cand_port, self._cand_link, self._link,
+                                     self._msg_float, self._msg_int, self._free, self._heap_time, self._heap_int, self._scalar)
+            if status != CompiledEngine.GROW:
+                return status
+            self._grow(2 * len(self._msg_float))
+
+    def collect_period(self) -> Dict[Task, dict]:
+        """Close the period of every task with the statistics of the engine
+
+        Returns:
+            Dict[Task, dict]: result of record_period() of each task, in the format of post_result()
+        """
+        ret = {}
+        stats = self._task_float
+
+        for task in self._source:
+            ret[task] = task.record_period(int(stats[self._index[task], T_THROUGHPUT]))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for task in self._operator:
+                idx = self._index[task]
+                throughput = stats[idx, T_THROUGHPUT]
+                lat_mean = stats[idx, T_LAT_SUM] / throughput
+                lat_var = stats[idx, T_LAT_SQ] / throughput - lat_mean ** 2
+
+                start, end = self._task_int[idx, T_PORT_START], self._task_int[idx, T_PORT_END]
+                ports = self._port_float[start:end]
+                arv_mean = ports[:, P_ARV_SUM] / ports[:, P_ARV_CNT]
+                arv_var = ports[:, P_ARV_SQ] / ports[:, P_ARV_CNT] - arv_mean ** 2
+                ret[task] = task.record_period(int(throughput), lat_mean, lat_var, arv_mean.mean(), arv_var.mean())
+
+            for task in self._sink:
+                idx = self._index[task]
+                ret[task] = task.record_period(int(stats[idx, T_THROUGHPUT]), stats[idx, T_E2E_SUM] / stats[idx, T_E2E_WEIGHT])
+
+        return ret
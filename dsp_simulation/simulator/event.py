@@ -0,0 +1,108 @@
+import heapq
+from typing import Any, List, Tuple
+
+
+class EventQueue:
+    """Priority queue of timestamped simulation events.
+
+    Events are ordered by time first and then by their kind, so that events sharing a timestamp are handled in the same order as the phases of the tick loop:
+    operator completions happen before the period report, and the report happens before the sources emit the first message of the next second.
+    Events of the same time and kind are handled in insertion order.
+    Packet arrivals are not queued here; they stay in the Network, which delivers them before any event of the same time.
+    ARRIVAL is not an event kind; it only marks that point when the engine is advanced up to a given time.
+    """
+    ARRIVAL = -1
+    OPERATOR = 0
+    REPORT = 1
+    REBALANCE = 2
+    SOURCE = 3
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, int, Any]] = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, time: float, kind: int, payload: Any = None):
+        """Schedule an event
+
+        Args:
+            time (float): simulated time of the event (seconds)
+            kind (int): one of the event kinds of this class, e.g. EventQueue.SOURCE
+            payload (Any, optional): object handed back when the event is popped
+        """
+        heapq.heappush(self._heap, (time, kind, self._seq, payload))
+        self._seq += 1
+
+    def pop(self) -> Tuple[float, int, Any]:
+        """Remove and return the earliest event
+
+        Returns:
+            Tuple[float, int, Any]: (time, kind, payload)
+        """
+        time, kind, _, payload = heapq.heappop(self._heap)
+        return time, kind, payload
+
+    def peek_time(self) -> float:
+        """Time of the earliest event, or None if the queue is empty
+        """
+        if self._heap:
+            return self._heap[0][0]
+        return None
+    
+    def peek(self) -> Tuple[float, int]:
+        """(time, kind) of the earliest event, or None if the queue is empty
+        """
+        if self._heap:
+            return self._heap[0][0], self._heap[0][1]
+        return None
+
+
+class ReadyQueue:
+    """Operator tasks waiting to be run by the tick loop.
+
+    Instead of polling every operator on every tick, a task notifies this queue when it has enough input messages, either on arrival or when its previous execution leaves enough messages behind.
+    The task is queued with the time its previous execution finishes, and handed out by due() once the clock passes that time.
+    A queued task is not queued twice; its executable time only changes when it is run, after it was handed out.
+    """
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._queued = set()
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def notify(self, task: Any, executable_time: float):
+        """Queue a task which has enough input to be run
+
+        Args:
+            task (Any): operator task
+            executable_time (float): simulated time from which the task can be run (seconds)
+        """
+        if task in self._queued:
+            return
+        self._queued.add(task)
+        heapq.heappush(self._heap, (executable_time, self._seq, task))
+        self._seq += 1
+
+    def due(self, now: float) -> List[Any]:
+        """Remove and return the tasks which can be run at the given time, in the order they became runnable
+
+        Args:
+            now (float): current simulated time (seconds)
+
+        Returns:
+            List[Any]: runnable tasks
+        """
+        ret = []
+        while self._heap and self._heap[0][0] <= now:
+            task = heapq.heappop(self._heap)[2]
+            self._queued.discard(task)
+            ret.append(task)
+        return ret
+
+    def clear(self):
+        self._heap = []
+        self._queued = set()
@@ -0,0 +1,200 @@
+import numpy as np
+
+from typing import Dict, List
+from dsp_simulation.cluster.network import Network, RoutingTable
+from dsp_simulation.cluster.worker import Worker
+from dsp_simulation.topology.task import OperatorTask, SinkTask, SourceTask, Task
+
+
+class FluidEngine:
+    """Rate-based approximation of a deployment for coarse scheduler comparisons.
+
+    Instead of simulating tuples, every step propagates flow rates through the tasks in topological order.
+    Sources emit their current data rate, an operator task runs at most at its service rate 1 / (latency mean / speed up) and keeps the excess as a backlog,
+    and its outputs are multiplied by the selectivity and shared uniformly among the candidate tasks of every downstream vertex.
+    The waiting time of an operator is approximated by Kingman's formula below saturation plus the time to drain its backlog, and the variability of its output follows Whitt's linking equation.
+    The end-to-end delay of a sink is the rate-weighted mean of the service times, waiting times and mean link delays along the paths.
+    """
+    def __init__(self, source_worker: List[Worker], ordered_task: Dict[int, List[OperatorTask]], sink_task: List[SinkTask], routing: RoutingTable, step: float=1.0):
+        """
+        Args:
+            source_worker (List[Worker]): workers running the source tasks
+            ordered_task (Dict[int, List[OperatorTask]]): operator tasks grouped by their tier
+            sink_task (List[SinkTask]): sink tasks
+            routing (RoutingTable): routing table of the deployment
+            step (float, optional): length of a step (seconds). Defaults to 1.0.
+        """
+        self._step = step
+        self._routing = routing
+        self._source: List[SourceTask] = [task for worker in source_worker for task in worker.graph.task]
+        self._operator: List[OperatorTask] = [task for key in ordered_task for task in ordered_task[key]]
+        self._sink: List[SinkTask] = list(sink_task)
+        self._order: List[Task] = self._topological_order()
+
+        # outgoing flows of each task: (target, vertex id of the sender, share of the output, mean link delay (ms))
+        self._flow: Dict[Task, List[tuple]] = {}
+        for task in self._source + self._operator:
+            flows = []
+            for routes in routing.routes(task):
+                for route in routes:
+                    if route is None:
+                        continue
+                    target = route[0]
+                    delay = Network.DISTRIBUTION[routing.link_type(task, target)].mean
+                    flows.append((target, task.vertex_id, 1 / len(routes), delay))
+            self._flow[task] = flows
+
+        self._backlog: Dict[Task, float] = {task: 0.0 for task in self._operator}
+        self._utilization: Dict[Task, float] = {task: 0.0 for task in self._operator}
+        self._waiting_time: Dict[Task, float] = {task: 0.0 for task in self._operator}
+        self._start_period()
+
+    @property
+    def backlog(self) -> Dict[Task, float]:
+        """Executions waiting in the queue of each operator task
+        """
+        return self._backlog
+
+    @property
+    def utilization(self) -> Dict[Task, float]:
+        """Offered load of each operator task in the last step
+        """
+        return self._utilization
+
+    @property
+    def waiting_time(self) -> Dict[Task, float]:
+        """Approximated queueing delay of each operator task in the last step (seconds)
+        """
+        return self._waiting_time
+
+    def _topological_order(self) -> List[Task]:
+        indegree: Dict[Task, int] = {task: 0 for task in self._operator + self._sink}
+        targets: Dict[Task, List[Task]] = {}
+        for task in self._source + self._operator:
+            targets[task] = []
+            for routes in self._routing.routes(task):
+                for route in routes:
+                    if route is not None and route[0] in indegree:
+                        targets[task].append(route[0])
+                        indegree[route[0]] += 1
+
+        ret = []
+        q = list(self._source)
+        while q:
+            now = q.pop(0)
+            ret.append(now)
+            for target in targets.get(now, []):
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    q.append(target)
+        return ret
+
+    def _start_period(self):
+        self._period_length = 0.0
+        self._sent: Dict[Task, float] = {task: 0.0 for task in self._source}
+        self._executed: Dict[Task, float] = {task: 0.0 for task in self._operator}
+        self._arrival: Dict[Task, Dict[str, List[float]]] = {task: {} for task in self._operator}
+        self._received: Dict[Task, float] = {task: 0.0 for task in self._sink}
+        self._delay: Dict[Task, float] = {task: 0.0 for task in self._sink}
+
+    def advance(self):
+        """Simulate one step
+        """
+        # per input: rate (tuples/s), rate * squared coefficient of variation, rate * accumulated latency (ms)
+        inflow: Dict[Task, Dict[str, List[float]]] = {}
+        self._period_length += self._step
+
+        for task in self._order:
+            if type(task) == SourceTask:
+                rate, scv, latency = task.current_data_rate, 0.0, 0.0
+                self._sent[task] += rate * self._step
+            elif type(task) == OperatorTask:
+                rate, scv, latency = self._serve(task, inflow.get(task, {}))
+            else:
+                for key, (rate, _, weighted_latency) in inflow.get(task, {}).items():
+                    self._received[task] += rate * self._step
+                    self._delay[task] += weighted_latency * self._step
+                continue
+
+            for target, key, share, delay in self._flow[task]:
+                flow = inflow.setdefault(target, {}).setdefault(key, [0.0, 0.0, 0.0])
+                flow[0] += rate * share
+                flow[1] += rate * share * scv
+                flow[2] += rate * share * (latency + delay)
+
+    def _serve(self, task: OperatorTask, inputs: Dict[str, List[float]]):
+        """Serve the given inputs for one step
+
+        Returns:
+            Tuple[float, float, float]: output rate (messages/s), squared coefficient of variation of the output and accumulated latency of the output (ms)
+        """
+        required = task.required_num_tuple
+        service_time = task.latency_generator.mean / task.speed_up / 1000
+        service_rate = 1 / service_time
+        service_scv = (task.latency_generator.std / task.latency_generator.mean) ** 2
+
+        # an execution takes the required number of tuples from every input queue
+        demand, arrival_scv, latency = 0.0, 0.0, 0.0
+        keys = task.input_vertex
+        if keys and all(key in inputs and inputs[key][0] > 0 for key in keys):
+            demand = min(inputs[key][0] for key in keys) / required
+            slowest = min(keys, key=lambda key: inputs[key][0])
+            arrival_scv = inputs[slowest][1] / inputs[slowest][0] / required
+            latency = max(inputs[key][2] / inputs[key][0] for key in keys)
+
+            for key in keys:
+                stats = self._arrival[task].setdefault(key, [0.0, 0.0])
+                stats[0] += inputs[key][0] * self._step
+                stats[1] += inputs[key][1] * self._step
+
+        offered = demand * self._step + self._backlog[task]
+        executed = min(offered, service_rate * self._step)
+        backlog = offered - executed
+        utilization = demand / service_rate
+
+        waiting_time = (self._backlog[task] + backlog) / 2 / service_rate
+        if utilization < 1:
+            # Kingman's approximation of G/G/1
+            waiting_time += utilization / (1 - utilization) * (arrival_scv + service_scv) / 2 * service_time
+
+        self._backlog[task] = backlog
+        self._utilization[task] = utilization
+        self._waiting_time[task] = waiting_time
+        self._executed[task] += executed
+
+        # Whitt's linking equation for the variability of the departures
+        busy = min(utilization, 1.0)
+        departure_scv = busy ** 2 * service_scv + (1 - busy ** 2) * arrival_scv
+        output_rate = executed / self._step * int(required * task.selectivity)
+        return output_rate, departure_scv, latency + (waiting_time + service_time) * 1000
+
+    def collect_period(self) -> Dict[Task, dict]:
+        """Close the period of every task with the statistics of the engine
+
+        Returns:
+            Dict[Task, dict]: result of record_period() of each task, in the format of post_result()
+        """
+        ret = {}
+        for task in self._source:
+            ret[task] = task.record_period(int(self._sent[task]))
+
+        for task in self._operator:
+            generator = task.latency_generator
+            execute_latency = generator.mean / task.speed_up
+            execute_var = (generator.std / task.speed_up) ** 2
+
+            # the simulator records the interval between arrivals multiplied by the required number of tuples
+            arv_mean, arv_var = [], []
+            for key, (tuples, weighted_scv) in self._arrival[task].items():
+                interval = self._period_length * task.required_num_tuple / tuples
+                arv_mean.append(interval)
+                arv_var.append(weighted_scv / tuples * interval ** 2)
+            ret[task] = task.record_period(int(self._executed[task]), execute_latency, execute_var,
+                                           np.mean(arv_mean) if arv_mean else np.nan, np.mean(arv_var) if arv_var else np.nan)
+
+        for task in self._sink:
+            received = self._received[task]
+            ret[task] = task.record_period(int(received), self._delay[task] / received if received > 0 else np.nan)
+
+        self._start_period()
+        return ret
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import copy
 import numpy as np
 
 class Generator:
@@ -32,6 +33,15 @@ class Generator:
     def std(self, std):
         self._std = std
         
+    def fork(self, common_random_numbers: bool=False) -> 'Generator':
+        """Copy of this generator for another simulation
+
+        Args:
+            common_random_numbers (bool, optional): If True, the copy continues with the same values as this one from now on, but independently of it,
+                e.g. to compare schedulers on common random numbers. Otherwise, the copy draws its own values. Defaults to False.
+        """
+        return copy.copy(self)
+    
     @abstractmethod
     def _get_noise(self):
         pass
@@ -40,21 +50,93 @@ class Generator:
     def next(self):
         pass
     
+    def sample(self, size: int) -> np.ndarray:
+        """Draw the given number of values at once
+
+        Args:
+            size (int): the number of values
+
+        Returns:
+            np.ndarray: drawn values
+        """
+        return np.array([self.next() for _ in range(size)])
+    
 class GaussianGenerator(Generator):
-    def __init__(self, mean=0.7190926125335194, std=0.1) -> None:
+    def __init__(self, mean=0.7190926125335194, std=0.1, block_size: int=4096, seed=None) -> None:
         """Late
 
         Args:
             mean (_type_): _description_
             std (_type_): _description_
+            block_size (int, optional): The number of standard normal values drawn at once from the own random stream of this generator.
+                next() serves values from that block and refills it when it runs out, which avoids a NumPy call per value.
+                If it is 0 or None, every value is drawn from np.random.normal one at a time. Defaults to 4096.
+            seed (_type_, optional): Seed of the own random stream. If None, the seed is drawn from the global NumPy random state,
+                so that seeding np.random before building generators makes their streams reproducible while keeping them independent.
         """
         super().__init__(None, mean, std)
         self._jitter_model = np.random.normal
         self._mean = mean
         self._std = std
+        self._block_size = block_size
+        self._rng = None
+        self._buffer = []
+        self._pos = 0
+        
+        if self._block_size:
+            self.seed(seed)
+    
+    def seed(self, seed=None):
+        """Restart the own random stream of this buffered generator from the given seed
+
+        Args:
+            seed (_type_, optional): Seed of the stream. If None, it is drawn from the global NumPy random state.
+        """
+        if not self._block_size:
+            return
+        
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        self._rng = np.random.default_rng(seed)
+        self._jitter_model = self._rng.standard_normal
+        self._buffer = []
+        self._pos = 0
+    
+    def fork(self, common_random_numbers: bool=False) -> 'GaussianGenerator':
+        ret = copy.copy(self)
+        if self._rng is None:
+            return ret
+        
+        if common_random_numbers:
+            ret._rng = copy.deepcopy(self._rng)
+            ret._jitter_model = ret._rng.standard_normal
+            ret._buffer = list(self._buffer)
+        else:
+            # a new stream seeded from the global NumPy random state, as a new generator would get
+            ret.seed()
+        return ret
+    
+    def _refill(self):
+        # Python floats are much cheaper to serve one at a time than NumPy scalars
+        self._buffer = self._jitter_model(self._block_size).tolist()
+        self._pos = 0
         
     def _get_noise(self):
-        return self._jitter_model()
+        if not self._block_size:
+            return self._jitter_model()
+        
+        if self._pos >= len(self._buffer):
+            self._refill()
+        noise = self._buffer[self._pos]
+        self._pos += 1
+        return noise
     
     def next(self):
-        return abs(self._get_noise() * self._std + self._mean)
\ No newline at end of file
+        return abs(self._get_noise() * self._std + self._mean)
+    
+    def sample(self, size: int) -> np.ndarray:
+        if self._block_size:
+            noise = self._rng.standard_normal(size)
+        else:
+            noise = np.random.normal(size=size)
+        return np.abs(noise * self._std + self._mean)
\ No newline at end of file
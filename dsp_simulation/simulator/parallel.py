@@ -0,0 +1,109 @@
+from typing import Dict, List, Set, Tuple
+from dsp_simulation.cluster.network import Network
+from dsp_simulation.cluster.physical_node import PhysicalNode
+from dsp_simulation.cluster.worker import Worker
+from dsp_simulation.etc.clock import SystemClock
+from dsp_simulation.etc.message import MessagePool
+from dsp_simulation.topology.task import Task
+
+
+def partition_workers(worker_to_node: Dict[Worker, PhysicalNode], num_partition: int) -> Tuple[List[Set[Worker]], float]:
+    """Split the assigned workers into groups simulated by separate processes.
+    Workers are grouped by rack if there are enough racks, otherwise by physical node, so that the links between partitions are the slow ones.
+    The groups are then packed into the partitions from the largest one, always into the partition with the fewest tasks.
+
+    Args:
+        worker_to_node (Dict[Worker, PhysicalNode]): physical node of each assigned worker
+        num_partition (int): the maximum number of partitions
+
+    Returns:
+        Tuple[List[Set[Worker]], float]: workers of each partition, and the lookahead (ms); the lower bound of the delay of a link between partitions
+    """
+    racks = set(node.rack for node in worker_to_node.values())
+    if len(racks) >= num_partition:
+        group_of = lambda node: node.rack
+        crossing = ['INTER-RACK']
+    else:
+        group_of = lambda node: node.id
+        crossing = ['INTER-NODE', 'INTER-RACK']
+
+    groups: Dict[str, Set[Worker]] = {}
+    for worker, node in worker_to_node.items():
+        groups.setdefault(group_of(node), set()).add(worker)
+
+    size = lambda workers: sum(len(worker.graph.task) for worker in workers)
+    partitions: List[Set[Worker]] = [set() for _ in range(min(num_partition, len(groups)))]
+    for group in sorted(groups.values(), key=size, reverse=True):
+        min(partitions, key=size).update(group)
+
+    # a delay more than four standard deviations below the mean is practically never sampled, and PartitionNetwork raises it to the lookahead
+    lookahead = min(Network.DISTRIBUTION[type].mean - 4 * Network.DISTRIBUTION[type].std for type in crossing)
+    return partitions, lookahead
+
+
+class PartitionNetwork(Network):
+    """Network of one partition of a parallel simulation.
+    Packets between local tasks are routed as usual, while packets to tasks of other partitions are exported
+    so that the coordinator can hand them to the partition of their target at the end of the current window.
+
+    A remote packet is received at least one lookahead after it was sent, which is what makes the windows safe;
+    the rare delay sampled below the lookahead is raised to it.
+    """
+    def __init__(self, local: Set[Task], lookahead: float, clock: SystemClock=None, pool: MessagePool=None):
+        """
+        Args:
+            local (Set[Task]): tasks simulated by this partition
+            lookahead (float): the minimum delay of a packet between partitions (ms)
+            clock (SystemClock, optional): clock of the simulation. Defaults to SystemClock.DEFAULT.
+            pool (MessagePool, optional): message store of the simulation. Defaults to MessagePool.DEFAULT.
+        """
+        super().__init__(clock, pool)
+        self._local = local
+        self._lookahead = lookahead
+        self._outbox: List[tuple] = []
+
+    def route(self, src: Task, dest: Task, msg: int):
+        if dest in self._local:
+            super().route(src, dest, msg)
+            return
+
+        pool = self._pool
+        rcv_time = pool.rcv_time[msg]
+        earliest = self._clock.CURRENT + self._lookahead / 1000
+        if rcv_time < earliest:
+            pool.accumulated_latency[msg] += (earliest - rcv_time) * 1000
+            pool.transmission_delay[msg] += (earliest - rcv_time) * 1000
+            rcv_time = earliest
+
+        self._outbox.append((src.id, dest.id, rcv_time, pool.event_time[msg], pool.msg_size[msg],
+                             pool.accumulated_latency[msg], pool.transmission_delay[msg], pool.count[msg]))
+        pool.free(msg)
+
+    def export(self) -> List[tuple]:
+        """Remove and return the packets sent to other partitions since the last call
+
+        Returns:
+            List[tuple]: (source task id, target task id, receive time, event time, message size, accumulated latency, transmission delay, count) of each packet
+        """
+        ret = self._outbox
+        self._outbox = []
+        return ret
+
+    def receive_remote(self, packets: List[tuple], tasks: Dict[str, Task]):
+        """Route the packets exported by other partitions to their local targets
+
+        Args:
+            packets (List[tuple]): packets in the format of export()
+            tasks (Dict[str, Task]): task of each task id
+        """
+        pool = self._pool
+        for src_id, dest_id, rcv_time, event_time, msg_size, accumulated_latency, transmission_delay, count in packets:
+            src = tasks[src_id]
+            msg = pool.alloc(event_time, msg_size, src.vertex_id, accumulated_latency, count)
+            pool.rcv_time[msg] = rcv_time
+            pool.transmission_delay[msg] = transmission_delay
+            super().route(src, tasks[dest_id], msg)
+
+    def initialize(self):
+        super().initialize()
+        self._outbox = []
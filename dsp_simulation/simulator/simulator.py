@@ -1,53 +1,264 @@
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Set, Tuple
 from dsp_simulation.cluster.cluster import Cluster
-from dsp_simulation.cluster.network import Network
+from dsp_simulation.cluster.network import Network, RoutingTable
 from dsp_simulation.cluster.physical_node import PhysicalNode
 from dsp_simulation.cluster.worker import Worker
 from dsp_simulation.etc.clock import SystemClock
+from dsp_simulation.etc.journal import HistoryJournal
+from dsp_simulation.etc.message import MessagePool
+from dsp_simulation.etc.sketch import LatencySketch
 from dsp_simulation.runtime.profiler import Profiler
 from dsp_simulation.runtime.reporter import Reporter
+from dsp_simulation.runtime.store import RunStore
 from dsp_simulation.scheduler.objective import Objective
 from dsp_simulation.scheduler.scheduler import Scheduler
-from dsp_simulation.topology.task import OperatorTask, SinkTask, Task
+from dsp_simulation.simulator.compiled import NUMBA_AVAILABLE, CompiledEngine
+from dsp_simulation.simulator.event import EventQueue, ReadyQueue
+from dsp_simulation.simulator.fluid import FluidEngine
+from dsp_simulation.simulator.parallel import PartitionNetwork, partition_workers
+from dsp_simulation.topology.task import OperatorTask, SinkTask, SourceTask, Task
 from dsp_simulation.topology.topology import Topology
 import pickle as pkl
 from pathlib import Path
 import pandas as pd
+import numpy as np
 import random as rd
 import dsp_simulation.topology.task as t                
 import time
+import itertools
+import math
+import multiprocessing
+import os
+import threading
         
 
 class Simulator:
-    def __init__(self, cluster: Cluster, topology: Topology, scheduler: Scheduler, profiler: Profiler, outdir='./data/', type='wc',  tot_time=900, time_freq=10000, period=1, runtime:bool=False):
+    ENGINE = ['tick', 'event', 'compiled', 'fluid', 'parallel']
+
+    def __init__(self, cluster: Cluster, topology: Topology, scheduler: Scheduler, profiler: Profiler, outdir='./data/', type='wc',  tot_time=900, time_freq=10000, period=1, runtime:bool=False, engine: str='tick', track_ready: bool=False, batch_output: bool=False, partitions: int=2, candidates: List[Scheduler]=None, evaluation_window: float=5.0, evaluation_jobs: int=1, checkpoint_interval: float=0, migration_delay: float=0.002):
         """_summary_
 
         Args:
             cluster (Cluster): _description_
             model (str): Latency model. The general latency generator model has the normal distribution.
+            engine (str, optional): Simulation engine, 'tick' (default), 'event', 'compiled', 'fluid' or 'parallel'.
+                'tick' advances the clock by 1 / time_freq and polls every task on every tick.
+                'event' jumps from one timestamped event (emission, packet arrival, operator completion, report) to the next, so its cost scales with the number of messages instead of the number of ticks.
+                'compiled' runs the tick loop over array-backed task state in numba-compiled functions, see CompiledEngine.
+                'fluid' propagates flow rates instead of tuples once per second with queueing approximations, see FluidEngine. It is meant to screen cluster and scheduler combinations quickly.
+                'parallel' splits the deployment by rack or physical node and runs the event engine of every part in its own process, see _start_parallel_execution.
+            track_ready (bool, optional): Only for the 'tick' engine. If True, operator tasks notify the simulator when they have enough input and only those tasks are run on each tick, instead of polling every operator task. Defaults to False.
+            batch_output (bool, optional): If True, an operator emits the outputs of one execution as a single message carrying their count, which is split across the target tasks when it is routed. Defaults to False.
+            partitions (int, optional): Only for the 'parallel' engine. The maximum number of processes simulating the deployment. Defaults to 2.
+            candidates (List[Scheduler], optional): Only for the 'tick' and 'event' engines with runtime support. Schedulers whose assignments compete with the one of the scheduler at every rescale, see _evaluate_candidates. Defaults to None.
+            evaluation_window (float, optional): Simulated time each candidate assignment runs for before they are compared (seconds). Defaults to 5.0.
+            evaluation_jobs (int, optional): The maximum number of candidate assignments evaluated at the same time. Defaults to 1.
+            checkpoint_interval (float, optional): Only for the 'tick' and 'event' engines. Simulated time between two checkpoints of the simulation (seconds), see _checkpoint and resume. 0 disables checkpoints. Defaults to 0.
+            migration_delay (float, optional): Only for the 'tick' and 'event' engines. Time to transfer one queued message to a task of the new deployment on rebalance, on top of the link delay (ms), see _migrate. Defaults to 0.002.
         """
+        if engine not in Simulator.ENGINE:
+            print(f'No such simulation engine: type one of {Simulator.ENGINE}')
+            exit(1)
+        if candidates and engine not in ['tick', 'event']:
+            print(f'Candidate assignments are only evaluated by the tick and event engines, not by the {engine} engine')
+            exit(1)
         self._cluster = cluster
         self._topology = topology
         self._jitter_model = self._select_latency_distribution(type)
         self._scheduler= scheduler
         self._profiler = profiler
-        self._reporter = Reporter(self._cluster)
         self._outpath: Path = Path(outdir) / self._scheduler.id
         self._outpath.mkdir(exist_ok=True, parents=True)
+        self._store = RunStore(self._outpath / 'store', {
+            'scheduler_id': self._scheduler.id,
+            'scheduler': self._scheduler.__class__.__name__,
+            'topology': self._topology.id,
+            'engine': engine,
+            'simulation_time': tot_time,
+            'period': period,
+            'runtime': runtime,
+        })
+        self._reporter = Reporter(self._cluster, self._store)
         self._simulation_time = tot_time
         self._distribution = None
         self._freq = 1 / time_freq
-        self._network = Network()
+        self._clock = SystemClock()
+        self._pool = MessagePool()
+        self._network = Network(self._clock, self._pool)
+        self._routing: RoutingTable = None
         self._period = period
         self._runtime_support = runtime
         self._should_rebalance = False
         self._reschedule_time = 0
         self._reschedule_elapsed_time = 0
         self._future_assignment = None
-        self._source_current_sent_msg = {}
+        self._future_scheduler = scheduler
+        self._future_evaluation = None
         self._last_second = 0
+        self._engine = engine
+        self._track_ready = track_ready
+        self._batch_output = batch_output
+        self._partitions = partitions
+        self._partition_process = []
+        self._candidates = candidates if candidates else []
+        self._evaluation_window = evaluation_window
+        self._evaluation_jobs = evaluation_jobs
+        self._checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = 0.0
+        self._checkpoint_writer: threading.Thread = None
+        self._journal = HistoryJournal(self.checkpoint_path.with_suffix('.history'))
+        self._ready_queue: ReadyQueue = None
+        self._resumed = None
+        self._migration_delay = migration_delay
+        
+    
+    @property
+    def outpath(self) -> Path:
+        """Directory the results of this simulation are written to
+        """
+        return self._outpath
+    
+    @property
+    def store(self) -> RunStore:
+        """Run store the results of this simulation are written to; the statistics of every task and vertex are appended at each report period.
+        Use RunStore.open() or RunStore.scan() to read it after the simulation.
+        """
+        return self._store
+    
+    @property
+    def checkpoint_path(self) -> Path:
+        """File the checkpoints of this simulation are written to
+        """
+        return self._outpath / 'checkpoint.pkl'
+    
+    def seed(self, seed: int):
+        """Restart every random stream of this simulation from the given seed: the global ones, the delays of the network links,
+        and the latency and data-size generators of the topology, which draw from their own streams.
+        A resumed simulation keeps the streams it had at its checkpoint.
+
+        Args:
+            seed (int): seed of the random streams
+        """
+        if self._resumed:
+            return
         
+        rd.seed(seed)
+        np.random.seed(seed)
+        for generator in Network.DISTRIBUTION.values():
+            generator.seed()
+        
+        generators = [vertex.latency_generator for vertex in self._topology.operator]
+        # the topology has no task graph until it is instantiated
+        if self._topology.taskgraph:
+            for tasks in self._topology.taskgraph._task.values():
+                for task in tasks:
+                    if type(task) == OperatorTask:
+                        generators.append(task.latency_generator)
+                    elif type(task) == SourceTask:
+                        generators.append(task.data_size_generator)
+        # the tasks of an operator share the generator of their vertex, which is restarted once
+        seeded = set()
+        for generator in generators:
+            if generator is not None and id(generator) not in seeded:
+                seeded.add(id(generator))
+                generator.seed()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_checkpoint_writer'] = None
+        state['_journal'] = None
+        state['_partition_process'] = []
+        return state
+    
+    @classmethod
+    def resume(cls, path: str) -> 'Simulator':
+        """Load a simulation from its last checkpoint. start_benchmark() of the returned simulator continues the simulation from where the checkpoint was taken,
+        with the random streams it had then, and writes to the output directory of the original simulation.
+
+        Args:
+            path (str): checkpoint file, or the output directory of the simulation
+
+        Returns:
+            Simulator: the simulation at the time of the checkpoint
+        """
+        path = Path(path)
+        if path.is_dir():
+            path = path / 'checkpoint.pkl'
+        if not path.exists():
+            print(f'No such checkpoint: {path}')
+            exit(1)
+        
+        with open(str(path), 'rb') as f:
+            header = pkl.load(f)
+            state, journal = HistoryJournal.load(path.with_suffix('.history'), header['journal'], f, lambda state: state['simulator']._history())
+        ret: Simulator = state['simulator']
+        ret._journal = journal
+        ret._resumed = {key: state[key] for key in ['distribution', 'random', 'numpy']}
+        print(f'Resume {ret._scheduler.id} from {ret._clock.CURRENT} (seconds)')
+        return ret
+    
+    def _restore_random_state(self):
+        """Restore the random streams shared by the simulations, which are not part of the simulator, as they were at the checkpoint
+        """
+        Network.DISTRIBUTION.update(self._resumed['distribution'])
+        rd.setstate(self._resumed['random'])
+        np.random.set_state(self._resumed['numpy'])
+    
+    def _checkpoint(self):
+        """Take a checkpoint if the checkpoint interval has passed since the last one.
+        The simulator is pickled along with the random streams it shares, between two periods of the engine so that nothing is half-done.
+        The statistics recorded at every period (see _history) are journaled instead (see HistoryJournal): only the values of the last interval are written,
+        so the stall is bounded by the live state of the simulation, i.e. the queues, the packets in flight and the message pool, rather than the length of the run.
+        The files are written by a background thread: the delta is appended to the journal, then the snapshot is written into a temporary file,
+        which replaces the previous checkpoint once it is complete so that a crash while writing leaves the previous one intact.
+        """
+        if not self._checkpoint_interval or self._clock.CURRENT - self._last_checkpoint < self._checkpoint_interval:
+            return
+        
+        self._last_checkpoint = self._clock.CURRENT
+        snapshot, delta, offset = self._journal.dumps({
+            'simulator': self,
+            'distribution': Network.DISTRIBUTION,
+            'random': rd.getstate(),
+            'numpy': np.random.get_state(),
+        }, self._history())
+        header = pkl.dumps({'journal': self._journal.offset}, protocol=pkl.HIGHEST_PROTOCOL)
+        
+        self._wait_checkpoint()
+        self._checkpoint_writer = threading.Thread(target=self._write_checkpoint, args=(header + snapshot, delta, offset))
+        self._checkpoint_writer.start()
+    
+    def _write_checkpoint(self, state: bytes, delta: bytes, offset: int):
+        self._journal.write(delta, offset)
+        path = self.checkpoint_path
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(str(tmp_path), 'wb') as f:
+            f.write(state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(str(tmp_path), str(path))
+    
+    def _history(self) -> List[list]:
+        """Lists of the statistics of every period, which only grow during the run: those of the tasks (Task.HISTORY), the reporter, the profiler and the run store
+        """
+        ret = []
+        if self._topology.taskgraph:
+            for tasks in self._topology.taskgraph._task.values():
+                for task in tasks:
+                    for name in task.HISTORY:
+                        value = getattr(task, name)
+                        if type(value) == list:
+                            ret.append(value)
+        ret.extend(self._reporter.history())
+        ret.extend(self._profiler.history())
+        ret.extend(self._store.history())
+        return ret
+    
+    def _wait_checkpoint(self):
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.join()
+            self._checkpoint_writer = None
     
     def _select_latency_distribution(self, type: str):
         if type == 'wc':
@@ -168,7 +379,7 @@ class Simulator:
         print(f'{self._scheduler.__class__.__name__}-{0}th: {Objective.availability(assignment)}')
         self._scheduler_log = {
             0:{
-                'event_time': str(SystemClock.CURRENT),
+                'event_time': str(self._clock.CURRENT),
                 'stime': stime,
                 'etime': etime,
                 'elapsed_time': str(etime - stime),
@@ -178,39 +389,43 @@ class Simulator:
                 'fitness_network': Objective.topology_network_distance(assignment),
                 #'fitness_failure': Objective.system_failure(assignment),
                 'fitness_failure': Objective.availability(assignment),
+                'fitness_cache': Objective.cache_stats(),
                 }
         }
         
         #with open(self._outpath, 'wb') as f:
         #    pkl.dump(self._scheduler_log, f)
             
-    def _shutdown_task(self):
+    def _shutdown_task(self, summaries: Dict[str, dict]=None):
+        """Write the summary of every task and the scheduler log to the run store
+
+        Args:
+            summaries (Dict[str, dict], optional): summary of each task id taken elsewhere, e.g. by the partitions of the parallel engine, instead of the summary of the task. Defaults to None.
+        """
         for vertex in self._topology.taskgraph._task:
             tasks: List[Task] = self._topology.taskgraph._task[vertex]
             for task in tasks:
-                task.shutdown(str(self._outpath))
-                
-        with open(str(self._outpath / 'scheduler.pkl'), 'wb') as f:
-            pkl.dump(self._scheduler_log, f)
-            
-        self._reporter.shutdown(str(self._outpath / 'reporter.pkl'))
+                summary = summaries[task.id] if summaries and task.id in summaries else task.summary()
+                self._store.put_task(task.id, task.vertex_id, summary)
+        
+        self._store.put('scheduler_log', self._scheduler_log)
+        self._store.flush()
             
     def _get_executable_task(self):
         pass
     
-    def _start_task_execution(self):
-        #scheduler_log = None
-        #with open(self._outpath, 'rb') as f:
-        #    scheduler_log = pkl.load(f)
-        reschedule_count = 1
-        
-        nodes = self._cluster.nodes
+    def _build_execution_plan(self):
+        """Collect the assigned workers of the cluster and group their tasks by the role they play in the simulation loop.
+        The routing table of the deployment is rebuilt as well, and the tasks are bound to the clock and the message pool of this simulation.
+
+        Returns:
+            Tuple: (worker_to_node, task_to_worker, source_worker, ordered_task, sink_task)
+        """
         executable: List[Worker] = []
         worker_to_node: Dict[Worker, PhysicalNode] = {}
         task_to_worker: Dict[Task, Worker] = {}
         
-        # initialization
-        for node in nodes:
+        for node in self._cluster.nodes:
             for worker in node.worker:
                 if worker.assigned:
                     executable.append(worker)
@@ -218,394 +433,728 @@ class Simulator:
 
                     for task in worker.graph.task:
                         task_to_worker[task] = worker
+                        task.bind(self._clock, self._pool)
+                        if type(task) == OperatorTask:
+                            task.update_batch_output(self._batch_output)
         
-        # 이 부분 전면적으로 수정 필요
         source_worker, rest_worker = self._get_source_worker(executable)
         ordered_task = self._order_operator_task(rest_worker)
-        sink_task:List[SinkTask] = self._get_sink_task()
+        sink_task: List[SinkTask] = self._get_sink_task()
+        for task in sink_task:
+            task.bind(self._clock, self._pool)
+        self._routing = RoutingTable(task_to_worker, worker_to_node)
+        return worker_to_node, task_to_worker, source_worker, ordered_task, sink_task
+    
+    def _bind_ready_queue(self, ordered_task: Dict[int, List[OperatorTask]], ready_queue: ReadyQueue):
+        for key in ordered_task:
+            for task in ordered_task[key]:
+                task.bind_ready_queue(ready_queue)
+    
+    def _commit_rebalance(self, reschedule_count: int):
+        """Deploy the assignment computed by the last rescheduling and log it
+
+        Args:
+            reschedule_count (int): sequence number of this rescheduling
+        """
+        self._cluster.assign_topology(self._topology, self._future_assignment)
+        
+        print(f'{self._future_scheduler.__class__.__name__}-{reschedule_count}th: {Objective.availability(self._future_assignment)}')
+        self._scheduler_log[reschedule_count] = {
+                'event_time': str(self._clock.CURRENT),
+                'elapsed_time': str(self._reschedule_elapsed_time),
+                'scheduler': self._future_scheduler.__class__.__name__,
+                'cluster_size': len(self._cluster.nodes),
+                'subgraph_size': len(self._topology.taskgraph.subgraph),
+                'fitness_network': Objective.topology_network_distance(self._future_assignment),
+                'fitness_failure': Objective.availability(self._future_assignment),
+                'fitness_cache': Objective.cache_stats(),
+                'candidates': self._future_evaluation,
+        }
+    
+    def _migrate(self, task_to_worker: Dict[Task, Worker], worker_to_node: Dict[Worker, PhysicalNode], new_task_to_worker: Dict[Task, Worker], new_worker_to_node: Dict[Worker, PhysicalNode]):
+        """Move the state of the previous deployment to the tasks of the new one, which belong to the same vertices, so that no message is lost on rebalance.
+        The tasks of every vertex in the previous deployment are handed to the tasks of the vertex in the new deployment in turn.
+        - A packet in flight to a previous task is forwarded by the worker it arrives at, over the link to the worker of its new target.
+        - The messages queued at a previous task are transferred to the new tasks over the link between their workers, which takes the link delay plus the migration delay per transferred message.
+        - The statistics of the current period and the emission plan of a source are taken over by a new task (see Task.take_over), so the period is reported in full.
+
+        Args:
+            task_to_worker (Dict[Task, Worker]): worker of each task of the previous deployment
+            worker_to_node (Dict[Worker, PhysicalNode]): physical node of each worker of the previous deployment
+            new_task_to_worker (Dict[Task, Worker]): worker of each task of the new deployment
+            new_worker_to_node (Dict[Worker, PhysicalNode]): physical node of each worker of the new deployment
+        """
+        successors: Dict[str, List[Task]] = {}
+        for task in new_task_to_worker:
+            successors.setdefault(task.vertex_id, []).append(task)
+        successor = {vertex_id: itertools.cycle(tasks) for vertex_id, tasks in successors.items()}
+        sender: Dict[str, Task] = {task.vertex_id: task for task in task_to_worker}
+        
+        def link_delay(task: Task, target: Task) -> float:
+            worker, target_worker = task_to_worker[task], new_task_to_worker[target]
+            type = Network.link_type(worker, target_worker, worker_to_node[worker], new_worker_to_node[target_worker])
+            return Network.DISTRIBUTION[type].next()
+        
+        pool = self._pool
+        for pkt in self._network.drain():
+            if pkt.dest in new_task_to_worker:
+                self._network.route(pkt.src, pkt.dest, pkt.msg)
+                continue
+            if pkt.dest not in task_to_worker or pkt.dest.vertex_id not in successor:
+                pool.free(pkt.msg)
+                continue
+            
+            target = next(successor[pkt.dest.vertex_id])
+            delay = link_delay(pkt.dest, target)
+            pool.rcv_time[pkt.msg] += delay / 1000
+            pool.transmission_delay[pkt.msg] += delay
+            pool.accumulated_latency[pkt.msg] += delay
+            self._network.route(pkt.src, target, pkt.msg)
+        
+        now = self._clock.CURRENT
+        for task in task_to_worker:
+            if task.vertex_id not in successor:
+                for _, msg in task.drain():
+                    pool.free(msg)
+                continue
+            
+            next(successor[task.vertex_id]).take_over(task)
+            moved: Dict[Task, List[Tuple[str, int]]] = {}
+            for source, msg in task.drain():
+                moved.setdefault(next(successor[task.vertex_id]), []).append((source, msg))
+            
+            for target, messages in moved.items():
+                delay = link_delay(task, target) + self._migration_delay * len(messages)
+                for source, msg in messages:
+                    pool.rcv_time[msg] = now + delay / 1000
+                    pool.accumulated_latency[msg] += delay
+                    self._network.route(sender.get(source, task), target, msg)
+    
+    def _store_period(self, task: Task, kind: str, stats: dict):
+        """Append the statistics of a task in the current period to the 'task' table of the run store
+
+        Args:
+            task (Task): task
+            kind (str): 'source', 'operator' or 'sink'
+            stats (dict): statistics of the task for the reporter, see post_result()
+        """
+        row = {'time': self._clock.CURRENT, 'task': task.id, 'vertex': task.vertex_id, 'kind': kind}
+        for name, value in stats.items():
+            if type(value) == LatencySketch:
+                row.update({'end_to_end_' + key: quantile for key, quantile in value.quantiles().items()})
+            elif value is not None:
+                row[name] = value
+        self._store.append('task', row)
+    
+    def _report_period(self, source_worker: List[Worker], ordered_task: Dict[int, List[Task]], sink_task: List[SinkTask], results: Dict[Task, dict]=None):
+        """Collect the period statistics of every task, report them and, with runtime support, start rescheduling if the profiler detects a bottleneck.
+
+        Args:
+            results (Dict[Task, dict], optional): period statistics of the tasks in the format of post_result(), if the period was already closed by the engine. post_result() is called for the other tasks. Defaults to None.
+        """
+        self._last_second = self._clock.CURRENT
+        
+        print(f"Now, {self._clock.CURRENT} (seconds)")
+        
+        for worker in source_worker:
+            for task in worker.graph.task:
+                res = results[task] if results is not None and task in results else task.post_result()
+                self._reporter.update_stats(self._topology.id, task, res['reporter'])
+                self._store_period(task, 'source', res['reporter'])
+        
+        for key in ordered_task:
+            for task in ordered_task[key]:
+                res = results[task] if results is not None and task in results else task.post_result()
+                if self._runtime_support:
+                    self._profiler.update_arvtime(task.id, task.vertex_id, res['profiler']['interarrival_time']['mean'], res['profiler']['interarrival_time']['var'])
+                    self._profiler.update_srvtime(task.id, task.vertex_id, res['profiler']['service_time']['mean'], res['profiler']['service_time']['var'])
+                self._reporter.update_stats(self._topology.id, task, res['reporter'])
+                self._store_period(task, 'operator', res['reporter'])
+        
+        for task in sink_task:
+            res = results[task] if results is not None and task in results else task.post_result()
+            self._reporter.update_stats(self._topology.id, task, res['reporter'])
+            self._store_period(task, 'sink', res['reporter'])
+        
+        self._reporter.report(self._clock.CURRENT)
+        self._store.flush()
+        
+        rescale = False
+        if self._runtime_support and not self._should_rebalance:
+            rescale = self._profiler.periodical_update()
+            print(rescale)
+        
+        if self._runtime_support and rescale:
+            self._should_rebalance = True
+            self._profiler.rescale(self._topology)
+            if self._candidates:
+                self._reschedule_candidates()
+            else:
+                self._cluster, assignment, self._reschedule_elapsed_time, elapsed_time = self._scheduler.reschedule(self._cluster, self._topology)
+                self._future_assignment = assignment
+                self._reschedule_time = self._clock.CURRENT + elapsed_time/10**(9)
+            print(f'rescheduling time: {self._reschedule_elapsed_time}')
+    
+    def _reschedule_candidates(self):
+        """Compute an assignment with the scheduler and every candidate scheduler for the rescaled topology,
+        evaluate them from the current state of the simulation (see _evaluate_candidates) and keep the one with the lowest end-to-end delay.
+        The rebalance takes place after the computation time of the chosen scheduler, as with a single scheduler.
+        """
+        self._topology.instantiate(3)
+        schedulers, candidates = [], []
+        for scheduler in [self._scheduler] + self._candidates:
+            cluster, assignment, elapsed, elapsed_time = scheduler.reschedule(self._cluster, self._topology, instantiate=False)
+            if assignment:
+                schedulers.append(scheduler)
+                candidates.append((cluster, assignment, elapsed, elapsed_time))
+        if not candidates:
+            # keep the current deployment
+            print('No scheduler found an assignment for the rescaled topology')
+            self._should_rebalance = False
+            return
+        
+        delays = self._evaluate_candidates([(cluster, assignment) for cluster, assignment, _, _ in candidates])
+        best = int(np.argmin(delays))
+        self._future_evaluation = [(scheduler.id, delay) for scheduler, delay in zip(schedulers, delays)]
+        print(f'candidates: {self._future_evaluation}')
+        
+        self._future_scheduler = schedulers[best]
+        self._cluster, self._future_assignment, self._reschedule_elapsed_time, elapsed_time = candidates[best]
+        self._reschedule_time = self._clock.CURRENT + elapsed_time/10**(9)
+    
+    def _evaluate_candidates(self, candidates: List[tuple]) -> List[float]:
+        """Run every candidate assignment for the evaluation window from the current state of the simulation and measure its end-to-end delay.
+        Each candidate is evaluated in a process forked from this one, so it starts from a snapshot of the simulation without copying it,
+        and at most evaluation_jobs of them run at the same time.
+        The forks restart the random streams from the same seed, so the candidates are compared over the same samples as far as possible.
+        Without the 'fork' start method, the candidates are not evaluated and the first one is chosen.
+
+        Args:
+            candidates (List[tuple]): (cluster, assignment) of each candidate
+
+        Returns:
+            List[float]: mean end-to-end delay of the sink tasks during the window of each candidate (ms); inf if no tuple reached a sink
+        """
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            print('fork is not supported on this platform: candidate assignments are not evaluated')
+            return [0.0] + [math.inf] * (len(candidates) - 1)
+        
+        # a fork must not inherit the checkpoint writer halfway through a file
+        self._wait_checkpoint()
+        context = multiprocessing.get_context('fork')
+        seed = np.random.randint(0, 2**31 - 1)
+        ret = []
+        jobs = max(1, self._evaluation_jobs)
+        for start in range(0, len(candidates), jobs):
+            conns, processes = [], []
+            for cluster, assignment in candidates[start:start + jobs]:
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(target=self._evaluate_candidate, args=(child_conn, cluster, assignment, seed))
+                process.start()
+                conns.append(parent_conn)
+                processes.append(process)
+            
+            for conn, process in zip(conns, processes):
+                ret.append(conn.recv())
+                process.join()
+        return ret
+    
+    def _evaluate_candidate(self, conn, cluster: Cluster, assignment: List[PhysicalNode], seed: int):
+        """Deploy the given assignment in a forked process, run the event engine for the evaluation window and send the end-to-end delay back.
+        The messages of the previous deployment are migrated to the candidate as on rebalance.
+
+        Args:
+            conn (Connection): pipe to the simulation
+            cluster (Cluster): cluster of the candidate
+            assignment (List[PhysicalNode]): assignment of the candidate
+            seed (int): seed of the random streams, shared by the candidates
+        """
+        rd.seed(seed)
+        np.random.seed(seed)
+        for generator in Network.DISTRIBUTION.values():
+            generator.seed()
+        
+        previous_worker_to_node, previous_task_to_worker, _, _, _ = self._build_execution_plan()
+        self._cluster = cluster
+        self._cluster.assign_topology(self._topology, assignment)
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        for task in task_to_worker:
+            if type(task) == OperatorTask:
+                task.latency_generator.seed()
+            elif type(task) == SourceTask:
+                task.data_size_generator.seed()
+        
+        self._migrate(previous_task_to_worker, previous_worker_to_node, task_to_worker, worker_to_node)
+        self._event_reset(source_worker)
+        self._event_advance(self._clock.CURRENT + self._evaluation_window, EventQueue.REPORT)
+        
+        sketch = LatencySketch()
+        for task in sink_task:
+            sketch.merge(task._end_to_end_sketch_period)
+        conn.send(float(sketch.mean) if sketch.count > 0 else math.inf)
+        conn.close()
+    
+    def _send(self, task: Task, msg: int):
+        """Send an output message of the given task to one task of every downstream vertex through the network.
+        The target task, its link class and the delay sampler come from the routing table of the current deployment.
+        A message carrying several tuples is split multinomially across the candidate tasks of each downstream vertex, and every part travels as one packet.
+
+        Args:
+            task (Task): task which produced the message
+            msg (int): handle of the produced message in the message pool of the simulation
+        """
+        pool = self._pool
+        msg_count = pool.count[msg]
+        parts = []
+        for routes in self._routing.routes(task):
+            if msg_count == 1 or len(routes) == 1:
+                route = rd.choice(routes)
+                if route is not None:
+                    parts.append((route, msg_count))
+                continue
+            
+            counts = np.random.multinomial(msg_count, [1 / len(routes)] * len(routes))
+            for route, count in zip(routes, counts):
+                if count > 0 and route is not None:
+                    parts.append((route, int(count)))
+        
+        if not parts:
+            pool.free(msg)
+            return
+        
+        # every part gets its own copy of the message, taken before any delay is added
+        last = len(parts) - 1
+        for idx, (route, count) in enumerate(parts):
+            part = msg if idx == last else pool.copy(msg)
+            pool.count[part] = count
+            self._transmit(task, part, route)
+    
+    def _transmit(self, task: Task, msg: int, route):
+        target, sampler = route
+        transmission_delay_ms = sampler()
+        pool = self._pool
+        pool.transmission_delay[msg] = transmission_delay_ms
+        pool.accumulated_latency[msg] += transmission_delay_ms
+        pool.rcv_time[msg] = pool.event_time[msg] + (transmission_delay_ms / 1000)
+        self._network.route(task, target, msg)
+    
+    def _start_task_execution(self):
+        #scheduler_log = None
+        #with open(self._outpath, 'rb') as f:
+        #    scheduler_log = pkl.load(f)
+        reschedule_count = len(self._scheduler_log)
+        
+        # 이 부분 전면적으로 수정 필요
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        
+        # a resumed simulation keeps the ready queue its tasks were bound to
+        if self._track_ready and not self._resumed:
+            self._ready_queue = ReadyQueue()
+            self._bind_ready_queue(ordered_task, self._ready_queue)
+        ready_queue = self._ready_queue
 
-        interval = 0
-        while SystemClock.CURRENT < self._simulation_time:
+        interval = int(self._clock.CURRENT) // self._period
+        while self._clock.CURRENT < self._simulation_time:
             # Communication Modeling
-            SystemClock.CURRENT += self._freq
+            self._clock.CURRENT += self._freq
             self._network.complete()
             
-            if self._should_rebalance and SystemClock.CURRENT >= self._reschedule_time:
+            if self._should_rebalance and self._clock.CURRENT >= self._reschedule_time:
                 self._should_rebalance = False
                 self._reschedule_time = 0.0
                 
-                for worker in source_worker:
-                    for task in worker.graph.task:
-                        self._source_current_sent_msg[task.vertex_id] = task.sent_msg_cnt_period
-                
-                self._cluster.assign_topology(self._topology, self._future_assignment)
-                
-                nodes = self._cluster.nodes
-                executable: List[Worker] = []
-                worker_to_node: Dict[Worker, PhysicalNode] = {}
-                task_to_worker: Dict[Task, Worker] = {}
-                for node in nodes:
-                    for worker in node.worker:
-                        if worker.assigned:
-                            executable.append(worker)
-                            worker_to_node[worker] = node
-
-                            for task in worker.graph.task:
-                                task_to_worker[task] = worker
-                
-                source_worker, rest_worker = self._get_source_worker(executable)
-                ordered_task = self._order_operator_task(rest_worker)
-                sink_task:List[SinkTask] = self._get_sink_task()
-                
-                print(f'{self._scheduler.__class__.__name__}-{reschedule_count}th: {Objective.availability(self._future_assignment)}')
-                self._scheduler_log[reschedule_count] = {
-                        'event_time': str(SystemClock.CURRENT),
-                        'elapsed_time': str(self._reschedule_elapsed_time),
-                        'scheduler': self._scheduler.__class__.__name__,
-                        'cluster_size': len(self._cluster.nodes),
-                        'subgraph_size': len(self._topology.taskgraph.subgraph),
-                        'fitness_network': Objective.topology_network_distance(self._future_assignment),
-                        'fitness_failure': Objective.availability(self._future_assignment),
-                }
+                self._commit_rebalance(reschedule_count)
+                previous_task_to_worker, previous_worker_to_node = task_to_worker, worker_to_node
+                worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
                 reschedule_count += 1
-                self._network.initialize()
-                
-                previous = self._last_second
-                print(f'previous: {previous}, current: {SystemClock.CURRENT}')
-                cnt11 = 0
-                src_cnt = 0
-                sink_cnt = 0
-                op_cnt = {}
-                while previous < SystemClock.CURRENT:
-                    cnt11 +=1
-                    previous += self._freq
-                    self._network.fake_complete(previous)
-                    
-                    for worker in source_worker:
-                        for task in worker.graph.task:
-                            res = task.fake_start(previous)
-                            if res != None:
-                                src_cnt += 1
-                                for destination in worker.graph.edge[task]['target']:
-                                    edge: List[Task] = worker.graph.edge[task]['target'][destination]
-                                    target = rd.choice(edge)
-                                    
-                                    if target not in task_to_worker:
-                                        continue
-                                    
-                                    target_worker = task_to_worker[target]
-                                    source_node = worker_to_node[worker]
-                                    target_node = worker_to_node[target_worker]
-                                    
-                                    type = Network.TYPE[0]
-                                    if source_node.id != target_node.id:
-                                        if source_node.rack != target_node.rack:
-                                            type = Network.TYPE[3]
-                                        else:
-                                            type = Network.TYPE[2]
-                                    
-                                    if worker.id != target_worker.id:
-                                        type = Network.TYPE[1]
-                                    
-                                    transmission_delay_ms = Network.DISTRIBUTION[type].next()                            
-                                    res['msg'].update_transmission_delay(transmission_delay_ms)
-                                    res['msg'].update_accumulated_latency(transmission_delay_ms)
-                                    res['msg'].update_receive_time(res['msg'].event_time + (transmission_delay_ms / 1000))
-                                    
-                                    self._network.route(task, target, res['msg'])
-                                    
-            
-                    
-                    # start operators
-                    for key in ordered_task:
-                        for task in ordered_task[key]:
-                            res = task.fake_start(previous)
-                            if res != None:
-                                if task.vertex_id not in op_cnt:
-                                    op_cnt[task.vertex_id] = 0
-                                op_cnt[task.vertex_id] += 1 
-                                for msg in res['msg']:
-                                    for destination in task_to_worker[task].graph.edge[task]['target']:
-                                        edge = task_to_worker[task].graph.edge[task]['target'][destination]
-                                        target = rd.choice(edge)
-                                        
-                                        if target not in task_to_worker:
-                                            continue
-                                            
-                                        target_worker = task_to_worker[target]
-                                        source_node = worker_to_node[worker]
-                                        target_node = worker_to_node[target_worker]
-                                        
-                                        type = Network.TYPE[0]
-                                        if source_node.id != target_node.id:
-                                            if source_node.rack != target_node.rack:
-                                                type = Network.TYPE[3]
-                                            else:
-                                                type = Network.TYPE[2]
-                                        
-                                        if worker.id != target_worker.id:
-                                            type = Network.TYPE[1]
-                                
-                                        transmission_delay_ms = Network.DISTRIBUTION[type].next()
-                                        msg.update_transmission_delay(transmission_delay_ms)
-                                        msg.update_accumulated_latency(transmission_delay_ms)
-                                        msg.update_receive_time(msg.event_time + (transmission_delay_ms / 1000))
-                                        self._network.route(task, target, msg)
-                                    #edge = task_to_worker[task].graph.edge[task]['target']
-                                    #target = rd.choice(edge)
-                                        
-                                    #target_worker = task_to_worker[target]
-                                    #source_node = worker_to_node[worker]
-                                    #target_node = worker_to_node[target_worker]
-                                    
-                                    #type = Network.TYPE[0]
-                                    #if source_node.id != target_node.id:
-                                    #    if source_node.rack != target_node.rack:
-                                    #        type = Network.TYPE[3]
-                                    #    else:
-                                    #        type = Network.TYPE[2]
-                                    
-                                    #if worker.id != target_worker.id:
-                                    #    type = Network.TYPE[1]
-                            
-                                    #transmission_delay_ms = Network.DISTRIBUTION[type].next()
-                                    #msg.update_transmission_delay(transmission_delay_ms)
-                                    #msg.update_accumulated_latency(transmission_delay_ms)
-                                    #msg.update_receive_time(msg.event_time + (transmission_delay_ms / 1000))
-                                    #self._network.route(task, target, msg)   
-                                    
-                    # start sink
-                    for task in sink_task:
-                        sink_cnt += 1
-                        task.start()
-                
-                #print(cnt11, src_cnt, sink_cnt)
-                #for key in op_cnt:
-                #    print(f'{key}: {op_cnt[key]}')
-                cnt11 = 0
-                src_cnt = 0 
-                sink_cnt = 0
-                op_cnt = {}
+                self._migrate(previous_task_to_worker, previous_worker_to_node, task_to_worker, worker_to_node)
                 
+                if ready_queue is not None:
+                    ready_queue.clear()
+                    self._bind_ready_queue(ordered_task, ready_queue)
 
             # start source
             for worker in source_worker:
                 for task in worker.graph.task:
                     res = task.start()
                     if res != None:
-                        for destination in worker.graph.edge[task]['target']:
-                            edge: List[Task] = worker.graph.edge[task]['target'][destination]
-                            target = rd.choice(edge)
-                            
-                            if target not in task_to_worker:
-                                        continue
-                            
-                            target_worker = task_to_worker[target]
-                            source_node = worker_to_node[worker]
-                            target_node = worker_to_node[target_worker]
-                            
-                            type = Network.TYPE[0]
-                            if source_node.id != target_node.id:
-                                if source_node.rack != target_node.rack:
-                                    type = Network.TYPE[3]
-                                else:
-                                    type = Network.TYPE[2]
-                            
-                            if worker.id != target_worker.id:
-                                type = Network.TYPE[1]
-                            
-                            transmission_delay_ms = Network.DISTRIBUTION[type].next()                            
-                            res['msg'].update_transmission_delay(transmission_delay_ms)
-                            res['msg'].update_accumulated_latency(transmission_delay_ms)
-                            res['msg'].update_receive_time(res['msg'].event_time + (transmission_delay_ms / 1000))
-                            
-                            self._network.route(task, target, res['msg'])
-                        #edge: List[Task] = worker.graph.edge[task]['target']
-                        #target = rd.choice(edge)
-                        
-                        #target_worker = task_to_worker[target]
-                        #source_node = worker_to_node[worker]
-                        #target_node = worker_to_node[target_worker]
-                        
-                        #type = Network.TYPE[0]
-                        #if source_node.id != target_node.id:
-                        #    if source_node.rack != target_node.rack:
-                        #        type = Network.TYPE[3]
-                        #    else:
-                        #        type = Network.TYPE[2]
-                        
-                        #if worker.id != target_worker.id:
-                        #    type = Network.TYPE[1]
-                        
-                        #transmission_delay_ms = Network.DISTRIBUTION[type].next()                            
-                        #res['msg'].update_transmission_delay(transmission_delay_ms)
-                        #res['msg'].update_accumulated_latency(transmission_delay_ms)
-                        #res['msg'].update_receive_time(res['msg'].event_time + (transmission_delay_ms / 1000))
-                        
-                        #self._network.route(task, target, res['msg'])
+                        self._send(task, res['msg'])
             
             # start operators
-            for key in ordered_task:
-                for task in ordered_task[key]:
+            if ready_queue is None:
+                for key in ordered_task:
+                    for task in ordered_task[key]:
+                        res = task.start()
+                        if res != None:
+                            for msg in res['msg']:
+                                self._send(task, msg)
+            else:
+                for task in ready_queue.due(self._clock.CURRENT):
                     res = task.start()
                     if res != None:
                         for msg in res['msg']:
-                            for destination in task_to_worker[task].graph.edge[task]['target']:
-                                edge = task_to_worker[task].graph.edge[task]['target'][destination]
-                                target = rd.choice(edge)
-                                
-                                if target not in task_to_worker:
-                                        continue
-                                    
-                                target_worker = task_to_worker[target]
-                                source_node = worker_to_node[worker]
-                                target_node = worker_to_node[target_worker]
-                                
-                                type = Network.TYPE[0]
-                                if source_node.id != target_node.id:
-                                    if source_node.rack != target_node.rack:
-                                        type = Network.TYPE[3]
-                                    else:
-                                        type = Network.TYPE[2]
-                                
-                                if worker.id != target_worker.id:
-                                    type = Network.TYPE[1]
-                        
-                                transmission_delay_ms = Network.DISTRIBUTION[type].next()
-                                msg.update_transmission_delay(transmission_delay_ms)
-                                msg.update_accumulated_latency(transmission_delay_ms)
-                                msg.update_receive_time(msg.event_time + (transmission_delay_ms / 1000))
-                                self._network.route(task, target, msg)
-                            #edge = task_to_worker[task].graph.edge[task]['target']
-                            #print(f'{task.vertex_id} target: {task_to_worker[task].graph.edge[task]["target"]}')
-                            #print(f"{task.vertex_id}: {task_to_worker[task].graph.edge[task]}")
-                            #for target in task_to_worker[task].graph.edge[task]['target']:
-                            #    print(f'{target.id}: {target.vertex_id}')
-                                
-                            #exit(1)
-                            #target = rd.choice(edge)
-                                
-                            #target_worker = task_to_worker[target]
-                            #source_node = worker_to_node[worker]
-                            #target_node = worker_to_node[target_worker]
-                            
-                            #type = Network.TYPE[0]
-                            #if source_node.id != target_node.id:
-                            #    if source_node.rack != target_node.rack:
-                            #        type = Network.TYPE[3]
-                            #    else:
-                            #        type = Network.TYPE[2]
-                            
-                            #if worker.id != target_worker.id:
-                            #    type = Network.TYPE[1]
-                    
-                            #transmission_delay_ms = Network.DISTRIBUTION[type].next()
-                            #msg.update_transmission_delay(transmission_delay_ms)
-                            #msg.update_accumulated_latency(transmission_delay_ms)
-                            #msg.update_receive_time(msg.event_time + (transmission_delay_ms / 1000))
-                            #self._network.route(task, target, msg)   
+                            self._send(task, msg)
                             
             # start sink
             for task in sink_task:
                 task.start()
                 
             # report
-            q, r = divmod(int(SystemClock.CURRENT), self._period)
+            q, r = divmod(int(self._clock.CURRENT), self._period)
             if q != interval and r == 0:
                 interval = q
-                self._last_second = SystemClock.CURRENT
-                
-                print(f"Now, {SystemClock.CURRENT} (seconds)")
-                
-                for worker in source_worker:
-                    for task in worker.graph.task:
-                        res = task.post_result()
-                        self._reporter.update_stats(self._topology.id, task, res['reporter'])
-                
-                for key in ordered_task:
-                    for task in ordered_task[key]:
-                        res = task.post_result()
-                        if self._runtime_support:
-                            self._profiler.update_arvtime(task.id, task.vertex_id, res['profiler']['interarrival_time']['mean'], res['profiler']['interarrival_time']['var'])
-                            self._profiler.update_srvtime(task.id, task.vertex_id, res['profiler']['service_time']['mean'], res['profiler']['service_time']['var'])
-                        self._reporter.update_stats(self._topology.id, task, res['reporter'])
-                
-                for task in sink_task:
-                    res = task.post_result()
-                    self._reporter.update_stats(self._topology.id, task, res['reporter'])
-                
-                self._reporter.report()
-                
-                if self._runtime_support and not self._should_rebalance:
-                    rescale = self._profiler.periodical_update()
-                    print(rescale)
+                self._report_period(source_worker, ordered_task, sink_task)
+                print('-'*50)
+                self._checkpoint()
+        
+    
+    def _event_wake_operator(self, task: OperatorTask):
+        """Run the operator if it is idle and has enough input, then schedule its next completion.
+        An operator which is still busy is woken up again when its current execution finishes.
+
+        Args:
+            task (OperatorTask): operator task to wake up
+        """
+        if task in self._busy:
+            return
+        
+        if task._executable_time <= self._clock.CURRENT:
+            if not task._ready():
+                return
+            res = task.start()
+            for msg in res['msg']:
+                self._send(task, msg)
+        
+        self._busy.add(task)
+        self._events.push(task._executable_time, EventQueue.OPERATOR, task)
+    
+    def _event_reset(self, source_worker: List[Worker]):
+        """Start the event engine over for the current deployment; pending events of the previous one are discarded.
+
+        Args:
+            source_worker (List[Worker]): workers running the source tasks
+        """
+        self._events = EventQueue()
+        self._busy = set()
+        for worker in source_worker:
+            for task in worker.graph.task:
+                self._events.push(task.next_emission_time(), EventQueue.SOURCE, task)
+    
+    def _event_advance(self, until: float, kind: int):
+        """Handle packet arrivals and events in order until the given point.
+        Packet arrivals are placed before the events of the same time, as EventQueue.ARRIVAL, so everything ordered before (until, kind) is handled.
+
+        Args:
+            until (float): simulated time to stop at (seconds)
+            kind (int): event kind to stop at, e.g. EventQueue.REPORT
+        """
+        while True:
+            arrival = self._network.next_arrival_time()
+            next_event = self._events.peek()
+            if arrival is not None and (next_event is None or arrival <= next_event[0]):
+                if (arrival, EventQueue.ARRIVAL) >= (until, kind):
+                    break
+                self._clock.CURRENT = arrival
+                for pkt in self._network.complete():
+                    if type(pkt.dest) == OperatorTask:
+                        self._event_wake_operator(pkt.dest)
+                    elif type(pkt.dest) == SinkTask:
+                        pkt.dest.start()
+                continue
+            
+            if next_event is None or next_event >= (until, kind):
+                break
+            now, event_kind, task = self._events.pop()
+            self._clock.CURRENT = now
+            
+            if event_kind == EventQueue.OPERATOR:
+                self._busy.discard(task)
+                self._event_wake_operator(task)
+            elif event_kind == EventQueue.SOURCE:
+                if task.next_emission_time() <= now:
+                    res = task.emit(now)
+                    self._send(task, res['msg'])
+                self._events.push(task.next_emission_time(), EventQueue.SOURCE, task)
+        self._clock.CURRENT = until
+    
+    def _start_event_execution(self):
+        """Discrete-event counterpart of _start_task_execution.
+        Instead of advancing the clock tick by tick, the engine pops timestamped events from a priority queue; source emissions, packet arrivals and operator completions.
+        Tasks are only touched when something happens to them, so an idle task costs nothing.
+        The engine is advanced from one report, or rebalance, to the next.
+        
+        On rebalance, the messages and the statistics of the previous deployment are migrated to the new one as in the tick engine, see _migrate.
+        """
+        reschedule_count = len(self._scheduler_log)
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        # a resumed simulation continues with the events it had at the checkpoint
+        if not self._resumed:
+            self._event_reset(source_worker)
+        
+        for interval in range(int(round(self._clock.CURRENT / self._period)) + 1, int(self._simulation_time // self._period) + 1):
+            report_time = interval * self._period
+            if self._should_rebalance and self._reschedule_time < report_time:
+                self._event_advance(self._reschedule_time, EventQueue.REBALANCE)
+                self._should_rebalance = False
+                self._reschedule_time = 0.0
                 
-                if self._runtime_support and rescale:
-                    rescale = False
-                    #print(SystemClock.CURRENT)
-                    self._should_rebalance = True
-                    #for worker in source_worker:
-                    #    for task in worker.graph.task:
-                    #        self._source_current_sent_msg[task.vertex_id] = task.sent_msg_cnt_period
-                    self._profiler.rescale(self._topology)
-                    #stime = datetime.now()
-                    stime2 = time.time_ns()
-                    self._cluster, assignment, self._reschedule_elapsed_time, elapsed_time = self._scheduler.reschedule(self._cluster, self._topology)
-                    self._future_assignment = assignment
-                    etime2 = time.time_ns()
-                    #elapsed_time = etime2 - stime2
-                    self._reschedule_time = SystemClock.CURRENT + elapsed_time/10**(9)
-                    
-                    #print(type(SystemClock.CURRENT))
-                    #print(type(self._reschedule_time))
-                    #self._cluster.assign_topology(self._topology, assignment)
-                    #etime = datetime.now()
-                    #self._reschedule_elapsed_time = str(etime- stime)
-                    print(f'rescheduling time: {self._reschedule_elapsed_time}')
-                    
-                    
-                    #nodes = self._cluster.nodes
-                    #executable: List[Worker] = []
-                    #worker_to_node: Dict[Worker, PhysicalNode] = {}
-                    #task_to_worker: Dict[Task, Worker] = {}
-                    #for node in nodes:
-                    #    for worker in node.worker:
-                    #        if worker.assigned:
-                    #            executable.append(worker)
-                    #            worker_to_node[worker] = node
+                self._commit_rebalance(reschedule_count)
+                previous_task_to_worker, previous_worker_to_node = task_to_worker, worker_to_node
+                worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+                reschedule_count += 1
+                self._migrate(previous_task_to_worker, previous_worker_to_node, task_to_worker, worker_to_node)
+                self._event_reset(source_worker)
+            
+            self._event_advance(report_time, EventQueue.REPORT)
+            self._report_period(source_worker, ordered_task, sink_task)
+            print('-'*50)
+            self._checkpoint()
+    
+    def _serve_partition(self, conn, local_worker: Set[Worker], lookahead: float, seed: int):
+        """Event loop of one partition of the parallel engine, run in a forked process.
+        The partition simulates the tasks of its workers and follows the commands of the coordinator;
+        ('window', time, packets) and ('report', time, packets) advance it after routing the given packets from other partitions,
+        ('shutdown', None, None) writes the statistics of its tasks and ('stop', None, None) drops it on rebalance, handing back the recorded statistics of its tasks.
 
-                    #            for task in worker.graph.task:
-                    #                task_to_worker[task] = worker
-                    
-                    #source_worker, rest_worker = self._get_source_worker(executable)
-                    #ordered_task = self._order_operator_task(rest_worker)
-                    #sink_task:List[SinkTask] = self._get_sink_task()
-                    
-                    #self._scheduler_log[reschedule_count] = {
-                    #        'event_time': str(SystemClock.CURRENT),
-                    #        'stime': str(stime),
-                    #        'etime': str(etime),
-                    #        'elapsed_time': str(etime - stime),
-                    #        'scheduler': self._scheduler.__class__.__name__,
-                    #        'cluster_size': len(self._cluster.nodes),
-                    #        'subgraph_size': len(self._topology.taskgraph.subgraph),
-                    #        'fitness_network': Objective.topology_network_distance(assignment),
-                    #        'fitness_failure': Objective.system_failure(assignment),
-                    #        #'fitness': fitness11``
-                    #}
-                    #reschedule_count += 1
+        Args:
+            conn (Connection): pipe to the coordinator
+            local_worker (Set[Worker]): workers of this partition
+            lookahead (float): the minimum delay of a packet between partitions (ms)
+            seed (int): seed of the random streams of this partition
+        """
+        rd.seed(seed)
+        np.random.seed(seed)
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        local = set(task for worker in local_worker for task in worker.graph.task)
+        tasks = {task.id: task for task in task_to_worker}
+        
+        # the random streams are inherited from the coordinator, so they are restarted to keep the partitions independent
+        for generator in Network.DISTRIBUTION.values():
+            generator.seed()
+        for task in local:
+            if type(task) == OperatorTask:
+                task.latency_generator.seed()
+            elif type(task) == SourceTask:
+                task.data_size_generator.seed()
+        
+        self._network = PartitionNetwork(local, lookahead, self._clock, self._pool)
+        self._event_reset([worker for worker in source_worker if worker in local_worker])
+        
+        while True:
+            command, until, packets = conn.recv()
+            if command == 'window':
+                self._network.receive_remote(packets, tasks)
+                self._event_advance(until, EventQueue.ARRIVAL)
+                conn.send(self._network.export())
+            elif command == 'report':
+                self._network.receive_remote(packets, tasks)
+                self._event_advance(until, EventQueue.REPORT)
+                results = {task.id: task.post_result() for task in local}
+                conn.send((results, self._network.export()))
+            elif command == 'shutdown':
+                conn.send({task.id: task.summary() for task in local})
+                break
+            elif command == 'stop':
+                conn.send({task.id: {name: getattr(task, name) for name in task.HISTORY} for task in local})
+                break
+        conn.close()
+    
+    def _start_partitions(self, worker_to_node: Dict[Worker, PhysicalNode]):
+        """Fork one process per partition of the current deployment
+
+        Returns:
+            Tuple: (pipe of each partition, partition of each task id, lookahead (seconds))
+        """
+        partitions, lookahead = partition_workers(worker_to_node, self._partitions)
+        print(f'{len(partitions)} partitions, lookahead {lookahead} (ms)')
+        
+        context = multiprocessing.get_context('fork')
+        conns, processes, partition_of = [], [], {}
+        for idx, local_worker in enumerate(partitions):
+            for worker in local_worker:
+                for task in worker.graph.task:
+                    partition_of[task.id] = idx
+            
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=self._serve_partition, args=(child_conn, local_worker, lookahead, np.random.randint(0, 2**31 - 1)))
+            process.start()
+            conns.append(parent_conn)
+            processes.append(process)
+        self._partition_process = processes
+        return conns, partition_of, lookahead / 1000
+    
+    def _stop_partitions(self, conns, command: str) -> list:
+        """Send 'stop' or 'shutdown' to every partition and wait for the processes to exit
+
+        Returns:
+            list: reply of each partition
+        """
+        for conn in conns:
+            conn.send((command, None, None))
+        ret = [conn.recv() for conn in conns]
+        for process in self._partition_process:
+            process.join()
+        self._partition_process = []
+        return ret
+    
+    def _start_parallel_execution(self):
+        """Conservative parallel counterpart of _start_event_execution.
+        The deployment is split into partitions of workers (see partition_workers), and every partition runs the event engine over its own tasks in a forked process.
+        The processes advance in windows no longer than the lookahead, the minimum delay of a link between partitions,
+        so a packet sent to another partition within a window can not be received before the window ends; it is handed over at the end of the window.
+        Windows also end at every report and at the rebalance instant.
+        
+        On rebalance, the partitions are dropped with the messages they hold and the new deployment is partitioned again; only the statistics recorded by the tasks (Task.HISTORY) are handed back.
+        Unlike the tick and event engines, which migrate them (see _migrate), messages queued at the tasks or in flight are dropped.
+        The engine needs the 'fork' start method; without it, the event engine is used instead.
+
+        Returns:
+            Dict[str, dict]: summary of each task id, taken by the partitions
+        """
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            print('fork is not supported on this platform: the parallel engine falls back to the event engine')
+            self._start_event_execution()
+            return None
+        
+        reschedule_count = 1
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        conns, partition_of, lookahead = self._start_partitions(worker_to_node)
+        inbox = [[] for _ in conns]
+        
+        now = 0.0
+        report_time = self._period
+        while report_time <= self._simulation_time:
+            until = min(now + lookahead, report_time)
+            rebalance = self._should_rebalance and self._reschedule_time < until
+            if rebalance:
+                until = max(self._reschedule_time, now)
+            command = 'report' if until == report_time and not rebalance else 'window'
+            
+            for idx, conn in enumerate(conns):
+                conn.send((command, until, inbox[idx]))
+            inbox = [[] for _ in conns]
+            results = {}
+            for conn in conns:
+                if command == 'report':
+                    res, packets = conn.recv()
+                    results.update(res)
+                else:
+                    packets = conn.recv()
+                for packet in packets:
+                    inbox[partition_of[packet[1]]].append(packet)
+            now = until
+            self._clock.CURRENT = now
+            
+            if rebalance:
+                # the previous tasks keep what they recorded, as the tasks of the event engine do
+                tasks = {task.id: task for task in task_to_worker}
+                for history in self._stop_partitions(conns, 'stop'):
+                    for task_id, attrs in history.items():
+                        for name, value in attrs.items():
+                            setattr(tasks[task_id], name, value)
+                self._should_rebalance = False
+                self._reschedule_time = 0.0
                 
-                print('-'*50)             
+                self._commit_rebalance(reschedule_count)
+                worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+                reschedule_count += 1
+                
+                # the statistics of the new tasks start from the rebalance instant as in the event engine
+                conns, partition_of, lookahead = self._start_partitions(worker_to_node)
+                inbox = [[] for _ in conns]
+                continue
+            
+            if command == 'report':
+                self._report_period(source_worker, ordered_task, sink_task, {task: results[task.id] for task in task_to_worker if task.id in results})
+                print('-'*50)
+                report_time += self._period
+        
+        summaries = {}
+        for res in self._stop_partitions(conns, 'shutdown'):
+            summaries.update(res)
+        return summaries
+    
+    def _start_compiled_execution(self):
+        """Counterpart of _start_task_execution running on CompiledEngine.
+        The engine stops at every report period, and at the rebalance instant, where it is rebuilt for the new deployment.
+        Unlike the tick and event engines, the engine drops the messages in flight to the previous deployment on rebalance.
+        """
+        if not NUMBA_AVAILABLE:
+            print('numba is not installed: the compiled engine runs as plain Python')
+        
+        reschedule_count = 1
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        engine = CompiledEngine(source_worker, ordered_task, sink_task, self._routing, self._freq)
         
+        while True:
+            stop_time = self._reschedule_time if self._should_rebalance else math.inf
+            status = engine.run(self._simulation_time, self._period, stop_time)
+            self._clock.CURRENT = engine.now
+            
+            if status == CompiledEngine.REPORT:
+                self._report_period(source_worker, ordered_task, sink_task, engine.collect_period())
+                engine.start_period()
+                print('-'*50)
+            elif status == CompiledEngine.STOP:
+                self._should_rebalance = False
+                self._reschedule_time = 0.0
+                
+                self._commit_rebalance(reschedule_count)
+                worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+                reschedule_count += 1
+                engine = CompiledEngine(source_worker, ordered_task, sink_task, self._routing, self._freq, engine.now, engine.interval)
+            else:
+                break
     
+    def _start_fluid_execution(self):
+        """Counterpart of _start_task_execution running on FluidEngine, which advances one second per step.
+        On rebalance, the engine is rebuilt for the new deployment and the backlogs of the previous one are dropped.
+        """
+        reschedule_count = 1
+        worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+        engine = FluidEngine(source_worker, ordered_task, sink_task, self._routing)
+        
+        for second in range(1, int(self._simulation_time) + 1):
+            self._clock.CURRENT = second
+            if self._should_rebalance and self._clock.CURRENT >= self._reschedule_time:
+                self._should_rebalance = False
+                self._reschedule_time = 0.0
+                
+                self._commit_rebalance(reschedule_count)
+                worker_to_node, task_to_worker, source_worker, ordered_task, sink_task = self._build_execution_plan()
+                reschedule_count += 1
+                engine = FluidEngine(source_worker, ordered_task, sink_task, self._routing)
+            
+            engine.advance()
+            
+            if second % self._period == 0:
+                self._report_period(source_worker, ordered_task, sink_task, engine.collect_period())
+                print('-'*50)
     
     def start_benchmark(self):
         print(f'Start {self._scheduler.id} benchmark')
-        self._start_scheduling()
+        if self._resumed:
+            self._restore_random_state()
+        else:
+            self._start_scheduling()
+        if self._checkpoint_interval and self._engine not in ['tick', 'event']:
+            print(f'Checkpoints are only taken by the tick and event engines, not by the {self._engine} engine')
         print(f'Start Tasks of {self._scheduler.id}')
-        self._start_task_execution()
-        self._shutdown_task()
+        summaries = None
+        if self._engine == 'event':
+            self._start_event_execution()
+        elif self._engine == 'compiled':
+            self._start_compiled_execution()
+        elif self._engine == 'fluid':
+            self._start_fluid_execution()
+        elif self._engine == 'parallel':
+            summaries = self._start_parallel_execution()
+        else:
+            self._start_task_execution()
+        self._wait_checkpoint()
+        self._shutdown_task(summaries)
         print(f'Finish Tasks of {self._scheduler.id}')
         print(f'Finish {self._scheduler.id} benchmark')
         
-        SystemClock.CURRENT = 0
\ No newline at end of file
+        self._clock.CURRENT = 0
+        self._pool.clear()
\ No newline at end of file
@@ -1,16 +1,19 @@
 import sys
+import copy
 import uuid
 import time
-import pickle
 import datetime
 import numpy as np
 
 from abc import ABCMeta, abstractmethod
-from typing import Deque, Dict, List
+from bisect import bisect_right
+from typing import Deque, Dict, List, Tuple
 from pathlib import Path
 from collections import deque
 from dsp_simulation.etc.clock import SystemClock
-from dsp_simulation.etc.message import Message
+from dsp_simulation.etc.message import MessagePool
+from dsp_simulation.etc.sketch import LatencySketch
+from dsp_simulation.etc.statistics import OnlineStatistics
 from dsp_simulation.simulator.generator import GaussianGenerator, Generator
 
 #tz = datetime.timezone(datetime.timedelta(hours=9))
@@ -18,7 +21,34 @@ from dsp_simulation.simulator.generator import GaussianGenerator, Generator
 #outdir = Path(f'./log/{now}')
 
 
+def _copy_state(value):
+    """Copy the containers of a task state, sharing the objects they hold
+    """
+    if type(value) == list:
+        if value and type(value[0]) in (list, dict, deque):
+            return [_copy_state(v) for v in value]
+        return list(value)
+    if type(value) == dict:
+        return {key: _copy_state(v) for key, v in value.items()}
+    if type(value) == deque:
+        return deque(value)
+    if type(value) == set:
+        return set(value)
+    if type(value) == np.ndarray:
+        return value.copy()
+    if type(value) in (LatencySketch, OnlineStatistics):
+        return value.copy()
+    return value
+
+
 class Task(metaclass=ABCMeta):
+    # attributes recording the statistics of every period, which are carried over when a task is moved between processes
+    HISTORY = []
+    # attributes holding the specification of a task, which fork() shares instead of copying
+    SPEC = ['_out_degree', '_input_rate_dist']
+    # the maximum number of values sampled by the online statistics of the whole run, e.g. the message sizes of a source; 0 keeps no sample
+    RESERVOIR = 0
+
     def __init__(self, vertex_id, name=None):
         """_summary_
 
@@ -35,10 +65,54 @@ class Task(metaclass=ABCMeta):
         else:
             self._id = 'task-' + str(uuid.uuid1())
         self._vertex_id = vertex_id
+        self._clock = SystemClock.DEFAULT
+        self._pool = MessagePool.DEFAULT
 
     def __str__(self):
         return self._id
 
+    def fork(self, common_random_numbers: bool=False) -> 'Task':
+        """Copy of this task with its own state.
+        The lists, dictionaries and queues of the state are copied, while the specification, the clock and the message pool are shared.
+
+        Args:
+            common_random_numbers (bool, optional): If True, the generators of the copy continue the streams of this task, see Generator.fork(). Defaults to False.
+
+        Returns:
+            Task: copy of this task
+        """
+        ret = copy.copy(self)
+        for name, value in vars(self).items():
+            if name not in Task.SPEC:
+                setattr(ret, name, _copy_state(value))
+        return ret
+
+    def bind(self, clock: SystemClock, pool: MessagePool):
+        """Run this task on the clock and the message pool of a simulation
+
+        Args:
+            clock (SystemClock): clock of the simulation
+            pool (MessagePool): message store of the simulation
+        """
+        self._clock = clock
+        self._pool = pool
+
+    def take_over(self, task: 'Task'):
+        """Carry over the statistics of the current period from a task of the same vertex in the previous deployment, so that a rebalance does not lose them
+
+        Args:
+            task (Task): task of the previous deployment
+        """
+        pass
+
+    def drain(self) -> List[Tuple[str, int]]:
+        """Remove and return the messages waiting in the queues of this task, to migrate them to the tasks of a new deployment
+
+        Returns:
+            List[Tuple[str, int]]: (vertex id of the sender, message handle) of each message in arrival order. The vertex id is None if the task does not keep it.
+        """
+        return []
+
     @abstractmethod
     def start(self):
         pass
@@ -48,11 +122,17 @@ class Task(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def receive(self, source: str, msg: Message):
+    def receive(self, source: str, msg: int):
         pass
 
     @abstractmethod
-    def shutdown(self, outdir):
+    def summary(self) -> dict:
+        """Statistics of the whole run written to the run store when the simulation ends, see RunStore.put_task().
+        The statistics of every period are written by the simulator as they are reported.
+
+        Returns:
+            dict: statistics of the task, convertible to json
+        """
         pass
 
     @property
@@ -65,16 +145,18 @@ class Task(metaclass=ABCMeta):
 
 
 class SourceTask(Task):
+    HISTORY = ['_data_size', '_sent_msg_cnt']
+
     def __init__(self, vertex_id, max_data_rate, out_degree, name=None, dsize_mean=250, dsize_std=25, input_rate_dist=None):
         super().__init__(vertex_id, name)
 
         self._max_data_rate = max_data_rate
         self._current_data_rate = int(
-            input_rate_dist[int(SystemClock.CURRENT)] * self._max_data_rate)
+            input_rate_dist[int(self._clock.CURRENT)] * self._max_data_rate)
         self._time_for_data = 1 / self._current_data_rate
         self._input_rate_dist = input_rate_dist
 
-        self._data_size = []
+        self._data_size = OnlineStatistics(Task.RESERVOIR)
         self._data_size_gernerator = GaussianGenerator(dsize_mean, dsize_std)
         
         self._sent_msg_cnt = []
@@ -82,28 +164,53 @@ class SourceTask(Task):
         self._last_executed = 0
         self._out_degree = out_degree
         
+        self._round_start_time = 0
+        self._emission_time: List[float] = None
+        self._emission_size: List[float] = None
+        
     @property
     def sent_msg_cnt_period(self):
         return self._sent_msg_cnt_period
     
+    @property
+    def current_data_rate(self):
+        return self._current_data_rate
+    
+    @property
+    def data_size_generator(self):
+        return self._data_size_gernerator
+    
     @property
     def out_degree(self):
         return self._out_degree
         
-    def receive(self, source: str, msg: Message):
+    def receive(self, source: str, msg: int):
         pass
 
+    def fork(self, common_random_numbers: bool=False) -> 'SourceTask':
+        """Copy of this task with its own state and its own message size generator
+        """
+        ret = super().fork(common_random_numbers)
+        ret._data_size_gernerator = self._data_size_gernerator.fork(common_random_numbers)
+        return ret
+
+    def bind(self, clock: SystemClock, pool: MessagePool):
+        rebind = clock is not self._clock
+        super().bind(clock, pool)
+        if rebind:
+            self._update_data_rate()
+
     def _update_data_rate(self):
         self._current_data_rate = int(
-            self._max_data_rate * self._input_rate_dist[int(SystemClock.CURRENT)])
+            self._max_data_rate * self._input_rate_dist[int(self._clock.CURRENT)])
         self._time_for_data = 1 / self._current_data_rate
 
     def post_result(self):
-        #print(f'{self._id} ({int(SystemClock.CURRENT)}): Sent message count({self._sent_msg_cnt})')
+        #print(f'{self._id} ({int(self._clock.CURRENT)}): Sent message count({self._sent_msg_cnt})')
         self._sent_msg_cnt.append(self._sent_msg_cnt_period)
         self._sent_msg_cnt_period = 0
         self._last_executed = 0
-        self._round_start_time = SystemClock.CURRENT
+        self._emission_time = None
 
         self._update_data_rate()
 
@@ -112,110 +219,183 @@ class SourceTask(Task):
                 'sent_msg_cnt': self._sent_msg_cnt[-1]
             }
         }
+    
+    def record_period(self, sent_msg_cnt: int):
+        """Close the current period with a message count simulated outside of this task, e.g. by the compiled engine
 
-    def shutdown(self, outdir):
-        basedir: Path = Path(outdir) / self.vertex_id
-        basedir.mkdir(exist_ok=True, parents=True)
-        filepath = basedir / (self._id + '.pkl')
+        Args:
+            sent_msg_cnt (int): number of messages sent in the period
+
+        Returns:
+            dict: same as post_result()
+        """
+        self._sent_msg_cnt_period = sent_msg_cnt
+        return self.post_result()
 
-        obj = {
+    def summary(self) -> dict:
+        return {
             'max_data_rate': self._max_data_rate,
-            'data_size': self._data_size,
+            'data_size': self._data_size.summary(),
             'data_rate_distribution': self._input_rate_dist,
-            'sent_msg_cnt': self._sent_msg_cnt
         }
 
-        with filepath.open('wb') as f:
-            pickle.dump(obj, file=f)
+    def _plan_round(self):
+        """Draw the emission times and message sizes of the current second at once.
+        Messages are spread uniformly over the second according to the current data rate.
+        """
+        base = int(self._clock.CURRENT)
+        self._round_start_time = base
+        self._emission_time = (base + np.arange(self._current_data_rate) * self._time_for_data).tolist()
+        self._emission_size = self._data_size_gernerator.sample(self._current_data_rate).tolist()
+
+    def next_emission_time(self):
+        """Timestamp at which this source emits its next message.
+        Once every message of the current second has been sent, the next emission is at the start of the following second.
+
+        Returns:
+            float: simulated time of the next emission (seconds)
+        """
+        if self._emission_time is None:
+            self._plan_round()
+        
+        if self._last_executed < len(self._emission_time):
+            return self._emission_time[self._last_executed]
+        return int(self._clock.CURRENT) + 1
+
+    def emit(self, event_time):
+        """Emit the next planned message of the current second at the given time.
+        Planned emissions which are already past the given time are skipped.
 
-        #print(f'Writing a log file to {filepath}')
+        Args:
+            event_time (float): event time of the emitted message
+
+        Returns:
+            dict: handle of the emitted message under the 'msg' key, same as start()
+        """
+        if self._emission_time is None:
+            self._plan_round()
+        
+        msg_size = self._emission_size[self._last_executed]
+        self._data_size.add(msg_size)
+        self._sent_msg_cnt_period += 1
+        self._last_executed = max(self._last_executed + 1, bisect_right(self._emission_time, event_time))
+
+        return {
+            'msg': self._pool.alloc(
+                event_time=event_time,
+                msg_size=msg_size,
+                vertex_id=self.vertex_id
+            )
+        }
 
     def start(self):
-        current = int((SystemClock.CURRENT % 1) / self._time_for_data) + 1
-
-        if current > self._last_executed:
-            msg_size = self._data_size_gernerator.next()
-            self._data_size.append(msg_size)
-            self._sent_msg_cnt_period += 1
-            self._last_executed = current
-
-            return {
-                'msg': Message(
-                    event_time=SystemClock.CURRENT,
-                    msg_size=msg_size,
-                    vertex_id=self.vertex_id
-                )
-            }
-            
-    def fake_start(self, fake):
-        current = int((fake % 1) / self._time_for_data) + 1
-
-        if current > self._last_executed:
-            #print(f'SourceTask fake: {fake}')
-            msg_size = self._data_size_gernerator.next()
-            self._data_size.append(msg_size)
-            self._sent_msg_cnt_period += 1
-            self._last_executed = current
-
-            return {
-                'msg': Message(
-                    event_time=fake,
-                    msg_size=msg_size,
-                    vertex_id=self.vertex_id
-                )
-            }
+        if self._clock.CURRENT >= self.next_emission_time():
+            return self.emit(self._clock.CURRENT)
+
+    def take_over(self, task: 'SourceTask'):
+        """Carry over the messages sent in the current period and the emissions planned for the current second,
+        so that the new source neither sends the messages of the second again nor skips them
+        """
+        self._sent_msg_cnt_period += task._sent_msg_cnt_period
+        if task._emission_time is not None:
+            self._round_start_time = task._round_start_time
+            self._emission_time = task._emission_time
+            self._emission_size = task._emission_size
+            self._last_executed = task._last_executed
 
 
 class SinkTask(Task):
+    HISTORY = ['_throughput', '_end_to_end_delay', '_end_to_end_quantile', '_end_to_end_sketch']
+
     def __init__(self, vertex_id, name=None):
         super().__init__(vertex_id, name)
 
         self._throughput = []
         self._throughput_period = 0
         self._end_to_end_delay: List[float] = []
-        self._end_to_end_delay_period: List[float] = []
-        self._queue: Deque[Message] = deque()
+        self._end_to_end_quantile: List[Dict[str, float]] = []
+        # the end-to-end delays of the whole run and of the current period
+        self._end_to_end_sketch = LatencySketch()
+        self._end_to_end_sketch_period = LatencySketch()
+        self._queue: Deque[int] = deque()
 
     def post_result(self):
+        sketch = self._end_to_end_sketch_period
         self._throughput.append(self._throughput_period)
-        self._end_to_end_delay.append(
-            np.array(self._end_to_end_delay_period).mean())
+        self._end_to_end_delay.append(sketch.mean)
+        self._end_to_end_quantile.append(sketch.quantiles())
+        self._end_to_end_sketch.merge(sketch)
 
         self._throughput_period = 0
-        self._end_to_end_delay_period = []
+        self._end_to_end_sketch_period = LatencySketch()
 
         return {
             'reporter':{
                 'throughput': self._throughput[-1],
-                'end_to_end_delay': self._end_to_end_delay[-1]   
+                'end_to_end_delay': self._end_to_end_delay[-1],
+                'end_to_end_sketch': sketch
+            }
+        }
+    
+    def record_period(self, throughput: int, end_to_end_delay: float):
+        """Close the current period with statistics simulated outside of this task, e.g. by the compiled engine.
+        The quantiles of the end-to-end delay are unknown in that case.
+
+        Args:
+            throughput (int): number of tuples received in the period
+            end_to_end_delay (float): mean end-to-end delay of the received tuples (ms)
+
+        Returns:
+            dict: same as post_result()
+        """
+        self._throughput.append(throughput)
+        self._end_to_end_delay.append(end_to_end_delay)
+        self._end_to_end_quantile.append(LatencySketch().quantiles())
+        
+        return {
+            'reporter':{
+                'throughput': self._throughput[-1],
+                'end_to_end_delay': self._end_to_end_delay[-1],
+                'end_to_end_sketch': None
             }
         }
 
     def start(self):
-        while self._queue:
-            e = self._queue.pop()
-            self._end_to_end_delay_period.append(e.accumulated_latency)
-            self._throughput_period += 1
+        pool = self._pool
+        count, accumulated_latency = pool.count, pool.accumulated_latency
+        sketch = self._end_to_end_sketch_period
+        for e in self._queue:
+            sketch.add(accumulated_latency[e], count[e])
+            self._throughput_period += count[e]
+        pool.release(self._queue)
+        self._queue.clear()
         return None
 
-    def shutdown(self, outdir):
-        basedir: Path = Path(outdir) / self.vertex_id
-        basedir.mkdir(exist_ok=True, parents=True)
-        filepath = basedir / (self._id + '.pkl')
-
-        obj = {
-            'throughput': self._throughput,
-            'e2e_delay': self._end_to_end_delay
+    def summary(self) -> dict:
+        sketch = self._end_to_end_sketch
+        return {
+            'throughput': sum(self._throughput),
+            'e2e_delay': sketch.mean,
+            'e2e_quantile': sketch.quantiles(),
+            'e2e_sketch': sketch.to_dict()
         }
 
-        with filepath.open('wb') as f:
-            pickle.dump(obj, file=f)
-
-    def receive(self, source: str, msg: Message):
+    def receive(self, source: str, msg: int):
         self._queue.append(msg)
 
+    def take_over(self, task: 'SinkTask'):
+        self._throughput_period += task._throughput_period
+        self._end_to_end_sketch_period.merge(task._end_to_end_sketch_period)
+
+    def drain(self) -> List[Tuple[str, int]]:
+        ret = [(None, msg) for msg in self._queue]
+        self._queue = deque()
+        return ret
+
 
 class OperatorTask(Task):
+    HISTORY = ['_throughput', '_execute_latency', '_processing_latency', '_rcv_msg_cnt', '_snd_msg_cnt']
+
     def __init__(self, vertex_id, selectivity, productivity, indegree: List[str] = None, out_degree: List[str]=None, name=None, latency_generator: Generator = None):
         """_summary_
 
@@ -242,27 +422,34 @@ class OperatorTask(Task):
         self._throughput = []
         self._throughput_period = 0
         self._processing_latency = []
-        self._processing_latency_period = []
+        self._processing_latency_period = OnlineStatistics()
         self._execute_latency = []
-        self._execute_latency_period = []
+        self._execute_latency_period = OnlineStatistics()
 
         self._snd_msg_cnt = 0
         self._rcv_msg_cnt: Dict[str, int] = {}
-        self._queue: Dict[str, Deque[Message]] = {}
-        self._waiting_time: Dict[str, List] = {}
-        self._arrival_time: Dict[str, List] = {}
-        self._arrival_time_period: Dict[str, List] = {}
+        self._queue: Dict[str, Deque[int]] = {}
+        self._queued_tuple: Dict[str, int] = {}
+        self._head_taken: Dict[str, int] = {}
+        self._consumed: List[int] = []
+        self._waiting_time: Dict[str, OnlineStatistics] = {}
+        self._last_arrival_time: Dict[str, float] = {}
+        self._arrival_time_period: Dict[str, OnlineStatistics] = {}
         self._out_degree = out_degree
 
         self._executable_time = 0.0
+        self._ready_queue = None
+        self._batch_output = False
 
         if indegree is not None:
             for indegree_id in indegree:
                 self._queue[indegree_id] = deque()
+                self._queued_tuple[indegree_id] = 0
+                self._head_taken[indegree_id] = 0
                 self._rcv_msg_cnt[indegree_id] = 0
-                self._waiting_time[indegree_id] = []
-                self._arrival_time[indegree_id] = []
-                self._arrival_time_period[indegree_id] = []
+                self._waiting_time[indegree_id] = OnlineStatistics(Task.RESERVOIR)
+                self._last_arrival_time[indegree_id] = None
+                self._arrival_time_period[indegree_id] = OnlineStatistics()
 
     @property
     def speed_up(self):
@@ -279,53 +466,99 @@ class OperatorTask(Task):
     def out_degree(self):
         return self._out_degree
     
+    @property
+    def selectivity(self):
+        return self._selectivity
+    
+    @property
+    def productivity(self):
+        return self._productivity
+    
+    @property
+    def required_num_tuple(self):
+        return self._required_num_tuple
+    
+    @property
+    def latency_generator(self):
+        return self._latency_generator
+    
+    @latency_generator.setter
+    def latency_generator(self, latency_generator: Generator):
+        self._latency_generator = latency_generator
+    
+    @property
+    def batch_output(self):
+        return self._batch_output
+    
+    @property
+    def input_vertex(self) -> List[str]:
+        """Vertex ids of the preceding operators, in the order of the input queues
+        """
+        return list(self._queue)
+    
     def update_speed_up(self, speed_up):
         self._speed_up = speed_up
 
-    def shutdown(self, outdir):
-        basedir: Path = Path(outdir) / self.vertex_id
-        basedir.mkdir(exist_ok=True, parents=True)
-        filepath = basedir / (self._id + '.pkl')
+    def update_batch_output(self, batch_output: bool):
+        """If True, the outputs of one execution are emitted as a single message whose count is the number of outputs, instead of as that many identical messages.
 
+        Args:
+            batch_output (bool): whether to batch the outputs
+        """
+        self._batch_output = batch_output
+
+    def bind_ready_queue(self, ready_queue):
+        """Let this task notify the given ready queue whenever it has enough input to be run.
+        If None is given, the task is polled by the simulator instead.
+
+        Args:
+            ready_queue (ReadyQueue): ready queue of the simulator
+        """
+        self._ready_queue = ready_queue
+        self._notify_ready()
+
+    def _notify_ready(self):
+        if self._ready_queue is None:
+            return
+        for key in self._queue:
+            if self._queued_tuple[key] < self._required_num_tuple:
+                return
+        self._ready_queue.notify(self, self._executable_time)
+
+    def summary(self) -> dict:
         #for key in self._waiting_time:
         #    print(f'Average waiting time({key}->{self.vertex_id}): {np.array(self._waiting_time[key]).mean()}ms')
 
-        obj = {
-            'throughput': self._throughput,
-            'execute_latency': self._execute_latency,
-            'processing_latency': self._processing_latency,
+        return {
+            'throughput': sum(self._throughput),
             'productivity': self._productivity,
             'selectivity': self._selectivity,
             'speed_up': self._speed_up,
             'received_messasge': self._rcv_msg_cnt,
             'sent_message': self._snd_msg_cnt,
-            #'waiting_time': self._waiting_time[key]
+            'waiting_time': {key: stats.summary() for key, stats in self._waiting_time.items()},
         }
 
-        with filepath.open('wb') as f:
-            pickle.dump(obj, file=f)
-        #print(f'Writing a log file to {filepath}')
-
     def _ready(self):
         """If there are various incoming data from multiple preceding operators, it should be blocked up to there is a data for each queue
 
         Returns:
             _type_: _description_
         """
-        if self._executable_time > SystemClock.CURRENT:
+        if self._executable_time > self._clock.CURRENT:
             return False
 
         for key in self._queue:
-            if len(self._queue[key]) < self._required_num_tuple:
+            if self._queued_tuple[key] < self._required_num_tuple:
                 return False
-            if SystemClock.CURRENT < self._queue[key][0].rcv_time:
+            if self._clock.CURRENT < self._pool.rcv_time[self._queue[key][0]]:
                 return False
 
         return True
 
     def post_result(self):
 
-        #print(f'{self._id} ({int(SystemClock.CURRENT)}): throughput({self._throughput})')
+        #print(f'{self._id} ({int(self._clock.CURRENT)}): throughput({self._throughput})')
 
         arv_mean, arv_var = 0, 0
         keys = []
@@ -334,38 +567,34 @@ class OperatorTask(Task):
             keys.append(key)
             #if not self._arrival_time_period[key]:
             #    print(f'asdfasdfasdf {self.id}, {key}: {self._arrival_time_period[key]}')
-            arv_time = np.array(self._arrival_time_period[key])
-            #print(f'{self.id} arv_time: {key}, {arv_time.mean()}')
+            arv_time = self._arrival_time_period[key]
+            #print(f'{self.id} arv_time: {key}, {arv_time.mean}')
 
-            arv_mean += arv_time.mean()
-            arv_var += arv_time.var()
+            arv_mean += arv_time.mean
+            arv_var += arv_time.var
 
-            self._arrival_time_period[key] = []
+            self._arrival_time_period[key] = OnlineStatistics()
             self._rcv_msg_cnt[key] = 0
         arv_mean /= len(keys)
         arv_var /= len(keys)
 
-        exec_time = np.array(self._execute_latency_period) / 1000
+        exec_time = self._execute_latency_period
         
 
         self._throughput.append(self._throughput_period)
-        self._execute_latency.append(np.mean(self._execute_latency_period))
-        self._processing_latency.append(
-            np.mean(self._processing_latency_period))
+        self._execute_latency.append(exec_time.mean)
+        self._processing_latency.append(self._processing_latency_period.mean)
         
         
         #print(f'{self.id} throughput: {self._throughput_period}')
         #print(f'{self.id} exec_time: {exec_time.mean()}')
-        #print(f'{self.id} arv_time: {np.array(self._arrival_time_period[key]).mean()}')
+        #print(f'{self.id} arv_time: {self._arrival_time_period[key].mean}')
         
 
-        self._execute_latency_period = []
-        self._processing_latency_period = []
+        self._execute_latency_period = OnlineStatistics()
+        self._processing_latency_period = OnlineStatistics()
         self._throughput_period = 0
 
-        for key in self._queue:
-            self._arrival_time_period[key] = []
-
         return {
             'profiler': {
                 'interarrival_time': {
@@ -373,8 +602,8 @@ class OperatorTask(Task):
                     'var': arv_var
                 },
                 'service_time': {
-                    'mean': exec_time.mean(),
-                    'var': exec_time.var()
+                    'mean': exec_time.mean / 1000,
+                    'var': exec_time.var / 10**6
                 }
             },
             'reporter': {
@@ -384,133 +613,142 @@ class OperatorTask(Task):
             }
         }
 
-    def receive(self, source: str, msg: Message):
+    def record_period(self, throughput: int, execute_latency_mean: float, execute_latency_var: float, interarrival_mean: float, interarrival_var: float):
+        """Close the current period with statistics simulated outside of this task, e.g. by the compiled engine
+
+        Args:
+            throughput (int): number of executions in the period
+            execute_latency_mean (float): mean execute latency (ms)
+            execute_latency_var (float): variance of the execute latency (ms^2)
+            interarrival_mean (float): mean inter-arrival time averaged over the input queues (seconds)
+            interarrival_var (float): variance of the inter-arrival time averaged over the input queues
+
+        Returns:
+            dict: same as post_result()
+        """
+        self._throughput.append(throughput)
+        self._execute_latency.append(execute_latency_mean)
+        self._processing_latency.append(execute_latency_mean)
+        
+        return {
+            'profiler': {
+                'interarrival_time': {
+                    'mean': interarrival_mean,
+                    'var': interarrival_var
+                },
+                'service_time': {
+                    'mean': execute_latency_mean / 1000,
+                    'var': execute_latency_var / 10**6
+                }
+            },
+            'reporter': {
+                'throughput': self._throughput[-1],
+                'processing_latency': self._processing_latency[-1],
+                'execute_latency': self._execute_latency[-1]
+            }
+        }
+
+    def receive(self, source: str, msg: int):
         """_summary_
 
         Args:
             source (str): vertex id of source task, which send this message
-            msg (Message): _description_
+            msg (int): handle of the message in the message pool of the task
         """
         if source in self._queue:
-            if self._arrival_time[source]:
-                self._arrival_time_period[source].append(
-                    (msg.rcv_time - self._arrival_time[source][-1])*self._required_num_tuple)
-            self._arrival_time[source].append(msg.rcv_time)
+            pool = self._pool
+            rcv_time = pool.rcv_time[msg]
+            count = pool.count[msg]
+            if self._last_arrival_time[source] is not None:
+                self._arrival_time_period[source].add(
+                    (rcv_time - self._last_arrival_time[source])*self._required_num_tuple)
+            # the other tuples of a batched message arrive together with the first one
+            if count > 1:
+                self._arrival_time_period[source].add(0.0, count - 1)
+            self._last_arrival_time[source] = rcv_time
 
             self._queue[source].append(msg)
-            self._rcv_msg_cnt[source] += 1
+            self._queued_tuple[source] += count
+            self._rcv_msg_cnt[source] += count
+            
+            if self._queued_tuple[source] >= self._required_num_tuple:
+                self._notify_ready()
         #elif 
 
-    def _pop_data(self) -> Dict[str, List[Message]]:
-        ret: Dict[str, List[Message]] = {}
-
+    def take_over(self, task: 'OperatorTask'):
+        self._throughput_period += task._throughput_period
+        self._processing_latency_period.merge(task._processing_latency_period)
+        self._execute_latency_period.merge(task._execute_latency_period)
+        for key in task._queue:
+            if key in self._queue:
+                self._arrival_time_period[key].merge(task._arrival_time_period[key])
+
+    def drain(self) -> List[Tuple[str, int]]:
+        """Remove and return the messages waiting in the input queues.
+        The tuples of a batched message which were already taken are removed from its count.
+        """
+        ret = []
+        count = self._pool.count
         for key in self._queue:
-            ret[key] = []
-            for _ in range(self._required_num_tuple):
-                msg = self._queue[key].popleft()
-                ret[key].append(msg)
-
-        for key in ret:
-            for i in range(self._required_num_tuple):
-                self._waiting_time[key].append(
-                    (SystemClock.CURRENT - ret[key][i].rcv_time) * 1000)
-
+            queue = self._queue[key]
+            if queue and self._head_taken[key] > 0:
+                count[queue[0]] -= self._head_taken[key]
+            ret.extend((key, msg) for msg in queue)
+            self._queue[key] = deque()
+            self._queued_tuple[key] = 0
+            self._head_taken[key] = 0
         return ret
 
-    def _processing(self):
-        input: Dict[str, List[Message]] = self._pop_data()
-        latency = self._latency_generator.next() * (1 / self._speed_up)
-        self._processing_latency_period.append(latency)
-
-        size_output = 0
-        #num_output = int(len(input) * self._selectivity)
-        
-        max_delay = -1.0
-        min_waiting_time = sys.maxsize
-        for key in input:
-            #print(len(input[key]))
-            num_output = int(len(input[key]) * self._selectivity)
-            key_output = 0
-            for i in range(self._required_num_tuple):
-                key_output += input[key][i].msg_size
-                max_delay = max(max_delay, input[key][i].accumulated_latency)
-                min_waiting_time = min(
-                    min_waiting_time, (SystemClock.CURRENT - input[key][i].rcv_time)/ 1000)
-            size_output += key_output / self._required_num_tuple
-            
-        max_delay += min_waiting_time
-        size_output *= self._productivity
-        #print(num_output)
-        msg = [Message(SystemClock.CURRENT, size_output,
-                       self._vertex_id, max_delay) for _ in range(num_output)]
-        return msg, min_waiting_time
-
-    def start(self):
-        """_summary_
-        """
-
-        ret = None
-        if self._ready():
-            self._throughput_period += 1
-            stime = time.time()
-            res, waiting_time = self._processing()
-            execute_latency = self._processing_latency_period[-1] + (
-                time.time() - stime)
-            self._execute_latency_period.append(execute_latency)
-
-            for msg in res:
-                msg.update_accumulated_latency(
-                    self._execute_latency_period[-1])
+    def _take(self, key: str) -> List[int]:
+        """Take the required number of tuples from the given input queue.
+        A batched message stays at the head of the queue until all of its tuples are taken, so the same message may be returned several times.
+        Messages leaving the queue are released by _release_consumed() once the execution has read them.
 
-            self._executable_time = SystemClock.CURRENT + \
-                self._execute_latency_period[-1] / 1000
-
-            ret = {
-                'msg': res,
-                'execute_latency': self._execute_latency_period[-1],
-                'processing_latency': self._processing_latency_period[-1]
-            }
-
-        return ret
-    
-    def _fake_ready(self, fake):
-        """If there are various incoming data from multiple preceding operators, it should be blocked up to there is a data for each queue
+        Args:
+            key (str): vertex id of the preceding operator
 
         Returns:
-            _type_: _description_
+            List[int]: one message handle per taken tuple
         """
-        if self._executable_time > fake:
-            return False
+        ret = []
+        queue = self._queue[key]
+        count = self._pool.count
+        for _ in range(self._required_num_tuple):
+            msg = queue[0]
+            ret.append(msg)
+            self._head_taken[key] += 1
+            if self._head_taken[key] >= count[msg]:
+                queue.popleft()
+                self._consumed.append(msg)
+                self._head_taken[key] = 0
+        self._queued_tuple[key] -= self._required_num_tuple
+        return ret
 
-        for key in self._queue:
-            if len(self._queue[key]) < self._required_num_tuple:
-                return False
-            if fake < self._queue[key][0].rcv_time:
-                return False
+    def _release_consumed(self):
+        self._pool.release(self._consumed)
+        self._consumed = []
 
-        return True
-    
-    def _fake_pop_data(self, fake) -> Dict[str, List[Message]]:
-        ret: Dict[str, List[Message]] = {}
+    def _pop_data(self) -> Dict[str, List[int]]:
+        ret: Dict[str, List[int]] = {}
 
         for key in self._queue:
-            ret[key] = []
-            for _ in range(self._required_num_tuple):
-                msg = self._queue[key].popleft()
-                ret[key].append(msg)
+            ret[key] = self._take(key)
 
+        rcv_time = self._pool.rcv_time
         for key in ret:
             for i in range(self._required_num_tuple):
-                self._waiting_time[key].append(
-                    (fake - ret[key][i].rcv_time) * 1000)
+                self._waiting_time[key].add(
+                    (self._clock.CURRENT - rcv_time[ret[key][i]]) * 1000)
 
         return ret
 
-    def _fake_processing(self, fake):
-        input: Dict[str, List[Message]] = self._pop_data()
+    def _processing(self):
+        input: Dict[str, List[int]] = self._pop_data()
         latency = self._latency_generator.next() * (1 / self._speed_up)
-        self._processing_latency_period.append(latency)
+        self._processing_latency_period.add(latency)
 
+        pool = self._pool
+        msg_size, accumulated_latency, rcv_time = pool.msg_size, pool.accumulated_latency, pool.rcv_time
         size_output = 0
         #num_output = int(len(input) * self._selectivity)
         
@@ -521,42 +759,49 @@ class OperatorTask(Task):
             num_output = int(len(input[key]) * self._selectivity)
             key_output = 0
             for i in range(self._required_num_tuple):
-                key_output += input[key][i].msg_size
-                max_delay = max(max_delay, input[key][i].accumulated_latency)
+                key_output += msg_size[input[key][i]]
+                max_delay = max(max_delay, accumulated_latency[input[key][i]])
                 min_waiting_time = min(
-                    min_waiting_time, (fake - input[key][i].rcv_time) / 1000)
+                    min_waiting_time, (self._clock.CURRENT - rcv_time[input[key][i]])/ 1000)
             size_output += key_output / self._required_num_tuple
             
         max_delay += min_waiting_time
         size_output *= self._productivity
         #print(num_output)
-        msg = [Message(fake, size_output,
-                       self._vertex_id, max_delay) for _ in range(num_output)]
-        return msg, min_waiting_time
-    
-    def fake_start(self, fake):
+        self._release_consumed()
+        if self._batch_output:
+            msg = [pool.alloc(self._clock.CURRENT, size_output,
+                              self._vertex_id, max_delay, count=num_output)] if num_output > 0 else []
+        else:
+            msg = [pool.alloc(self._clock.CURRENT, size_output,
+                              self._vertex_id, max_delay) for _ in range(num_output)]
+        return msg, min_waiting_time, latency
+
+    def start(self):
+        """_summary_
+        """
+
         ret = None
-        if self._fake_ready(fake):
-            #print(f'OperatorTask fake: {self.id}, {fake}')
-            #print(f)
+        if self._ready():
             self._throughput_period += 1
             stime = time.time()
-            res, waiting_time = self._fake_processing(fake)
-            execute_latency = self._processing_latency_period[-1] + (
+            res, waiting_time, processing_latency = self._processing()
+            execute_latency = processing_latency + (
                 time.time() - stime)
-            self._execute_latency_period.append(execute_latency)
+            self._execute_latency_period.add(execute_latency)
 
+            accumulated_latency = self._pool.accumulated_latency
             for msg in res:
-                msg.update_accumulated_latency(
-                    self._execute_latency_period[-1])
+                accumulated_latency[msg] += execute_latency
 
-            self._executable_time = fake + \
-                self._execute_latency_period[-1] / 1000
+            self._executable_time = self._clock.CURRENT + \
+                execute_latency / 1000
+            self._notify_ready()
 
             ret = {
                 'msg': res,
-                'execute_latency': self._execute_latency_period[-1],
-                'processing_latency': self._processing_latency_period[-1]
+                'execute_latency': execute_latency,
+                'processing_latency': processing_latency
             }
 
-        return ret
\ No newline at end of file
+        return ret
@@ -1,3 +1,4 @@
+import copy
 import random as rd
 from typing import Dict, List, Tuple
 from dsp_simulation.topology.grouping import GlobalGrouping, ShuffleGrouping
@@ -30,6 +31,18 @@ class SubTaskGraph:
     @property
     def edge(self):
         return self._edge
+    
+    def clone(self, task: Dict[Task, Task], edge: Dict[Task, Dict]) -> 'SubTaskGraph':
+        """Copy of this subgraph with the same id over the given copies of its tasks
+
+        Args:
+            task (Dict[Task, Task]): copy of each task
+            edge (Dict[Task, Dict]): outgoing edges of each copied task
+        """
+        ret = copy.copy(self)
+        ret._task = [task[t] for t in self._task]
+        ret._edge = {task[t]: edge[task[t]] for t in self._edge}
+        return ret
 
 class TaskGraph:
 
@@ -73,6 +86,41 @@ class TaskGraph:
     @property
     def subgraph(self):
         return self._subgraph
+    
+    def clone(self, source: List[SourceVertex], operator: List[OperatorVertex], sink: List[SinkVertex], edge: Dict[Tuple[str, str], str], common_random_numbers: bool=False) -> 'TaskGraph':
+        """Copy of this task graph over the given copies of the vertices, in which every task is forked (see Task.fork()).
+        The operator tasks run on the latency generator of their copied vertex, as the original ones do.
+
+        Args:
+            source (List[SourceVertex]): copied source vertices
+            operator (List[OperatorVertex]): copied operator vertices
+            sink (List[SinkVertex]): copied sink vertices
+            edge (Dict[Tuple[str, str], str]): edges of the copied topology
+            common_random_numbers (bool, optional): If True, the generators of the forked tasks continue the streams of the original ones, see Generator.fork(). Defaults to False.
+
+        Returns:
+            TaskGraph: copy of this task graph
+        """
+        ret = copy.copy(self)
+        ret._source, ret._operator, ret._sink, ret._edge = source, operator, sink, edge
+        
+        vertex = {v.id: v for v in operator}
+        task: Dict[Task, Task] = {}
+        for vertex_id in self._task:
+            for t in self._task[vertex_id]:
+                task[t] = t.fork(common_random_numbers)
+                if type(t) == OperatorTask:
+                    task[t].latency_generator = vertex[vertex_id].latency_generator
+        
+        ret._task = {vertex_id: [task[t] for t in self._task[vertex_id]] for vertex_id in self._task}
+        ret._task_edge = {}
+        for t, e in self._task_edge.items():
+            ret._task_edge[task[t]] = {
+                'target': {key: [task[target] for target in e['target'][key]] for key in e['target']},
+                'rate': {key: list(e['rate'][key]) for key in e['rate']}
+            }
+        ret._subgraph = [subgraph.clone(task, ret._task_edge) for subgraph in self._subgraph]
+        return ret
             
 
     def _get_vertex(self, vertex_id: str):
@@ -1,3 +1,4 @@
+import copy
 import uuid
 
 from typing import Dict, List, Tuple
@@ -256,5 +257,33 @@ class Topology:
     def get_vertex_order(self):
         pass
 
+    def clone(self, common_random_numbers: bool=False) -> 'Topology':
+        """Copy of this topology for another simulation, which is much cheaper than deepcopy.
+        The vertices are copied since their parallelism is rescaled at runtime, and the tasks are forked (see Task.fork()).
+        The workload distribution is shared.
+        
+        The latency and data size generators of the copy draw from new streams seeded from the global NumPy random state, so copies for different simulations sample different values.
+
+        Args:
+            common_random_numbers (bool, optional): If True, the generators of the copy continue the streams of this topology instead,
+                so that simulations of copies, e.g. of different schedulers, sample the same latencies and data sizes. Defaults to False.
+
+        Returns:
+            Topology: copy of this topology
+        """
+        ret = copy.copy(self)
+        vertex: Dict[str, Vertex] = {v.id: v.fork(common_random_numbers) for v in self._source + self._operator + self._sink}
+        for v in vertex.values():
+            v.relink(vertex)
+        
+        ret._source = [vertex[v.id] for v in self._source]
+        ret._operator = [vertex[v.id] for v in self._operator]
+        ret._sink = [vertex[v.id] for v in self._sink]
+        ret._edge = dict(self._edge)
+        ret._graph = {key: list(value) for key, value in self._graph.items()}
+        if isinstance(self._taskgraph, TaskGraph):
+            ret._taskgraph = self._taskgraph.clone(ret._source, ret._operator, ret._sink, ret._edge, common_random_numbers)
+        return ret
+
     def instantiate(self, max_num_operators):
         self._taskgraph = TaskGraph(self._id, self._source, self._operator, self._sink, self._edge, max_num_operators)
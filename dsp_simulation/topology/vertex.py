@@ -1,7 +1,8 @@
 from abc import abstractmethod
-from typing import List
+from typing import Dict, List
 from dsp_simulation.simulator.generator import Generator
 
+import copy
 import uuid
 
 class Vertex:       
@@ -32,6 +33,24 @@ class Vertex:
     
     def add_outdegree(self, target):
         self._outdegree.append(target)
+    
+    def fork(self, common_random_numbers: bool=False) -> 'Vertex':
+        """Copy of this vertex for another topology. The copy still points to the neighbours of this vertex until relink() is called.
+
+        Args:
+            common_random_numbers (bool, optional): If True, the generators of the copy continue the streams of this vertex, see Generator.fork(). Defaults to False.
+        """
+        ret = copy.copy(self)
+        ret._outdegree = list(self._outdegree)
+        return ret
+    
+    def relink(self, vertex: Dict[str, 'Vertex']):
+        """Point to the given copies of the neighbours
+
+        Args:
+            vertex (Dict[str, Vertex]): copy of each vertex by its id
+        """
+        self._outdegree = [vertex[v.id] for v in self._outdegree]
 
     
 class SourceVertex(Vertex):
@@ -81,6 +100,15 @@ class SinkVertex(Vertex):
     
     def add_indegree(self, target):
         self._indegree.append(target)
+    
+    def fork(self, common_random_numbers: bool=False) -> 'SinkVertex':
+        ret = super().fork(common_random_numbers)
+        ret._indegree = list(self._indegree)
+        return ret
+    
+    def relink(self, vertex: Dict[str, Vertex]):
+        super().relink(vertex)
+        self._indegree = [vertex[v.id] for v in self._indegree]
 
     
 class OperatorVertex(Vertex):
@@ -130,3 +158,16 @@ class OperatorVertex(Vertex):
     
     def add_indegree(self, target):
         self._indegree.append(target)
+    
+    def fork(self, common_random_numbers: bool=False) -> 'OperatorVertex':
+        """Copy of this vertex for another topology, with its own latency generator
+        """
+        ret = super().fork(common_random_numbers)
+        ret._indegree = list(self._indegree)
+        if self._latency_generator is not None:
+            ret._latency_generator = self._latency_generator.fork(common_random_numbers)
+        return ret
+    
+    def relink(self, vertex: Dict[str, Vertex]):
+        super().relink(vertex)
+        self._indegree = [vertex[v.id] for v in self._indegree]